@@ -5,6 +5,7 @@ app = create_app()
 
 if __name__ == '__main__':
     print("\n🌱 EcoChat Backend rodando!")
+    print("🗄️  Primeira execução: flask --app app init-db && flask --app app seed-demo")
     print("📍 Acesse: http://localhost:5000")
     print("\n👥 Usuários de teste:")
     print("   - teste@eco.com / 123456")
@@ -8,11 +8,18 @@ def create_app(config_class=Config) -> Flask:
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from .json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     # Garantir que a pasta de uploads existe
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
     # ── Extensions ────────────────────────────────────────────────
+    from .database import configure_engine, register_sqlite_pragmas, register_read_replicas
+    configure_engine(app)
     db.init_app(app)
+    register_sqlite_pragmas(app)
+    register_read_replicas(app)
     cors.init_app(app,
                   supports_credentials=True,
                   origins=[
@@ -31,8 +38,24 @@ def create_app(config_class=Config) -> Flask:
                       ],
                       async_mode='threading',
                       manage_session=False,
-                      logger=True,
-                      engineio_logger=True)
+                      message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+                      logger=app.config['SOCKETIO_LOGGER'],
+                      engineio_logger=app.config['ENGINEIO_LOGGER'])
+
+    from .sockets.event_log import event_log
+    event_log.init_app(app)
+
+    from .cache import cache
+    cache.init_app(app)
+
+    from .services.gamification_service import validar_niveis
+    validar_niveis(app)
+
+    from .services.tasks_catalog import catalogo
+    catalogo.init_app(app)
+
+    from .services.friends_graph import grafo
+    grafo.init_app(app)
 
     # ── Blueprints ────────────────────────────────────────────────
     from .routes.auth import auth_bp
@@ -45,7 +68,13 @@ def create_app(config_class=Config) -> Flask:
     from .routes.chat import chat_bp
     from .routes.stats import stats_bp
     from .routes.private_chat import private_chat_bp
+    from .routes.metrics import metrics_bp
+    from .routes.users import users_bp
 
+    # Antes do stats_bp: com o build do frontend presente, / serve a app React
+    if os.path.isdir(app.config['FRONTEND_DIST']):
+        from .routes.frontend import frontend_bp
+        app.register_blueprint(frontend_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(feed_bp)
     app.register_blueprint(friends_bp)
@@ -56,18 +85,35 @@ def create_app(config_class=Config) -> Flask:
     app.register_blueprint(chat_bp)
     app.register_blueprint(stats_bp)
     app.register_blueprint(private_chat_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(users_bp)
 
     # ── Socket.IO events ──────────────────────────────────────────
     # Importar aqui para registar os handlers (efeito colateral intencional)
     from .sockets import chat_events  # noqa: F401
 
+    # ── Jobs ──────────────────────────────────────────────────────
+    # Os handlers de jobs dos outros serviços entram com as rotas
+    from .services import media_service, atividade_service  # noqa: F401
+    from .jobs import register_jobs
+    register_jobs(app)
+
     # ── Error handlers ────────────────────────────────────────────
     from .errors import register_error_handlers
     register_error_handlers(app)
 
-    # ── DB + seed ─────────────────────────────────────────────────
-    with app.app_context():
-        from .models import init_db
-        init_db()
+    # ── Instrumentação ────────────────────────────────────────────
+    from .request_metrics import register_request_metrics
+    register_request_metrics(app)
+
+    # Registada depois das métricas para correr antes delas (after_request é LIFO)
+    from .compression import register_compression
+    register_compression(app)
+
+    # ── CLI ───────────────────────────────────────────────────────
+    # Schema, migrações e seed são comandos explícitos (flask init-db,
+    # migrate-db, seed-demo) — o arranque não toca na BD.
+    from .commands import register_commands
+    register_commands(app)
 
     return app
@@ -0,0 +1,303 @@
+"""
+Cache de respostas HTTP com invalidação por tags.
+
+Os handlers de leitura declaram a chave (por omissão, o URL) e as tags de
+que dependem; os serviços que escrevem chamam `cache.invalidate(*tags)`
+depois do commit. Cada tag tem uma versão; uma entrada guarda as versões
+das suas tags no momento em que começou a ser calculada e só é servida
+enquanto todas coincidirem com as atuais — invalidar é O(1) por tag e uma
+resposta calculada em paralelo com uma escrita nunca fica em cache.
+
+Vocabulário de tags:
+    feed              listas do feed (posts, likes, contagem de comentários)
+    post:<id>         comentários de uma publicação
+    user:<id>:stats   pontos/tarefas de um utilizador
+    ranking, stats    ranking global e contadores globais
+    user:<id>:friends amizades e pedidos pendentes de um utilizador
+    user:<id>:messages conversas privadas de um utilizador
+    user:<id>:profile nome/email de um utilizador
+    user:<id>:tasks   tarefas completadas por um utilizador
+    tasks             catálogo de tarefas
+    amizades          grafo de amizades em memória (sugestões)
+    nomes             nomes de utilizador mostrados noutras listas
+    dia:<AAAA-MM-DD>  nunca invalidada: muda de nome à meia-noite (períodos das tarefas)
+
+As mesmas versões dão ETags fortes (`cache.etag`) sem serializar o corpo:
+um poll sem alterações recebe 304.
+
+Backends (CACHE_BACKEND): 'memory' (LRU com TTL, por processo), 'redis'
+(partilhado entre processos; requer o pacote `redis`) e 'none' (sem
+respostas guardadas, mas as versões das tags continuam a existir).
+Com 'memory' e 'none' as versões são por processo, por isso uma escrita
+noutro processo não invalidaria nada aqui (nem os ETags): com vários workers web
+(WEB_CONCURRENCY > 1) o arranque falha, e `flask jobs-worker` recusa-se a
+correr; nesses casos usar 'redis'.
+"""
+
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, g, request
+
+from .compression import variantes_etag
+from .metrics import registry
+
+CACHE_REQUESTS = registry.counter(
+    'ecochat_cache_requests_total',
+    'Consultas à cache de respostas por endpoint e resultado.',
+    ('endpoint', 'result'),
+)
+
+
+def _nova_versao(anterior: int = 0) -> int:
+    # Versões são instantes (ns): além de distinguir, dizem quando foi a última escrita
+    return max(time.time_ns(), anterior + 1)
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+
+class MemoryBackend:
+    """
+    LRU limitado a `max_entries`, com expiração por entrada. As versões das
+    tags vivem neste processo: só serve com um processo (ver init_app).
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_tags: int = 100_000):
+        self.max_entries = max_entries
+        self.max_tags = max_tags
+        self._lock = threading.Lock()
+        self._dados: OrderedDict = OrderedDict()   # key → (expira_em, valor)
+        self._tags: OrderedDict = OrderedDict()    # tag → versão, por ordem de invalidação
+        # Tags sem entrada valem o instante de arranque (um ETag emitido antes de
+        # um restart nunca coincide com um emitido depois) ou, se for maior, a
+        # versão mais alta já esquecida: uma tag que sai do LRU nunca volta atrás
+        self._inicio = time.time_ns()
+
+    def get(self, key):
+        with self._lock:
+            item = self._dados.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._dados[key]
+                return None
+            self._dados.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._dados[key] = (time.monotonic() + ttl, value)
+            self._dados.move_to_end(key)
+            while len(self._dados) > self.max_entries:
+                self._dados.popitem(last=False)
+
+    def tag_versions(self, tags) -> list[int]:
+        with self._lock:
+            return [self._tags.get(t, self._inicio) for t in tags]
+
+    def bump(self, tags) -> None:
+        with self._lock:
+            for t in tags:
+                self._tags[t] = _nova_versao(self._tags.get(t, self._inicio))
+                self._tags.move_to_end(t)
+            while len(self._tags) > self.max_tags:
+                _, versao = self._tags.popitem(last=False)
+                self._inicio = max(self._inicio, versao)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dados.clear()
+            self._tags.clear()
+            self._inicio = _nova_versao(self._inicio)
+
+
+class NullBackend(MemoryBackend):
+    """Não guarda respostas; só mantém as versões das tags (para os ETags)."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+
+class RedisBackend:
+    """Partilhado entre workers; as versões das tags vivem em chaves `<prefix>tag:<nome>`."""
+
+    def __init__(self, url: str, prefix: str):
+        try:
+            import redis
+        except ImportError as exc:  # dependência opcional
+            raise RuntimeError("CACHE_BACKEND='redis' requer o pacote redis (pip install redis)") from exc
+        self._r = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._r.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self._r.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    def tag_versions(self, tags) -> list[int]:
+        if not tags:
+            return []
+        return [int(v or 0) for v in self._r.mget([f'{self.prefix}tag:{t}' for t in tags])]
+
+    def bump(self, tags) -> None:
+        agora = _nova_versao()
+        with self._r.pipeline() as pipe:
+            for t in tags:
+                pipe.set(f'{self.prefix}tag:{t}', agora)
+            pipe.execute()
+
+    def clear(self) -> None:
+        # As tags avançam em vez de desaparecerem, para não reutilizar versões antigas
+        tags = self.prefix + 'tag:'
+        for key in self._r.scan_iter(match=self.prefix + '*'):
+            if key.decode().startswith(tags):
+                self._r.set(key, _nova_versao())
+            else:
+                self._r.delete(key)
+
+
+# ── Serialização das entradas ─────────────────────────────────────────────────
+# Uma linha JSON com metadados, depois o corpo tal como foi enviado.
+
+def _empacotar(status: int, mimetype: str, versoes: dict, corpo: bytes) -> bytes:
+    cabecalho = json.dumps({'s': status, 'm': mimetype, 'v': versoes}, separators=(',', ':'))
+    return cabecalho.encode() + b'\n' + corpo
+
+
+def _desempacotar(valor: bytes):
+    cabecalho, _, corpo = valor.partition(b'\n')
+    meta = json.loads(cabecalho)
+    return meta['s'], meta['m'], meta['v'], corpo
+
+
+def _etag(tags: list[str], versoes: list[int]) -> str:
+    chave = repr((request.endpoint, request.full_path, tags, versoes)).encode()
+    return hashlib.blake2b(chave, digest_size=12).hexdigest()
+
+
+# ── Extensão ──────────────────────────────────────────────────────────────────
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = NullBackend()
+        self.default_ttl = 60
+        self.replica_window = 0.0
+
+    def init_app(self, app) -> None:
+        cfg = app.config
+        tipo = cfg['CACHE_BACKEND']
+        if tipo in ('memory', 'none') and cfg['WEB_PROCESSOS'] > 1:
+            # Uma escrita noutro worker não invalidaria as respostas nem os ETags deste
+            raise RuntimeError(f"CACHE_BACKEND={tipo!r} só funciona com um processo web "
+                               f"(WEB_CONCURRENCY={cfg['WEB_PROCESSOS']}); usar 'redis'")
+        if tipo == 'memory':
+            self.backend = MemoryBackend(cfg['CACHE_MAX_ENTRIES'], cfg['CACHE_MAX_TAGS'])
+        elif tipo == 'redis':
+            self.backend = RedisBackend(cfg['CACHE_REDIS_URL'], cfg['CACHE_KEY_PREFIX'])
+        elif tipo == 'none':
+            self.backend = NullBackend(max_tags=cfg['CACHE_MAX_TAGS'])
+        else:
+            raise ValueError(f"CACHE_BACKEND desconhecido: {tipo!r}")
+        self.default_ttl = cfg['CACHE_DEFAULT_TTL']
+        self.replica_window = cfg['READ_REPLICA_STICKY_SECONDS']
+        app.extensions['response_cache'] = self
+
+    def invalidate(self, *tags: str) -> None:
+        """Marca como obsoletas todas as respostas que dependem destas tags."""
+        if tags:
+            self.backend.bump(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def versoes_confiaveis(self, versoes: list[int]) -> bool:
+        # Uma réplica pode ainda não ter a escrita que acabou de invalidar a tag:
+        # dentro dessa janela a resposta é servida, mas não fica em cache nem
+        # recebe um ETag que a associe às versões atuais.
+        if not g.get('db_replica') or not versoes:
+            return True
+        return max(versoes) < time.time_ns() - int(self.replica_window * 1e9)
+
+    def cached(self, tags=(), ttl: float | None = None, key=None):
+        """
+        Decorador para GETs que devolvem JSON.
+
+        `tags` e `key` podem ser valores fixos ou funções que recebem os mesmos
+        argumentos do handler. Só respostas 200 são guardadas.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if isinstance(self.backend, NullBackend) or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                lista = list(tags(*args, **kwargs) if callable(tags) else tags)
+                chave = key(*args, **kwargs) if callable(key) else (key or request.full_path)
+                chave = f'{request.endpoint}:{chave}'
+                atuais = self.backend.tag_versions(lista)
+
+                valor = self.backend.get(chave)
+                if valor is not None:
+                    status, mimetype, versoes, corpo = _desempacotar(valor)
+                    if versoes == dict(zip(lista, atuais)):
+                        CACHE_REQUESTS.inc(request.endpoint, 'hit')
+                        resp = Response(corpo, status=status, mimetype=mimetype)
+                        resp.headers['X-Cache'] = 'HIT'
+                        return resp
+
+                CACHE_REQUESTS.inc(request.endpoint, 'miss')
+                resp = current_app.make_response(view(*args, **kwargs))
+                if resp.status_code == 200 and self.versoes_confiaveis(atuais):
+                    # get_data() junta o corpo de uma resposta em streaming
+                    self.backend.set(
+                        chave,
+                        _empacotar(200, resp.mimetype, dict(zip(lista, atuais)), resp.get_data()),
+                        self.default_ttl if ttl is None else ttl,
+                    )
+                resp.headers['X-Cache'] = 'MISS'
+                return resp
+            return wrapper
+        return decorator
+
+    def etag(self, tags):
+        """
+        Decorador para GETs: ETag forte calculado a partir das versões das tags,
+        antes de correr o handler, e 304 se o cliente já tem essa versão.
+        Usar por fora de `cached`. Só é fiável com versões partilhadas por
+        todos os processos que escrevem: 'redis', ou um único processo.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                lista = list(tags(*args, **kwargs) if callable(tags) else tags)
+                versoes = self.backend.tag_versions(lista)
+                valor = _etag(lista, versoes)
+
+                # O cliente pode ter a versão comprimida, com o ETag sufixado
+                enviado = next((v for v in variantes_etag(valor) if request.if_none_match.contains(v)), None)
+                if enviado:
+                    CACHE_REQUESTS.inc(request.endpoint, 'not_modified')
+                    resp = Response(status=304)
+                    valor = enviado
+                else:
+                    resp = current_app.make_response(view(*args, **kwargs))
+                    if resp.status_code != 200 or not self.versoes_confiaveis(versoes):
+                        return resp
+
+                resp.set_etag(valor)
+                # O browser guarda a resposta mas revalida sempre (If-None-Match)
+                resp.headers['Cache-Control'] = 'private, no-cache'
+                return resp
+            return wrapper
+        return decorator
+
+
+cache = ResponseCache()
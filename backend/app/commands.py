@@ -0,0 +1,178 @@
+"""
+Comandos CLI (flask --app app <comando>, a partir de backend/).
+
+O arranque da app não toca no schema nem faz seed: isso é feito uma vez,
+explicitamente, com estes comandos.
+"""
+
+import click
+
+from .cache import cache
+from .extensions import db
+
+
+def register_commands(app):
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Cria as tabelas e o catálogo de tarefas padrão."""
+        from .models import criar_schema
+        criar_schema()
+        cache.clear()
+        click.echo("Schema criado.")
+
+    @app.cli.command('migrate-db')
+    def migrate_db_command():
+        """Aplica as migrações pendentes a uma BD existente."""
+        from .migrations import aplicar_pendentes
+        n = aplicar_pendentes(echo=click.echo)
+        if n:
+            cache.clear()   # migrações podem recalcular dados
+        click.echo(f"{n} migração(ões) aplicada(s)." if n else "Schema atualizado.")
+
+    @app.cli.command('seed-demo')
+    def seed_demo_command():
+        """Cria os utilizadores de teste e os UserStats em falta."""
+        from .models import criar_schema, seed_demo
+        criar_schema()
+        seed_demo()
+        cache.clear()
+        click.echo("Dados de demonstração criados.")
+
+    @app.cli.command('copy-db')
+    @click.argument('destino')
+    @click.option('--lote', default=5000, show_default=True, help='linhas por insert')
+    def copy_db_command(destino, lote):
+        """Copia todos os dados da BD atual para DESTINO (URI vazio, ex.: PostgreSQL)."""
+        from .database import copiar_dados
+        from .migrations import pendentes
+        if pendentes():
+            raise click.ClickException("A origem tem migrações pendentes — corra migrate-db primeiro.")
+        copiar_dados(destino, lote, echo=click.echo)
+        click.echo("Cópia concluída.")
+
+    @app.cli.command('drop-db')
+    @click.confirmation_option(prompt='Apagar todas as tabelas?')
+    def drop_db_command():
+        """Apaga todas as tabelas (apenas desenvolvimento)."""
+        db.drop_all(bind_key=None)   # as réplicas seguem o primário
+        cache.clear()
+        click.echo("Tabelas apagadas.")
+
+    @app.cli.command('compress-static')
+    @click.argument('diretorio', required=False)
+    def compress_static_command(diretorio):
+        """Gera os ficheiros .gz/.br do build do frontend (por omissão FRONTEND_DIST)."""
+        from .compression import precomprimir_diretorio
+        diretorio = diretorio or app.config['FRONTEND_DIST']
+        n = precomprimir_diretorio(diretorio, app.config['COMPRESS_MIN_SIZE'], echo=click.echo)
+        click.echo(f"{n} ficheiro(s) pré-comprimido(s).")
+
+    @app.cli.command('clear-cache')
+    def clear_cache_command():
+        """Esvazia a cache de respostas (útil com CACHE_BACKEND=redis após mexer na BD à mão)."""
+        cache.clear()
+        click.echo("Cache esvaziada.")
+
+    @app.cli.command('jobs-worker')
+    @click.option('--processos', default=1, show_default=True, help='processos worker em paralelo')
+    @click.option('--tipos', default=None, help='só estes tipos de job, separados por vírgulas')
+    @click.option('--uma-vez', is_flag=True, help='esvazia a fila uma vez e sai')
+    def jobs_worker_command(processos, tipos, uma_vez):
+        """Executa jobs da fila (ver JOBS_WORKER_EMBUTIDO para o worker no processo web)."""
+        import multiprocessing
+        from .jobs import correr_worker
+
+        backend = app.config['CACHE_BACKEND']
+        if backend != 'redis':
+            raise click.UsageError(f"CACHE_BACKEND={backend}: as invalidações deste worker não chegariam "
+                                   "ao processo web. Workers separados requerem redis "
+                                   "(pip install -r requirements-redis.txt, CACHE_BACKEND=redis no servidor "
+                                   "e no worker); sem redis, usar o worker embutido (JOBS_WORKER_EMBUTIDO=1).")
+        lista = [t.strip() for t in tipos.split(',') if t.strip()] if tipos else None
+
+        if processos <= 1:
+            n = correr_worker(lista, uma_vez, app=app)
+            if uma_vez:
+                click.echo(f"{n} job(s) executado(s).")
+            return
+        # spawn: cada processo cria a sua app e as suas ligações à BD
+        ctx = multiprocessing.get_context('spawn')
+        filhos = [ctx.Process(target=correr_worker, args=(lista, uma_vez), name=f'worker-{i}')
+                  for i in range(processos)]
+        for p in filhos:
+            p.start()
+        try:
+            for p in filhos:
+                p.join()
+        except KeyboardInterrupt:
+            for p in filhos:
+                p.join()
+
+    @app.cli.command('jobs-status')
+    def jobs_status_command():
+        """Jobs por tipo e estado, e o lag da fila."""
+        from .jobs import estado_fila
+        estado = estado_fila()
+        estados = ('pendente', 'em_curso', 'concluido', 'falhado')
+        click.echo(f"{'tipo':<20}" + ''.join(f"{e:>11}" for e in estados))
+        for tipo, contagens in sorted(estado['por_tipo'].items()):
+            click.echo(f"{tipo:<20}" + ''.join(f"{contagens.get(e, 0):>11}" for e in estados))
+        click.echo(f"lag: {estado['lag_segundos']:.1f}s")
+
+    @app.cli.command('jobs-retry')
+    @click.option('--tipo', default=None, help='só jobs deste tipo')
+    def jobs_retry_command(tipo):
+        """Volta a pôr na fila os jobs que esgotaram as tentativas."""
+        from .jobs import repetir_falhados
+        click.echo(f"{repetir_falhados(tipo)} job(s) de volta à fila.")
+
+    @app.cli.command('jobs-purge')
+    @click.option('--dias', default=7.0, show_default=True, help='idade mínima dos jobs concluídos')
+    def jobs_purge_command(dias):
+        """Apaga os jobs concluídos antigos."""
+        from .jobs import limpar_concluidos
+        click.echo(f"{limpar_concluidos(dias)} job(s) apagado(s).")
+
+    @app.cli.command('recalcular-niveis')
+    def recalcular_niveis_command():
+        """Atualiza o nível guardado de todos os utilizadores segundo NIVEIS (após mudar os limites)."""
+        from .services.gamification_service import recalcular_niveis
+
+        alterados = recalcular_niveis()
+        db.session.commit()
+        if alterados:
+            cache.invalidate('ranking', *(f'user:{uid}:stats' for uid in alterados))
+        click.echo(f"{len(alterados)} utilizador(es) com o nível alterado.")
+
+    @app.cli.command('reconciliar-amizades')
+    def reconciliar_amizades_command():
+        """Corrige amigos_count/pendentes_count que divergem da tabela amizade."""
+        from .services.friends_service import reconciliar_contadores
+
+        corrigidos = reconciliar_contadores()
+        db.session.commit()
+        if corrigidos:
+            cache.invalidate(*(f'user:{uid}:friends' for uid in corrigidos))
+        click.echo(f"{len(corrigidos)} utilizador(es) com contadores corrigidos.")
+
+    @app.cli.command('rollup-atividade')
+    @click.option('--dia', type=click.DateTime(['%Y-%m-%d']), default=None,
+                  help='dia a processar (por omissão, ontem)')
+    @click.option('--desde', type=click.DateTime(['%Y-%m-%d']), default=None,
+                  help='processar de DESDE até ontem, numa só passagem')
+    def rollup_atividade_command(dia, desde):
+        """Agrega a atividade diária, reconta dias_ativos e expira streaks quebrados."""
+        import time
+        from datetime import date, timedelta
+        from .services.atividade_service import rollup, tags_alteradas
+
+        ontem = date.today() - timedelta(days=1)
+        inicio = (dia or desde).date() if (dia or desde) else ontem
+        fim = inicio + timedelta(days=1) if dia or not desde else ontem + timedelta(days=1)
+        t0 = time.perf_counter()
+        resultado = rollup(inicio, fim)
+        db.session.commit()
+        cache.invalidate(*tags_alteradas(resultado['user_ids']))
+        click.echo(f"{inicio} a {fim - timedelta(days=1)}: {resultado['utilizadores_ativos']} utilizador(es) "
+                   f"com atividade, {resultado['streaks_expirados']} streak(s) expirado(s) "
+                   f"em {time.perf_counter() - t0:.2f}s.")
@@ -0,0 +1,187 @@
+"""
+Compressão das respostas, negociada por Accept-Encoding (brotli ou gzip).
+
+- Respostas de texto/JSON acima de COMPRESS_MIN_SIZE bytes são comprimidas
+  num after_request; as respostas em streaming são comprimidas por blocos.
+- COMPRESS_FAST troca os níveis configurados pelos mais baratos em CPU.
+- Respostas com ETag forte (feed, ranking, perfil, ...) repetem-se enquanto
+  as versões não mudam: a versão comprimida fica guardada num LRU e os
+  pedidos seguintes não voltam a comprimir. A chave inclui um hash do corpo
+  (o ETag só resume as tags, não o que o handler devolveu), por isso um
+  corpo diferente com o mesmo ETag nunca recebe bytes de outro. O ETag leva o sufixo da
+  codificação (`"abc-br"`), como pede o HTTP para representações diferentes.
+- `send_precompressed` serve ficheiros estáticos usando os irmãos `.br`/`.gz`
+  gerados por `flask compress-static`.
+
+O brotli é opcional (`pip install brotli`); sem ele só há gzip.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # dependência opcional — sem ela só há gzip
+    brotli = None
+
+# Extensões dos ficheiros pré-comprimidos, por codificação
+EXTENSOES = {'br': '.br', 'gzip': '.gz'}
+
+_TIPOS_COMPRIMIVEIS = (
+    'application/json', 'application/javascript', 'application/xml',
+    'image/svg+xml', 'application/manifest+json',
+)
+
+
+def codificacoes_disponiveis() -> list[str]:
+    """Por ordem de preferência do servidor."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def variantes_etag(valor: str) -> list[str]:
+    """O ETag sem compressão e os que esta camada pode ter enviado ao cliente."""
+    return [valor] + [f'{valor}-{enc}' for enc in codificacoes_disponiveis()]
+
+
+def _comprimivel(mimetype: str) -> bool:
+    return mimetype.startswith('text/') or mimetype in _TIPOS_COMPRIMIVEIS
+
+
+def _negociar() -> str | None:
+    return request.accept_encodings.best_match(codificacoes_disponiveis())
+
+
+def comprimir(dados: bytes, enc: str, nivel: int) -> bytes:
+    if enc == 'br':
+        return brotli.compress(dados, quality=nivel)
+    # mtime=0: a mesma entrada dá sempre os mesmos bytes
+    return gzip.compress(dados, compresslevel=nivel, mtime=0)
+
+
+def _comprimir_stream(partes, enc: str, nivel: int):
+    if enc == 'br':
+        comp = brotli.Compressor(quality=nivel)
+        processar, terminar = comp.process, comp.finish
+    else:
+        comp = zlib.compressobj(nivel, zlib.DEFLATED, 31)   # 31 = formato gzip
+        processar, terminar = comp.compress, comp.flush
+    for parte in partes:
+        saida = processar(parte if isinstance(parte, bytes) else parte.encode())
+        if saida:
+            yield saida
+    yield terminar()
+
+
+class _Memo:
+    """LRU (etag, hash do corpo, codificação, nível) → corpo comprimido."""
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._dados: OrderedDict = OrderedDict()
+
+    def get(self, chave):
+        with self._lock:
+            valor = self._dados.get(chave)
+            if valor is not None:
+                self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor) -> None:
+        with self._lock:
+            self._dados[chave] = valor
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+
+def _niveis(cfg) -> dict[str, int]:
+    if cfg['COMPRESS_FAST']:
+        return {'gzip': 1, 'br': 0}
+    return {'gzip': cfg['COMPRESS_GZIP_LEVEL'], 'br': cfg['COMPRESS_BR_LEVEL']}
+
+
+def register_compression(app) -> None:
+    if not app.config['COMPRESS']:
+        return
+    niveis = _niveis(app.config)
+    minimo = app.config['COMPRESS_MIN_SIZE']
+    memo = _Memo(app.config['COMPRESS_MEMO_ENTRIES'])
+
+    @app.after_request
+    def _comprimir_resposta(resp):
+        if (resp.status_code != 200 or resp.direct_passthrough or request.method == 'HEAD'
+                or 'Content-Encoding' in resp.headers or not _comprimivel(resp.mimetype)):
+            return resp
+        resp.vary.add('Accept-Encoding')
+        enc = _negociar()
+        if enc is None:
+            return resp
+
+        etag, fraco = resp.get_etag()
+        if resp.is_streamed:
+            resp.response = _comprimir_stream(resp.response, enc, niveis[enc])
+            resp.headers.pop('Content-Length', None)
+        else:
+            dados = resp.get_data()
+            if len(dados) < minimo:
+                return resp
+            chave = None
+            if etag and not fraco:
+                # blake2b custa uma fração da compressão que poupa
+                chave = (etag, hashlib.blake2b(dados, digest_size=16).digest(), enc, niveis[enc])
+            corpo = memo.get(chave) if chave else None
+            if corpo is None:
+                corpo = comprimir(dados, enc, niveis[enc])
+                if chave:
+                    memo.set(chave, corpo)
+            resp.set_data(corpo)
+
+        resp.headers['Content-Encoding'] = enc
+        if etag:
+            resp.set_etag(f'{etag}-{enc}', weak=fraco)
+        return resp
+
+
+def send_precompressed(directory: str, filename: str, **kwargs):
+    """send_from_directory, mas servindo `filename.br`/`.gz` se existir e o cliente aceitar."""
+    enc = _negociar()
+    caminho = os.path.join(directory, filename)
+    if enc and os.path.isfile(caminho + EXTENSOES[enc]):
+        resp = send_from_directory(directory, filename + EXTENSOES[enc], **kwargs)
+        # O tipo é o do original, não o do .br/.gz
+        resp.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        resp.headers['Content-Encoding'] = enc
+    else:
+        resp = send_from_directory(directory, filename, **kwargs)
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+def precomprimir_diretorio(directory: str, minimo: int, echo=print) -> int:
+    """Gera os irmãos .gz (e .br) de cada ficheiro comprimível, no nível máximo."""
+    total = 0
+    for raiz, _, ficheiros in os.walk(directory):
+        for nome in ficheiros:
+            if nome.endswith(tuple(EXTENSOES.values())):
+                continue
+            caminho = os.path.join(raiz, nome)
+            tipo = mimetypes.guess_type(nome)[0] or ''
+            if not _comprimivel(tipo) or os.path.getsize(caminho) < minimo:
+                continue
+            with open(caminho, 'rb') as f:
+                dados = f.read()
+            for enc in codificacoes_disponiveis():
+                corpo = comprimir(dados, enc, 11 if enc == 'br' else 9)
+                if len(corpo) < len(dados):
+                    with open(caminho + EXTENSOES[enc], 'wb') as f:
+                        f.write(corpo)
+            total += 1
+            echo(f"  {os.path.relpath(caminho, directory)}")
+    return total
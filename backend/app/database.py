@@ -0,0 +1,205 @@
+"""
+Perfil do engine SQLAlchemy.
+
+- `configure_engine(app)` (antes de db.init_app) normaliza o URI e calcula
+  as opções da pool a partir de DB_POOL_* para o modelo de workers em uso.
+- `register_sqlite_pragmas(app)` (depois de db.init_app) aplica SQLITE_PRAGMAS
+  a cada ligação nova: WAL, synchronous=NORMAL, busy_timeout, mmap, cache...
+- SQLite e PostgreSQL são ambos suportados; `dialeto()` permite às queries
+  quentes escolher a forma mais eficiente em cada um.
+- `register_read_replicas(app)` envia os GETs de leitura para réplicas, com
+  read-your-writes durante READ_REPLICA_STICKY_SECONDS após uma escrita.
+"""
+
+import random
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.engine import make_url
+
+from .db_session import RoutingSession
+from .extensions import db
+
+
+def _sqlite_em_memoria(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def normalizar_uri(uri: str) -> str:
+    """postgres:// e postgresql:// (sem driver) passam a usar o psycopg 3."""
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    if uri.startswith('postgresql://'):
+        uri = 'postgresql+psycopg://' + uri[len('postgresql://'):]
+    return uri
+
+
+def dialeto() -> str:
+    """Nome do dialeto da BD em uso ('sqlite', 'postgresql', ...)."""
+    return db.session.get_bind().dialect.name
+
+
+def sincronizar_sequencias(conn, tabelas) -> None:
+    """No PostgreSQL, acerta as sequências depois de inserir ids explícitos."""
+    if conn.dialect.name != 'postgresql':
+        return
+    for tabela in tabelas:
+        pk = list(tabela.primary_key.columns)
+        if len(pk) != 1 or not pk[0].autoincrement:
+            continue
+        nome, coluna = tabela.name, pk[0].name
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{nome}\"', '{coluna}'), "
+            f"COALESCE((SELECT MAX(\"{coluna}\") FROM \"{nome}\"), 0) + 1, false)"
+        ))
+
+
+def configure_engine(app) -> None:
+    cfg = app.config
+    cfg['SQLALCHEMY_DATABASE_URI'] = normalizar_uri(cfg['SQLALCHEMY_DATABASE_URI'])
+    url = make_url(cfg['SQLALCHEMY_DATABASE_URI'])
+
+    binds = dict(cfg.get('SQLALCHEMY_BINDS') or {})
+    for i, uri in enumerate(cfg['READ_REPLICA_URIS']):
+        binds[f'replica_{i}'] = normalizar_uri(uri)
+    cfg['SQLALCHEMY_BINDS'] = binds
+
+    opcoes = dict(cfg.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if not _sqlite_em_memoria(url):
+        # SQLite em memória usa SingletonThreadPool/StaticPool, que não aceitam estes argumentos
+        opcoes.setdefault('pool_size', cfg['DB_POOL_SIZE'])
+        opcoes.setdefault('max_overflow', cfg['DB_MAX_OVERFLOW'])
+        opcoes.setdefault('pool_timeout', cfg['DB_POOL_TIMEOUT'])
+        opcoes.setdefault('pool_pre_ping', cfg['DB_POOL_PRE_PING'])
+        opcoes.setdefault('pool_recycle', cfg['DB_POOL_RECYCLE'])
+    cfg['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes
+
+
+def _aplicar_pragmas(pragmas: dict):
+    def on_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for nome, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nome}={valor}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def register_sqlite_pragmas(app) -> None:
+    pragmas = dict(app.config['SQLITE_PRAGMAS'] or {})
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'sqlite':
+                continue
+            if _sqlite_em_memoria(engine.url):
+                # WAL não se aplica a BDs em memória
+                event.listen(engine, 'connect', _aplicar_pragmas(
+                    {k: v for k, v in pragmas.items() if k != 'journal_mode'}))
+            else:
+                event.listen(engine, 'connect', _aplicar_pragmas(pragmas))
+
+
+def copiar_dados(destino_uri: str, lote: int = 5000, echo=print) -> None:
+    """
+    Copia todas as tabelas da BD da app para `destino_uri` (ex.: SQLite → PostgreSQL).
+    O destino tem de estar vazio; o schema é criado a partir dos modelos.
+    """
+    destino = create_engine(normalizar_uri(destino_uri))
+    tabelas = db.metadata.sorted_tables   # ordem compatível com as foreign keys
+
+    db.metadata.create_all(destino)
+    with destino.connect() as conn:
+        for tabela in tabelas:
+            if conn.execute(select(func.count()).select_from(tabela)).scalar():
+                raise RuntimeError(f"A tabela {tabela.name} já tem dados no destino")
+
+    with db.engine.connect() as origem, destino.begin() as conn:
+        for tabela in tabelas:
+            resultado = origem.execution_options(yield_per=lote).execute(select(tabela))
+            total = 0
+            for linhas in resultado.partitions():
+                conn.execute(tabela.insert(), [dict(linha._mapping) for linha in linhas])
+                total += len(linhas)
+            echo(f"  {tabela.name:<20} {total:>10,}")
+        sincronizar_sequencias(conn, tabelas)
+    destino.dispose()
+
+
+# ── Réplicas de leitura ───────────────────────────────────────────────────────
+
+# user_id → instante até ao qual lê do primário (por processo)
+_escritas_recentes: dict[int, float] = {}
+_escritas_lock = threading.Lock()
+
+
+def _user_do_pedido():
+    user_id = session.get('user_id') or (request.view_args or {}).get('user_id')
+    if user_id is None and request.is_json:
+        user_id = (request.get_json(silent=True) or {}).get('user_id')
+    try:
+        return int(user_id) if user_id is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _elegivel_para_replica(endpoints: set) -> bool:
+    if request.method != 'GET' or request.endpoint is None:
+        return False
+    return request.endpoint in endpoints or request.blueprint in endpoints
+
+
+def _em_janela_de_escrita(agora: float) -> bool:
+    if session.get('db_primary_until', 0) > agora:
+        return True
+    user_id = _user_do_pedido()
+    return user_id is not None and _escritas_recentes.get(user_id, 0) > agora
+
+
+def _marcar_escrita() -> None:
+    if not has_request_context() or 'read_replicas' not in current_app.extensions:
+        return
+    # A partir daqui este pedido e os seguintes do mesmo cliente leem do primário
+    g.db_replica = None
+    ate = time.time() + current_app.extensions['read_replicas']['sticky']
+    session['db_primary_until'] = ate
+    user_id = _user_do_pedido()
+    if user_id is not None:
+        with _escritas_lock:
+            _escritas_recentes[user_id] = ate
+            if len(_escritas_recentes) > 10_000:
+                agora = time.time()
+                for uid in [u for u, t in _escritas_recentes.items() if t <= agora]:
+                    del _escritas_recentes[uid]
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _depois_do_flush(sessao, flush_context):
+    _marcar_escrita()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _antes_de_dml(estado):
+    # UPDATE/DELETE/INSERT em Core (session.execute(update(...))) não passam por flush
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        _marcar_escrita()
+
+
+def register_read_replicas(app) -> None:
+    replicas = sorted(k for k in app.config['SQLALCHEMY_BINDS'] if k.startswith('replica_'))
+    if not replicas:
+        return
+    endpoints = set(app.config['READ_REPLICA_ENDPOINTS'])
+    app.extensions['read_replicas'] = {
+        'replicas': replicas, 'sticky': app.config['READ_REPLICA_STICKY_SECONDS'],
+    }
+
+    @app.before_request
+    def _escolher_replica():
+        if _elegivel_para_replica(endpoints) and not _em_janela_de_escrita(time.time()):
+            g.db_replica = random.choice(replicas)
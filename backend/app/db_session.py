@@ -0,0 +1,21 @@
+"""
+Session do Flask-SQLAlchemy com encaminhamento leitura/escrita.
+
+Quando o pedido atual foi marcado para leitura em réplica (g.db_replica,
+ver app/database.py → register_read_replicas), as queries sem bind
+explícito vão para essa réplica. Os flushes e os INSERT/UPDATE/DELETE
+vão sempre para o primário.
+"""
+
+from flask import g, has_request_context
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not getattr(clause, 'is_dml', False)
+                and has_request_context()):
+            replica = g.get('db_replica')
+            if replica is not None:
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
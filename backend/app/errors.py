@@ -13,3 +13,11 @@ def register_error_handlers(app):
     @app.errorhandler(400)
     def bad_request(e):
         return jsonify({"erro": "Pedido inválido"}), 400
+
+    @app.errorhandler(401)
+    def unauthorized(e):
+        return jsonify({"erro": "Não autorizado"}), 401
+
+    @app.errorhandler(403)
+    def forbidden(e):
+        return jsonify({"erro": "Acesso negado"}), 403
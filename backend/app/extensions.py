@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from flask_socketio import SocketIO
+from .db_session import RoutingSession
 
 # Instâncias globais — inicializadas em create_app()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 cors = CORS()
 socketio = SocketIO()
@@ -0,0 +1,355 @@
+"""
+Fila de jobs persistente, numa tabela da BD (modelo Job).
+
+Os serviços chamam `enfileirar(tipo, **kwargs)` antes do commit: o job fica
+gravado na mesma transação que a escrita que o originou, por isso nunca se
+perde um efeito secundário nem corre o de uma escrita que falhou. Os
+handlers são registados com @job_handler(tipo, prioridade, max_tentativas),
+recebem os kwargs e podem devolver tags de cache a invalidar depois do
+commit do job. Com @job_recorrente, cada execução concluída agenda a
+seguinte na mesma transação (ex.: o rollup noturno da atividade).
+
+Workers:
+- embutido (JOBS_WORKER_EMBUTIDO): uma thread no processo web, arrancada no
+  primeiro pedido e acordada logo após cada commit que crie jobs;
+- externos: `flask --app app jobs-worker [--processos N]`.
+
+Cada job é reclamado com um único UPDATE ... RETURNING (com SKIP LOCKED no
+PostgreSQL) e corre numa transação própria, que inclui a marcação como
+concluído. Se falhar volta à fila com backoff exponencial até
+max_tentativas e depois fica 'falhado' (ver `flask jobs-retry`).
+
+A marcação só vale enquanto a reclamação é deste worker (mesmo worker e
+mesma tentativa): um job que passou de JOBS_TIMEOUT e foi devolvido à fila
+por `recuperar_presos` desfaz as suas escritas em vez de as aplicar uma
+segunda vez. Os efeitos de um handler na BD acontecem, assim, uma só vez.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event, func, select, update
+
+from .cache import cache
+from .database import dialeto
+from .db_session import RoutingSession
+from .extensions import db, socketio
+from .metrics import registry
+from .models.jobs import Job
+
+logger = logging.getLogger('ecochat.jobs')
+
+JOBS_PROCESSADOS = registry.counter(
+    'ecochat_jobs_processed_total',
+    'Jobs executados por tipo e resultado (ok, retry, falhado, descartado).',
+    ('tipo', 'resultado'),
+)
+
+# tipo → (handler, prioridade, max_tentativas)
+HANDLERS: dict[str, tuple] = {}
+# tipo → proximo(kwargs_anteriores | None) -> (executar_em UTC, kwargs)
+RECORRENTES: dict[str, object] = {}
+
+_job = Job.__table__
+_acordar = threading.Event()
+_worker_lock = threading.Lock()
+
+
+def job_handler(tipo: str, prioridade: int = 0, max_tentativas: int = 5):
+    def decorator(fn):
+        if tipo in HANDLERS:
+            raise ValueError(f"Handler de job '{tipo}' duplicado")
+        HANDLERS[tipo] = (fn, prioridade, max_tentativas)
+        return fn
+    return decorator
+
+
+def job_recorrente(tipo: str, proximo, prioridade: int = 0, max_tentativas: int = 5):
+    """Como job_handler; ao concluir, agenda a execução que `proximo` indicar."""
+    def decorator(fn):
+        job_handler(tipo, prioridade, max_tentativas)(fn)
+        RECORRENTES[tipo] = proximo
+        return fn
+    return decorator
+
+
+def _agendar_seguinte(tipo: str, anterior: dict | None) -> None:
+    executar_em, kwargs = RECORRENTES[tipo](anterior)
+    _, prioridade, max_tentativas = HANDLERS[tipo]
+    db.session.add(Job(tipo=tipo, payload=json.dumps(kwargs, default=str), prioridade=prioridade,
+                       max_tentativas=max_tentativas, executar_em=executar_em))
+
+
+def enfileirar(tipo: str, *, atraso: float = 0.0, prioridade: int | None = None, **kwargs) -> Job:
+    """Adiciona o job à sessão atual; fica na fila quando o chamador fizer commit."""
+    _, prioridade_padrao, max_tentativas = HANDLERS[tipo]
+    novo = Job(
+        tipo=tipo,
+        payload=json.dumps(kwargs, default=str),
+        prioridade=prioridade_padrao if prioridade is None else prioridade,
+        max_tentativas=max_tentativas,
+        executar_em=datetime.utcnow() + timedelta(seconds=atraso),
+    )
+    db.session.add(novo)
+    db.session.info['jobs_novos'] = True
+    _garantir_worker_embutido()
+    return novo
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _acordar_worker(sessao):
+    if sessao.info.pop('jobs_novos', False):
+        _acordar.set()
+
+
+def register_jobs(app) -> None:
+    """Arranca o worker embutido no primeiro pedido (os jobs recorrentes não esperam por escritas)."""
+    if app.config['JOBS_WORKER_EMBUTIDO']:
+        app.before_request(_garantir_worker_embutido)
+
+
+def _garantir_worker_embutido() -> None:
+    app = current_app._get_current_object()
+    if not app.config['JOBS_WORKER_EMBUTIDO'] or 'jobs_worker' in app.extensions:
+        return
+    with _worker_lock:
+        if 'jobs_worker' not in app.extensions:
+            worker = Worker(app, nome=f'{socket.gethostname()}:{os.getpid()}:embutido')
+            app.extensions['jobs_worker'] = worker
+            socketio.start_background_task(worker.run)
+
+
+def _backoff(tentativas: int, base: float, maximo: float) -> float:
+    atraso = min(maximo, base * 2 ** (tentativas - 1))
+    return atraso * random.uniform(0.8, 1.2)
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+class ReclamacaoPerdida(Exception):
+    """O job deixou de ser deste worker (recuperado por timeout) antes de terminar."""
+
+
+class Worker:
+    def __init__(self, app, nome: str | None = None, tipos: list[str] | None = None):
+        self.app = app
+        self.nome = nome or f'{socket.gethostname()}:{os.getpid()}'
+        self.tipos = tipos
+        self.parar = threading.Event()
+        self._proxima_recuperacao = 0.0
+
+    def run(self) -> None:
+        intervalo = self.app.config['JOBS_POLL_INTERVAL']
+        while not self.parar.is_set():
+            try:
+                with self.app.app_context():
+                    feitos = self.processar_disponiveis()
+            except Exception:  # noqa: BLE001 — ex.: BD em baixo; tenta no próximo ciclo
+                logger.exception("worker %s: erro a ler a fila", self.nome)
+                feitos = 0
+            if not feitos:
+                _acordar.wait(intervalo)
+                _acordar.clear()
+
+    def processar_disponiveis(self, limite: int | None = None) -> int:
+        """Executa jobs prontos até a fila esvaziar (ou `limite`). Requer app context."""
+        if time.monotonic() >= self._proxima_recuperacao:
+            self.recuperar_presos()
+            self.agendar_recorrentes()
+            self._proxima_recuperacao = time.monotonic() + self.app.config['JOBS_TIMEOUT'] / 10
+        feitos = 0
+        while limite is None or feitos < limite:
+            linha = self._reclamar()
+            if linha is None:
+                break
+            self._executar(linha)
+            feitos += 1
+        return feitos
+
+    def recuperar_presos(self) -> int:
+        """Jobs 'em_curso' há mais de JOBS_TIMEOUT: o worker morreu, voltam à fila."""
+        limite = datetime.utcnow() - timedelta(seconds=self.app.config['JOBS_TIMEOUT'])
+        n = db.session.execute(
+            update(_job)
+            .where(_job.c.estado == 'em_curso', _job.c.iniciado_em < limite)
+            .values(estado='pendente', worker=None, erro='timeout (worker interrompido)')
+        ).rowcount
+        db.session.commit()
+        return n
+
+    def agendar_recorrentes(self) -> int:
+        """Primeira execução dos jobs recorrentes sem nenhuma pendente (BD nova, ou a última falhou)."""
+        tipos = [t for t in RECORRENTES if not self.tipos or t in self.tipos]
+        if not tipos:
+            return 0
+        ativos = {
+            t for (t,) in db.session.query(Job.tipo)
+            .filter(Job.tipo.in_(tipos), Job.estado.in_(('pendente', 'em_curso'))).distinct()
+        }
+        em_falta = [t for t in tipos if t not in ativos]
+        for tipo in em_falta:
+            _agendar_seguinte(tipo, None)
+        db.session.commit()
+        return len(em_falta)
+
+    def _reclamar(self):
+        agora = datetime.utcnow()
+        proximo = (
+            select(_job.c.id)
+            .where(_job.c.estado == 'pendente', _job.c.executar_em <= agora)
+            .order_by(_job.c.prioridade.desc(), _job.c.id)
+            .limit(1)
+        )
+        if self.tipos:
+            proximo = proximo.where(_job.c.tipo.in_(self.tipos))
+        if dialeto() == 'postgresql':
+            proximo = proximo.with_for_update(skip_locked=True)
+
+        linha = db.session.execute(
+            update(_job)
+            .where(_job.c.id == proximo.scalar_subquery(), _job.c.estado == 'pendente')
+            .values(estado='em_curso', worker=self.nome, iniciado_em=agora,
+                    tentativas=_job.c.tentativas + 1)
+            .returning(_job.c.id, _job.c.tipo, _job.c.payload, _job.c.tentativas, _job.c.max_tentativas)
+        ).first()
+        db.session.commit()
+        return linha
+
+    def _ainda_meu(self, job_id: int, tentativas: int):
+        return ((_job.c.id == job_id) & (_job.c.estado == 'em_curso')
+                & (_job.c.worker == self.nome) & (_job.c.tentativas == tentativas))
+
+    def _executar(self, linha) -> None:
+        job_id, tipo, payload, tentativas, max_tentativas = linha
+        try:
+            if tipo not in HANDLERS:
+                raise LookupError(f"sem handler para o tipo '{tipo}'")
+            kwargs = json.loads(payload)
+            tags = HANDLERS[tipo][0](**kwargs)
+            if tipo in RECORRENTES:
+                _agendar_seguinte(tipo, kwargs)
+            concluidos = db.session.execute(
+                update(_job).where(self._ainda_meu(job_id, tentativas))
+                .values(estado='concluido', concluido_em=datetime.utcnow(), erro=None)
+            ).rowcount
+            if not concluidos:
+                raise ReclamacaoPerdida()
+            db.session.commit()
+        except ReclamacaoPerdida:
+            # Outro worker tem (ou já teve) este job: as escritas deste ficam por fazer
+            db.session.rollback()
+            JOBS_PROCESSADOS.inc(tipo, 'descartado')
+            logger.warning("job %s (%s): reclamação perdida por timeout, escritas desfeitas", job_id, tipo)
+            return
+        except Exception:  # noqa: BLE001 — qualquer falha do handler conta como tentativa
+            db.session.rollback()
+            self._falhou(job_id, tipo, tentativas, max_tentativas, traceback.format_exc(limit=5))
+            return
+        if tags:
+            cache.invalidate(*tags)
+        JOBS_PROCESSADOS.inc(tipo, 'ok')
+
+    def _falhou(self, job_id, tipo, tentativas, max_tentativas, erro: str) -> None:
+        cfg = self.app.config
+        agora = datetime.utcnow()
+        if tentativas >= max_tentativas:
+            valores = {'estado': 'falhado', 'concluido_em': agora}
+            resultado = 'falhado'
+        else:
+            atraso = _backoff(tentativas, cfg['JOBS_BACKOFF_BASE'], cfg['JOBS_BACKOFF_MAX'])
+            valores = {'estado': 'pendente', 'executar_em': agora + timedelta(seconds=atraso)}
+            resultado = 'retry'
+        n = db.session.execute(
+            update(_job).where(self._ainda_meu(job_id, tentativas)).values(erro=erro, worker=None, **valores)
+        ).rowcount
+        db.session.commit()
+        if not n:
+            return   # já recuperado por timeout: a fila segue com a outra reclamação
+        JOBS_PROCESSADOS.inc(tipo, resultado)
+        logger.warning("job %s (%s) falhou na tentativa %s/%s: %s",
+                       job_id, tipo, tentativas, max_tentativas, erro.strip().splitlines()[-1])
+
+
+def correr_worker(tipos: list[str] | None = None, uma_vez: bool = False, app=None) -> int:
+    """Ponto de entrada de um worker externo (um por processo). Devolve os jobs feitos com `uma_vez`."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(message)s')
+    if app is None:
+        from . import create_app
+        app = create_app()
+    # Jobs enfileirados por handlers ficam para este worker, não para uma thread extra
+    app.config['JOBS_WORKER_EMBUTIDO'] = False
+    worker = Worker(app, tipos=tipos)
+    logger.info("worker %s a processar %s", worker.nome, ', '.join(tipos) if tipos else 'todos os tipos')
+    if uma_vez:
+        with app.app_context():
+            return worker.processar_disponiveis()
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# ── Inspeção ──────────────────────────────────────────────────────────────────
+
+def lag_segundos() -> float:
+    """Há quanto tempo o job pronto mais antigo espera por um worker."""
+    agora = datetime.utcnow()
+    mais_antigo = (
+        db.session.query(func.min(Job.executar_em))
+        .filter(Job.estado == 'pendente', Job.executar_em <= agora)
+        .scalar()
+    )
+    return (agora - mais_antigo).total_seconds() if mais_antigo else 0.0
+
+
+def estado_fila() -> dict:
+    """Contagens por tipo/estado e lag da fila."""
+    contagens: dict[str, dict[str, int]] = {}
+    for tipo, estado, total in (
+        db.session.query(Job.tipo, Job.estado, func.count(Job.id)).group_by(Job.tipo, Job.estado)
+    ):
+        contagens.setdefault(tipo, {})[estado] = total
+    return {'por_tipo': contagens, 'lag_segundos': lag_segundos()}
+
+
+def repetir_falhados(tipo: str | None = None) -> int:
+    """Devolve os jobs 'falhado' à fila, com as tentativas a zero."""
+    stmt = update(_job).where(_job.c.estado == 'falhado')
+    if tipo:
+        stmt = stmt.where(_job.c.tipo == tipo)
+    n = db.session.execute(
+        stmt.values(estado='pendente', tentativas=0, executar_em=datetime.utcnow(), concluido_em=None)
+    ).rowcount
+    db.session.commit()
+    return n
+
+
+def limpar_concluidos(dias: float) -> int:
+    """Apaga jobs concluídos há mais de `dias` dias."""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    n = db.session.execute(
+        _job.delete().where(_job.c.estado == 'concluido', _job.c.concluido_em < limite)
+    ).rowcount
+    db.session.commit()
+    return n
+
+
+def _pendentes_por_tipo() -> dict:
+    return {
+        tipo: total for tipo, total in
+        db.session.query(Job.tipo, func.count(Job.id)).filter(Job.estado == 'pendente').group_by(Job.tipo)
+    }
+
+
+registry.gauge('ecochat_jobs_pending', 'Jobs pendentes por tipo.', _pendentes_por_tipo, ('tipo',))
+registry.gauge('ecochat_jobs_lag_seconds', 'Há quanto tempo espera o job pronto mais antigo.',
+               lag_segundos)
@@ -0,0 +1,94 @@
+"""
+Serialização JSON das respostas.
+
+`FastJSONProvider` substitui o provider por omissão do Flask: usa `orjson`
+quando está instalado e JSON_FAST está ligado (datetime/date/UUID/dataclasses
+nativos, saída em bytes) e cai para o `json` da stdlib caso contrário, ou
+quando o orjson recusa o objeto (ex.: inteiros acima de 64 bits). Em ambos os casos as
+datas saem em ISO 8601, por isso os serviços podem devolver `datetime`
+diretamente em vez de chamar `.isoformat()`.
+
+`json_list_response` envia listas grandes em streaming: o corpo é gerado
+por blocos em vez de um único buffer com toda a resposta.
+"""
+
+from datetime import date
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional — sem ela fica a stdlib
+    orjson = None
+
+
+def _default_iso(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default_iso)
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.usar_orjson = orjson is not None and app.config['JSON_FAST']
+
+    def _opcoes(self, indent: bool = False) -> int:
+        opcoes = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indent:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def dumps_bytes(self, obj, indent: bool = False) -> bytes:
+        if self.usar_orjson:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._opcoes(indent))
+            except orjson.JSONEncodeError:
+                pass
+        return super().dumps(obj, **({'indent': 2} if indent else {'separators': (',', ':')})).encode()
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs or not self.usar_orjson:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs or not self.usar_orjson:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def _indentar(self) -> bool:
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        corpo = self.dumps_bytes(obj, indent=self._indentar())
+        return self._app.response_class(corpo + b'\n', mimetype=self.mimetype)
+
+    def stream_list(self, itens, bloco: int = 500):
+        """Gera o array JSON `itens` em pedaços de `bloco` elementos."""
+        yield b'['
+        primeiro = True
+        for i in range(0, len(itens), bloco):
+            # Serializar o bloco como lista e tirar os parênteses retos
+            parte = self.dumps_bytes(itens[i:i + bloco])[1:-1]
+            if not parte:
+                continue
+            yield parte if primeiro else b',' + parte
+            primeiro = False
+        yield b']\n'
+
+
+def json_list_response(itens: list):
+    """Como `jsonify(itens)`, mas em streaming acima de JSON_STREAM_THRESHOLD itens."""
+    provider = current_app.json
+    limite = current_app.config['JSON_STREAM_THRESHOLD']
+    if len(itens) < limite:
+        return provider.response(itens)
+    return current_app.response_class(provider.stream_list(itens), mimetype=provider.mimetype)
@@ -0,0 +1,252 @@
+"""
+Métricas em formato Prometheus (texto 0.0.4), servidas em /metrics.
+
+Sem dependências externas. Para não serializar todas as threads num único
+lock, cada métrica está dividida em `_STRIPES` partes: cada thread escreve
+sempre na mesma parte (atribuída em round-robin) e só o scrape percorre
+todas. Os gauges são callbacks avaliados no momento do scrape.
+"""
+
+import itertools
+import threading
+
+_STRIPES = 16
+
+# Buckets por omissão (segundos) — de 1ms a 10s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_proxima_stripe = itertools.count()
+_local = threading.local()
+
+
+def _stripe_index() -> int:
+    i = getattr(_local, 'stripe', None)
+    if i is None:
+        i = _local.stripe = next(_proxima_stripe) % _STRIPES
+    return i
+
+
+def _fmt_labels(nomes: tuple, valores: tuple, extra: str = '') -> str:
+    partes = [f'{n}="{_escape(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def _escape(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt_num(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metric:
+    tipo = ''
+
+    def __init__(self, nome: str, ajuda: str, labels: tuple = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.labels = tuple(labels)
+        self._stripes = [(threading.Lock(), {}) for _ in range(_STRIPES)]
+
+    def _header(self) -> list[str]:
+        return [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+
+
+class Counter(_Metric):
+    tipo = 'counter'
+
+    def inc(self, *valores, amount: float = 1) -> None:
+        lock, dados = self._stripes[_stripe_index()]
+        with lock:
+            dados[valores] = dados.get(valores, 0) + amount
+
+    def collect(self) -> dict[tuple, float]:
+        total: dict[tuple, float] = {}
+        for lock, dados in self._stripes:
+            with lock:
+                for chave, v in dados.items():
+                    total[chave] = total.get(chave, 0) + v
+        return total
+
+    def render(self) -> list[str]:
+        linhas = self._header()
+        for chave, v in sorted(self.collect().items()):
+            linhas.append(f'{self.nome}{_fmt_labels(self.labels, chave)} {_fmt_num(v)}')
+        return linhas
+
+
+class Histogram(_Metric):
+    tipo = 'histogram'
+
+    def __init__(self, nome: str, ajuda: str, labels: tuple = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(nome, ajuda, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *valores, value: float) -> None:
+        lock, dados = self._stripes[_stripe_index()]
+        with lock:
+            serie = dados.get(valores)
+            if serie is None:
+                # [contagem por bucket..., soma, contagem total]
+                serie = dados[valores] = [0] * len(self.buckets) + [0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if value <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += value
+            serie[-1] += 1
+
+    def render(self) -> list[str]:
+        total: dict[tuple, list] = {}
+        for lock, dados in self._stripes:
+            with lock:
+                for chave, serie in dados.items():
+                    acc = total.setdefault(chave, [0] * len(serie))
+                    for i, v in enumerate(serie):
+                        acc[i] += v
+
+        linhas = self._header()
+        n = len(self.buckets)
+        for chave, serie in sorted(total.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, serie[:n]):
+                acumulado += contagem
+                le = _fmt_labels(self.labels, chave, f'le="{_fmt_num(limite)}"')
+                linhas.append(f'{self.nome}_bucket{le} {acumulado}')
+            le = _fmt_labels(self.labels, chave, 'le="+Inf"')
+            linhas.append(f'{self.nome}_bucket{le} {serie[-1]}')
+            linhas.append(f'{self.nome}_sum{_fmt_labels(self.labels, chave)} {_fmt_num(serie[-2])}')
+            linhas.append(f'{self.nome}_count{_fmt_labels(self.labels, chave)} {serie[-1]}')
+        return linhas
+
+
+class Gauge(_Metric):
+    """Gauge calculado no scrape: `fn` devolve um número ou {labels: valor}."""
+    tipo = 'gauge'
+
+    def __init__(self, nome: str, ajuda: str, fn, labels: tuple = ()):
+        super().__init__(nome, ajuda, labels)
+        self._stripes = []
+        self.fn = fn
+
+    def render(self) -> list[str]:
+        try:
+            valor = self.fn()
+        except Exception:  # noqa: BLE001 — um gauge partido não pode derrubar o scrape
+            return []
+        linhas = self._header()
+        if isinstance(valor, dict):
+            for chave, v in sorted(valor.items()):
+                chave = chave if isinstance(chave, tuple) else (chave,)
+                linhas.append(f'{self.nome}{_fmt_labels(self.labels, chave)} {_fmt_num(v)}')
+        else:
+            linhas.append(f'{self.nome} {_fmt_num(valor)}')
+        return linhas
+
+
+class InFlight:
+    """Contador de trabalho em curso (usado como gauge de profundidade de fila)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.valor = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.valor += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.valor -= 1
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metricas: dict[str, _Metric] = {}
+
+    def _registar(self, metrica: _Metric) -> _Metric:
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def counter(self, nome: str, ajuda: str, labels: tuple = ()) -> Counter:
+        return self._registar(Counter(nome, ajuda, labels))
+
+    def histogram(self, nome: str, ajuda: str, labels: tuple = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._registar(Histogram(nome, ajuda, labels, buckets))
+
+    def gauge(self, nome: str, ajuda: str, fn, labels: tuple = ()) -> Gauge:
+        return self._registar(Gauge(nome, ajuda, fn, labels))
+
+    def render(self) -> str:
+        linhas = []
+        for metrica in self._metricas.values():
+            linhas.extend(metrica.render())
+        return '\n'.join(linhas) + '\n'
+
+
+registry = Registry()
+
+# ── Métricas da aplicação ─────────────────────────────────────────────────────
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'ecochat_http_request_duration_seconds',
+    'Duração dos pedidos HTTP por endpoint.',
+    ('endpoint', 'method'),
+)
+HTTP_REQUESTS = registry.counter(
+    'ecochat_http_requests_total',
+    'Pedidos HTTP por endpoint e código de resposta.',
+    ('endpoint', 'method', 'status'),
+)
+DB_QUERY_SECONDS = registry.histogram(
+    'ecochat_db_query_duration_seconds',
+    'Duração de cada statement SQL.',
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0),
+)
+SOCKET_EVENTS = registry.counter(
+    'ecochat_socket_events_total',
+    'Eventos Socket.IO recebidos por tipo.',
+    ('event',),
+)
+SOCKET_EMIT_SECONDS = registry.histogram(
+    'ecochat_socket_emit_duration_seconds',
+    'Latência dos emits Socket.IO por tipo.',
+    ('event',),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+UPLOADS_IN_FLIGHT = InFlight()
+
+
+def _socket_rooms() -> dict:
+    from .extensions import socketio
+    return socketio.server.manager.rooms.get('/', {}) if socketio.server else {}
+
+
+def _sockets_ligados() -> int:
+    return len(_socket_rooms().get(None, ()))
+
+
+def _rooms_ativas() -> int:
+    # Cada sid entra numa room com o próprio nome; só contam as rooms nomeadas
+    rooms = _socket_rooms()
+    sids = rooms.get(None, {})
+    return sum(1 for nome in rooms if nome is not None and nome not in sids)
+
+
+def _db_pool_checkedout() -> int:
+    from .extensions import db
+    checkedout = getattr(db.engine.pool, 'checkedout', None)
+    return checkedout() if checkedout else 0
+
+
+registry.gauge('ecochat_socket_connected', 'Sockets ligados.', _sockets_ligados)
+registry.gauge('ecochat_socket_rooms', 'Rooms Socket.IO com membros.', _rooms_ativas)
+registry.gauge('ecochat_db_pool_checkedout', 'Ligações da pool em uso.', _db_pool_checkedout)
+registry.gauge('ecochat_upload_queue_depth', 'Uploads em processamento.',
+               lambda: UPLOADS_IN_FLIGHT.valor)
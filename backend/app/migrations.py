@@ -0,0 +1,222 @@
+"""
+Migrações de schema/dados, aplicadas por ordem de versão com `flask migrate-db`.
+
+Cada migração é uma função registada com @migracao(versao, descricao) e
+recebe a ligação SQLAlchemy da transação. Uma BD criada com `flask init-db`
+já nasce com o schema final, por isso todas as versões são marcadas como
+aplicadas nesse momento.
+"""
+
+from .extensions import db
+from .models.schema import SchemaVersion
+
+MIGRACOES: dict[int, tuple[str, object]] = {}
+
+
+def _criar_indices(conn, *modelos) -> None:
+    """Cria os índices declarados nos modelos que ainda não existem."""
+    for modelo in modelos:
+        for indice in modelo.__table__.indexes:
+            indice.create(conn, checkfirst=True)
+
+
+def _criar_indice(conn, modelo, nome: str) -> None:
+    """Cria só o índice `nome` (os restantes do modelo podem depender de colunas futuras)."""
+    next(i for i in modelo.__table__.indexes if i.name == nome).create(conn, checkfirst=True)
+
+
+def migracao(versao: int, descricao: str):
+    def decorator(fn):
+        if versao in MIGRACOES:
+            raise ValueError(f"Migração {versao} duplicada")
+        MIGRACOES[versao] = (descricao, fn)
+        return fn
+    return decorator
+
+
+def versoes_aplicadas() -> set[int]:
+    return {v for (v,) in db.session.query(SchemaVersion.versao)}
+
+
+def pendentes() -> list[int]:
+    aplicadas = versoes_aplicadas()
+    return sorted(v for v in MIGRACOES if v not in aplicadas)
+
+
+def aplicar_pendentes(echo=print) -> int:
+    """Aplica as migrações em falta, cada uma na sua transação. Devolve quantas correu."""
+    db.create_all(bind_key=None)   # tabelas novas (só no primário); colunas/índices ficam a cargo das migrações
+    versoes = pendentes()
+    for versao in versoes:
+        descricao, fn = MIGRACOES[versao]
+        echo(f"→ {versao:04d} {descricao}")
+        with db.engine.begin() as conn:
+            fn(conn)
+        db.session.add(SchemaVersion(versao=versao, descricao=descricao))
+        db.session.commit()
+    return len(versoes)
+
+
+def marcar_como_aplicadas() -> None:
+    aplicadas = versoes_aplicadas()
+    for versao, (descricao, _) in sorted(MIGRACOES.items()):
+        if versao not in aplicadas:
+            db.session.add(SchemaVersion(versao=versao, descricao=descricao))
+    db.session.commit()
+
+
+# ── Migrações ────────────────────────────────────────────────────────────────
+
+@migracao(1, "Índices para feed, ranking, conversas e EcoReal")
+def _m0001_indices_hot_path(conn):
+    from .models import Publicacao, Like, Comentario, PrivateMessage, UserStats, FotoMissao
+    _criar_indices(conn, Publicacao, Like, Comentario, PrivateMessage, UserStats, FotoMissao)
+
+
+@migracao(2, "Fila de jobs (tabela job)")
+def _m0002_fila_jobs(conn):
+    # A tabela é criada pelo create_all de aplicar_pendentes; aqui só o índice da fila
+    from .models import Job
+    _criar_indices(conn, Job)
+
+
+@migracao(3, "Atividade diária agregada (rollup) e índice por data das tarefas")
+def _m0003_atividade_diaria(conn):
+    from datetime import date, timedelta
+    from .models import TarefaUsuario, AtividadeDiaria
+    from .services.atividade_service import inicio_do_historico, rollup
+    _criar_indices(conn, AtividadeDiaria)
+    _criar_indice(conn, TarefaUsuario, 'ix_tarefa_usuario_completada_em')
+    # Histórico todo numa passagem; o job noturno trata de hoje em diante.
+    # Hoje entra no agregado, mas os streaks expiram em relação a hoje: quem
+    # esteve ativo ontem ainda pode continuar
+    inicio = inicio_do_historico(conn)
+    if inicio:
+        hoje = date.today()
+        rollup(inicio, hoje + timedelta(days=1), conn, expirar_em=hoje)
+
+
+@migracao(4, "Períodos das tarefas recorrentes (tarefa_usuario.periodo_inicio)")
+def _m0004_periodos_tarefas(conn):
+    from sqlalchemy import delete, func, inspect, select, text, update
+    from .models import Tarefa, TarefaUsuario
+    from .services.tasks_catalog import sql_inicio_periodo
+
+    if 'periodo_inicio' not in {c['name'] for c in inspect(conn).get_columns('tarefa_usuario')}:
+        # Sem NOT NULL: o SQLite não o aceita num ADD COLUMN sem valor por omissão
+        conn.execute(text('ALTER TABLE tarefa_usuario ADD COLUMN periodo_inicio DATE'))
+    tu, t = TarefaUsuario.__table__, Tarefa.__table__
+    categoria = select(t.c.categoria).where(t.c.id == tu.c.tarefa_id).scalar_subquery()
+    conn.execute(
+        update(tu).where(tu.c.periodo_inicio.is_(None))
+        .values(periodo_inicio=sql_inicio_periodo(categoria, tu.c.completada_em, conn.dialect.name))
+    )
+    # O índice é único: de conclusões repetidas no mesmo período fica a
+    # primeira (os pontos que as outras deram já estão nas stats)
+    primeiras = select(func.min(tu.c.id)).group_by(tu.c.user_id, tu.c.tarefa_id, tu.c.periodo_inicio)
+    conn.execute(delete(tu).where(tu.c.id.not_in(primeiras)))
+    _criar_indice(conn, TarefaUsuario, 'ix_tarefa_usuario_periodo')
+
+
+@migracao(5, "UserStats para todos os utilizadores e níveis de acordo com os pontos")
+def _m0005_stats_completos(conn):
+    from sqlalchemy import func, insert, literal, select
+    from .models import Usuario, UserStats
+    from .services.gamification_service import calcular_nivel, recalcular_niveis
+
+    # O perfil deixou de criar a linha ao ler. Só colunas explícitas: as
+    # restantes do modelo podem ser de migrações posteriores.
+    u, s = Usuario.__table__, UserStats.__table__
+    conn.execute(insert(s).from_select(
+        ['user_id', 'pontos', 'tarefas_completas', 'dias_ativos', 'nivel', 'streak_atual', 'ultimo_acesso'],
+        select(u.c.id, literal(0), literal(0), literal(0), literal(calcular_nivel(0)), literal(0),
+               func.current_timestamp())
+        .where(~select(s.c.id).where(s.c.user_id == u.c.id).exists()),
+        include_defaults=False,
+    ))
+    recalcular_niveis(conn)
+
+
+@migracao(6, "Contadores de amigos e pedidos pendentes em user_stats")
+def _m0006_contadores_amizade(conn):
+    from sqlalchemy import inspect, text
+    from .models import Amizade
+    from .services.friends_service import reconciliar_contadores
+
+    colunas = {c['name'] for c in inspect(conn).get_columns('user_stats')}
+    for coluna in ('amigos_count', 'pendentes_count'):
+        if coluna not in colunas:
+            conn.execute(text(f'ALTER TABLE user_stats ADD COLUMN {coluna} INTEGER NOT NULL DEFAULT 0'))
+    # Só estes: índices que o modelo ganhe depois têm a sua própria migração
+    for nome in ('ix_amizade_user_status_friend', 'ix_amizade_friend_status_user'):
+        _criar_indice(conn, Amizade, nome)
+    reconciliar_contadores(conn)
+
+
+@migracao(7, "Colunas normalizadas e indexadas para a busca de utilizadores")
+def _m0007_busca_usuarios(conn):
+    from sqlalchemy import bindparam, inspect, select, text, update
+    from sqlalchemy.schema import CreateColumn
+    from .models import Usuario
+    from .models.user import normalizar_busca
+
+    u = Usuario.__table__
+    colunas = {c['name'] for c in inspect(conn).get_columns('usuario')}
+    for nome in ('nome_busca', 'email_busca'):
+        if nome not in colunas:
+            definicao = CreateColumn(u.c[nome]).compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE usuario ADD COLUMN {definicao}'))
+
+    # A normalização (acentos) é feita em Python; por lotes, seguindo o id
+    atualizar = (
+        update(u).where(u.c.id == bindparam('b_id'))
+        .values(nome_busca=bindparam('b_nome'), email_busca=bindparam('b_email'))
+    )
+    ultimo = 0
+    while True:
+        lote = conn.execute(
+            select(u.c.id, u.c.nome, u.c.email).where(u.c.id > ultimo).order_by(u.c.id).limit(5000)
+        ).all()
+        if not lote:
+            break
+        conn.execute(atualizar, [
+            {'b_id': i, 'b_nome': normalizar_busca(nome), 'b_email': normalizar_busca(email)}
+            for i, nome, email in lote
+        ])
+        ultimo = lote[-1].id
+    _criar_indices(conn, Usuario)
+
+
+@migracao(8, "Amizades aceites guardadas nos dois sentidos (consultas sem OR)")
+def _m0008_amizades_simetricas(conn):
+    from sqlalchemy import delete, func, insert, literal, select
+    from .models import Amizade
+    from .services.friends_service import reconciliar_contadores
+
+    a = Amizade.__table__
+    outra = a.alias('outra')
+
+    # 1. Pedidos pendentes de pares que já são amigos (em qualquer sentido) deixam de fazer sentido
+    conn.execute(delete(a).where(
+        a.c.status == 'pendente',
+        select(outra.c.id).where(
+            outra.c.status == 'aceito',
+            ((outra.c.user_id == a.c.user_id) & (outra.c.friend_id == a.c.friend_id))
+            | ((outra.c.user_id == a.c.friend_id) & (outra.c.friend_id == a.c.user_id)),
+        ).exists(),
+    ))
+    # 2. Linhas repetidas no mesmo sentido: fica a mais antiga
+    conn.execute(delete(a).where(
+        a.c.id.not_in(select(func.min(a.c.id)).group_by(a.c.user_id, a.c.friend_id))
+    ))
+    # 3. O sentido que falta das aceites (só colunas explícitas, como na versão 5)
+    conn.execute(insert(a).from_select(
+        ['user_id', 'friend_id', 'status'],
+        select(a.c.friend_id, a.c.user_id, literal('aceito'))
+        .where(a.c.status == 'aceito',
+               ~select(outra.c.id).where(outra.c.user_id == a.c.friend_id,
+                                         outra.c.friend_id == a.c.user_id).exists()),
+        include_defaults=False,
+    ))
+    _criar_indices(conn, Amizade)
+    reconciliar_contadores(conn)
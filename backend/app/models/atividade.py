@@ -0,0 +1,15 @@
+from ..extensions import db
+
+
+class AtividadeDiaria(db.Model):
+    """Agregado por utilizador e dia, gerado pelo rollup noturno (app/services/atividade_service.py)."""
+    __tablename__ = 'atividade_diaria'
+    __table_args__ = (
+        db.Index('ix_atividade_diaria_dia', 'dia'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    tarefas = db.Column(db.Integer, nullable=False, default=0)
+    fotos = db.Column(db.Integer, nullable=False, default=0)
+    pontos = db.Column(db.Integer, nullable=False, default=0)
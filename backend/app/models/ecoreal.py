@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from ..extensions import db
 
 
@@ -9,8 +11,13 @@ class MissaoDiaria(db.Model):
 
 
 class FotoMissao(db.Model):
+    __table_args__ = (
+        db.Index('ix_foto_missao_user_missao', 'user_id', 'missao_id'),
+        db.Index('ix_foto_missao_enviada_em', 'enviada_em'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
     missao_id = db.Column(db.Integer, db.ForeignKey("missao_diaria.id"), nullable=False)
     filename = db.Column(db.String(200), nullable=False)
-    enviada_em = db.Column(db.DateTime, default=db.func.current_timestamp())
+    enviada_em = db.Column(db.DateTime, default=datetime.utcnow)   # UTC, como o rollup da atividade espera
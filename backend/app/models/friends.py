@@ -2,6 +2,22 @@ from ..extensions import db
 
 
 class Amizade(db.Model):
+    """
+    Uma amizade aceite tem duas linhas, (a, b) e (b, a); um pedido pendente
+    tem uma, do remetente (user_id) para o destinatário (friend_id). Assim
+    "amigos de u" é um intervalo de (user_id, status) e "a e b são amigos?"
+    um ponto de (user_id, friend_id), sem OR entre os dois sentidos.
+    """
+
+    __table_args__ = (
+        # Um por sentido: amigos e contagens usam o prefixo (user_id, status);
+        # os pedidos recebidos percorrem (friend_id, status) já ordenados (keyset)
+        db.Index('ix_amizade_user_status_friend', 'user_id', 'status', 'friend_id'),
+        db.Index('ix_amizade_friend_status_user', 'friend_id', 'status', 'user_id'),
+        # Uma linha por sentido: pedidos repetidos em paralelo falham aqui
+        db.Index('ux_amizade_user_friend', 'user_id', 'friend_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
     friend_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from ..extensions import db
+
+
+class Job(db.Model):
+    """Trabalho em fila (ver app/jobs.py). `payload` são os kwargs do handler, em JSON."""
+    __tablename__ = 'job'
+    __table_args__ = (
+        # O worker procura: estado='pendente', executar_em <= agora, por prioridade
+        db.Index('ix_job_fila', 'estado', 'prioridade', 'executar_em'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(80), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    prioridade = db.Column(db.Integer, nullable=False, default=0)   # maior corre primeiro
+    estado = db.Column(db.String(20), nullable=False, default='pendente')
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    max_tentativas = db.Column(db.Integer, nullable=False, default=5)
+    executar_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    concluido_em = db.Column(db.DateTime, nullable=True)
+    worker = db.Column(db.String(120), nullable=True)
+    erro = db.Column(db.Text, nullable=True)
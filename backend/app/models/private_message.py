@@ -5,6 +5,10 @@ from datetime import datetime
 class PrivateMessage(db.Model):
     """Mensagem privada entre dois utilizadores amigos."""
     __tablename__ = 'private_message'
+    __table_args__ = (
+        db.Index('ix_private_message_conversa', 'sender_id', 'receiver_id', 'created_at'),
+        db.Index('ix_private_message_receiver_lida', 'receiver_id', 'read_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
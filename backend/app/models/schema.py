@@ -0,0 +1,10 @@
+from ..extensions import db
+
+
+class SchemaVersion(db.Model):
+    """Migrações já aplicadas a esta BD (ver app/migrations.py)."""
+    __tablename__ = 'schema_version'
+
+    versao = db.Column(db.Integer, primary_key=True)
+    descricao = db.Column(db.String(200), nullable=False)
+    aplicada_em = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -2,6 +2,10 @@ from ..extensions import db
 
 
 class Publicacao(db.Model):
+    __table_args__ = (
+        db.Index('ix_publicacao_criada_em', 'criada_em'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
     descricao = db.Column(db.String(500), nullable=False)
@@ -11,12 +15,21 @@ class Publicacao(db.Model):
 
 
 class Like(db.Model):
+    __table_args__ = (
+        db.Index('ix_like_publicacao', 'publicacao_id'),
+        db.Index('ix_like_user_publicacao', 'user_id', 'publicacao_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
     publicacao_id = db.Column(db.Integer, db.ForeignKey("publicacao.id"), nullable=False)
 
 
 class Comentario(db.Model):
+    __table_args__ = (
+        db.Index('ix_comentario_publicacao', 'publicacao_id', 'criada_em'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
     publicacao_id = db.Column(db.Integer, db.ForeignKey("publicacao.id"), nullable=False)
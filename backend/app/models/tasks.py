@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from ..extensions import db
 
 
@@ -11,7 +13,16 @@ class Tarefa(db.Model):
 
 
 class TarefaUsuario(db.Model):
+    __table_args__ = (
+        db.Index('ix_tarefa_usuario_completada_em', 'completada_em'),
+        # "Já foi completada neste período?" é uma só procura neste índice, e
+        # único: dois pedidos em paralelo não completam a mesma tarefa duas vezes
+        db.Index('ix_tarefa_usuario_periodo', 'user_id', 'tarefa_id', 'periodo_inicio', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False)
     tarefa_id = db.Column(db.Integer, db.ForeignKey("tarefa.id"), nullable=False)
-    completada_em = db.Column(db.DateTime, default=db.func.current_timestamp())
+    completada_em = db.Column(db.DateTime, default=datetime.utcnow)   # UTC, como o rollup da atividade espera
+    # Início do período (dia/semana/mês, conforme a categoria) a que a conclusão pertence
+    periodo_inicio = db.Column(db.Date, nullable=False)
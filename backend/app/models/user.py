@@ -1,14 +1,61 @@
+import unicodedata
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import validates
+
 from ..extensions import db
 
 
+_TAMANHO_BUSCA = 120
+
+
+def normalizar_busca(texto: str | None) -> str:
+    """
+    Minúsculas, sem acentos e com espaços simples: 'João  SILVA' → 'joao silva'.
+    Cortado a _TAMANHO_BUSCA caracteres (o NFKD e o casefold podem alongar o
+    texto: 'ﬃ' → 'ffi'); os termos da busca passam pelo mesmo corte.
+    """
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())[:_TAMANHO_BUSCA]
+
+
+# Ordem byte a byte (collation "C") no PostgreSQL, como o BINARY do SQLite:
+# a busca por prefixo é um intervalo [termo, termo⁺) no índice
+_TextoBusca = db.String(_TAMANHO_BUSCA).with_variant(
+    postgresql.VARCHAR(_TAMANHO_BUSCA, collation='C'), 'postgresql')
+
+
 class Usuario(db.Model):
+    __table_args__ = (
+        db.Index('ix_usuario_nome_busca', 'nome_busca'),
+        db.Index('ix_usuario_email_busca', 'email_busca'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(120))
     email = db.Column(db.String(120), unique=True, nullable=False)
     senha = db.Column(db.String(200), nullable=False)
+    # Formas normalizadas de nome/email, mantidas pelos validadores abaixo
+    nome_busca = db.Column(_TextoBusca)
+    email_busca = db.Column(_TextoBusca)
+
+    @validates('nome')
+    def _normalizar_nome(self, chave, valor):
+        self.nome_busca = normalizar_busca(valor)
+        return valor
+
+    @validates('email')
+    def _normalizar_email(self, chave, valor):
+        self.email_busca = normalizar_busca(valor)
+        return valor
 
 
 class UserStats(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_stats_pontos', 'pontos'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("usuario.id"), nullable=False, unique=True)
     pontos = db.Column(db.Integer, default=0)
@@ -18,3 +65,6 @@ class UserStats(db.Model):
     streak_atual = db.Column(db.Integer, default=0)
     ultima_missao = db.Column(db.Date, nullable=True)
     ultimo_acesso = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Mantidos por friends_service na mesma transação; `flask reconciliar-amizades` corrige desvios
+    amigos_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    pendentes_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
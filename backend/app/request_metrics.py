@@ -0,0 +1,168 @@
+"""
+Instrumentação por pedido: nº de queries, tempo total na BD, statement mais
+lento e tempo do handler, agrupados pelo endpoint do blueprint.
+
+- Os pedidos acima de SLOW_REQUEST_MS / SLOW_REQUEST_QUERIES vão para o log.
+- Cada resposta leva um cabeçalho `Server-Timing` (SERVER_TIMING_HEADER).
+- O agregado por endpoint é servido em /api/internal/metrics/requests.
+"""
+
+import json
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+from .metrics import DB_QUERY_SECONDS, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+
+# Tamanho máximo do SQL guardado como "statement mais lento"
+_MAX_SQL = 300
+
+
+class _EndpointStats:
+    __slots__ = ('pedidos', 'queries', 'db_ms', 'handler_ms',
+                 'max_handler_ms', 'max_queries', 'slowest_sql', 'slowest_sql_ms')
+
+    def __init__(self):
+        self.pedidos = 0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.handler_ms = 0.0
+        self.max_handler_ms = 0.0
+        self.max_queries = 0
+        self.slowest_sql = None
+        self.slowest_sql_ms = 0.0
+
+    def to_dict(self) -> dict:
+        n = self.pedidos or 1
+        return {
+            'requests': self.pedidos,
+            'avg_queries': round(self.queries / n, 2),
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_ms / n, 3),
+            'avg_handler_ms': round(self.handler_ms / n, 3),
+            'max_handler_ms': round(self.max_handler_ms, 3),
+            'slowest_statement': self.slowest_sql,
+            'slowest_statement_ms': round(self.slowest_sql_ms, 3),
+        }
+
+
+class RequestStats:
+    """Agregado por endpoint, partilhado entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, _EndpointStats] = {}
+
+    def registar(self, endpoint: str, queries: int, db_ms: float, handler_ms: float,
+                 slowest_sql: str | None, slowest_sql_ms: float) -> None:
+        with self._lock:
+            s = self._endpoints.get(endpoint)
+            if s is None:
+                s = self._endpoints[endpoint] = _EndpointStats()
+            s.pedidos += 1
+            s.queries += queries
+            s.db_ms += db_ms
+            s.handler_ms += handler_ms
+            s.max_handler_ms = max(s.max_handler_ms, handler_ms)
+            s.max_queries = max(s.max_queries, queries)
+            if slowest_sql is not None and slowest_sql_ms > s.slowest_sql_ms:
+                s.slowest_sql = slowest_sql
+                s.slowest_sql_ms = slowest_sql_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {nome: s.to_dict() for nome, s in sorted(self._endpoints.items())}
+
+
+request_stats = RequestStats()
+
+
+# ── SQLAlchemy ────────────────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    segundos = time.perf_counter() - conn.info['query_start'].pop()
+    DB_QUERY_SECONDS.observe(value=segundos)
+    if not has_request_context() or 'req_metrics' not in g:
+        return
+
+    ms = segundos * 1000
+    m = g.req_metrics
+    m['queries'] += 1
+    m['db_ms'] += ms
+    if ms > m['slowest_sql_ms']:
+        m['slowest_sql_ms'] = ms
+        m['slowest_sql'] = ' '.join(statement.split())[:_MAX_SQL]
+
+
+def _handle_error(context):
+    # Sem after_cursor_execute quando a query falha: descartar o início pendente
+    pendentes = context.connection.info.get('query_start') if context.connection else None
+    if pendentes:
+        pendentes.pop()
+
+
+# ── Flask ─────────────────────────────────────────────────────────────────────
+
+def _before_request():
+    g.req_metrics = {
+        'inicio': time.perf_counter(),
+        'queries': 0,
+        'db_ms': 0.0,
+        'slowest_sql': None,
+        'slowest_sql_ms': 0.0,
+    }
+
+
+def _after_request(response):
+    m = g.pop('req_metrics', None)
+    if m is None:
+        return response
+
+    handler_ms = (time.perf_counter() - m['inicio']) * 1000
+    endpoint = request.endpoint or 'unmatched'
+    request_stats.registar(endpoint, m['queries'], m['db_ms'], handler_ms,
+                           m['slowest_sql'], m['slowest_sql_ms'])
+    HTTP_REQUEST_SECONDS.observe(endpoint, request.method, value=handler_ms / 1000)
+    HTTP_REQUESTS.inc(endpoint, request.method, response.status_code)
+
+    cfg = current_app.config
+    if cfg['SERVER_TIMING_HEADER']:
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={m["db_ms"]:.2f};desc="{m["queries"]} queries", app;dur={handler_ms:.2f}'
+        )
+
+    if handler_ms >= cfg['SLOW_REQUEST_MS'] or m['queries'] >= cfg['SLOW_REQUEST_QUERIES']:
+        current_app.logger.warning(json.dumps({
+            'slow_request': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': m['queries'],
+            'db_ms': round(m['db_ms'], 3),
+            'handler_ms': round(handler_ms, 3),
+            'slowest_statement': m['slowest_sql'],
+            'slowest_statement_ms': round(m['slowest_sql_ms'], 3),
+        }, ensure_ascii=False))
+
+    return response
+
+
+def register_request_metrics(app):
+    if not app.config['REQUEST_METRICS']:
+        return
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from ..metrics import UPLOADS_IN_FLIGHT
 from ..services.ecoreal_service import (
     get_missao_do_dia, get_ecoreal_status, upload_foto_missao, get_feed_ecoreal
 )
@@ -33,7 +34,8 @@ def upload_missao():
     if file.filename == '':
         return jsonify({"erro": "Arquivo vazio"}), 400
 
-    resultado, erro = upload_foto_missao(int(user_id), file)
+    with UPLOADS_IN_FLIGHT:
+        resultado, erro = upload_foto_missao(int(user_id), file)
 
     if erro:
         return jsonify({"erro": erro}), 400
@@ -1,4 +1,7 @@
 from flask import Blueprint, request, jsonify, send_from_directory, current_app
+from ..cache import cache
+from ..json_provider import json_list_response
+from ..metrics import UPLOADS_IN_FLIGHT
 from ..services.feed_service import criar_post, get_feed, toggle_like, get_comments, add_comment
 
 feed_bp = Blueprint('feed', __name__)
@@ -26,7 +29,8 @@ def criar_publicacao():
     if not user_id or not descricao:
         return jsonify({"erro": "user_id e descricao são obrigatórios"}), 400
 
-    nova_pub, usuario = criar_post(user_id, descricao, categoria, imagem_file)
+    with UPLOADS_IN_FLIGHT:
+        nova_pub, usuario = criar_post(user_id, descricao, categoria, imagem_file)
 
     return jsonify({
         "sucesso": True,
@@ -46,8 +50,10 @@ def criar_publicacao():
 
 
 @feed_bp.route('/api/feed/<int:user_id>', methods=['GET'])
+@cache.etag(tags=['feed', 'nomes'])
+@cache.cached(tags=['feed', 'nomes'])
 def get_feed_route(user_id):
-    return jsonify(get_feed(user_id))
+    return json_list_response(get_feed(user_id))
 
 
 @feed_bp.route('/api/posts/<int:post_id>/like', methods=['POST'])
@@ -62,6 +68,7 @@ def toggle_like_route(post_id):
 
 
 @feed_bp.route('/api/posts/<int:post_id>/comments', methods=['GET'])
+@cache.cached(tags=lambda post_id: [f'post:{post_id}', 'nomes'])
 def get_comments_route(post_id):
     return jsonify(get_comments(post_id))
 
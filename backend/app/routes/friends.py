@@ -1,20 +1,55 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from ..cache import cache
 from ..services.friends_service import (
-    listar_amigos, listar_pendentes, adicionar_amigo,
+    listar_amigos, listar_pendentes, contadores, sugerir_amigos, adicionar_amigo,
     aceitar_amizade, recusar_amizade, remover_amigo
 )
 
 friends_bp = Blueprint('friends', __name__)
 
 
+def _paginacao():
+    """?apos=<último id da página anterior>&limite=N; limite None se estiver fora do intervalo."""
+    apos = request.args.get("apos", 0, type=int)
+    limite = request.args.get("limite", current_app.config["AMIGOS_POR_PAGINA"], type=int)
+    if not 1 <= limite <= current_app.config["AMIGOS_POR_PAGINA_MAX"]:
+        limite = None
+    return apos, limite
+
+
 @friends_bp.route("/api/friends/<int:user_id>", methods=["GET"])
+@cache.etag(tags=lambda user_id: [f"user:{user_id}:friends", "nomes"])
 def get_amigos(user_id):
-    return jsonify(listar_amigos(user_id))
+    apos, limite = _paginacao()
+    if limite is None:
+        return jsonify({"erro": "Paginação inválida"}), 400
+    return jsonify(listar_amigos(user_id, apos, limite))
 
 
 @friends_bp.route("/api/friends/pending/<int:user_id>", methods=["GET"])
+@cache.etag(tags=lambda user_id: [f"user:{user_id}:friends", "nomes"])
 def get_pendentes(user_id):
-    return jsonify(listar_pendentes(user_id))
+    apos, limite = _paginacao()
+    if limite is None:
+        return jsonify({"erro": "Paginação inválida"}), 400
+    return jsonify(listar_pendentes(user_id, apos, limite))
+
+
+@friends_bp.route("/api/friends/counts/<int:user_id>", methods=["GET"])
+@cache.etag(tags=lambda user_id: [f"user:{user_id}:friends"])
+def get_contadores(user_id):
+    resultado, erro = contadores(user_id)
+    if erro:
+        return jsonify({"erro": erro}), 404
+    return jsonify(resultado)
+
+
+@friends_bp.route("/api/friends/suggestions/<int:user_id>", methods=["GET"])
+def get_sugestoes(user_id):
+    limite = request.args.get("limite", current_app.config["SUGESTOES_POR_PAGINA"], type=int)
+    if not 1 <= limite <= current_app.config["SUGESTOES_POR_PAGINA_MAX"]:
+        return jsonify({"erro": "Limite inválido"}), 400
+    return jsonify(sugerir_amigos(user_id, limite))
 
 
 @friends_bp.route("/api/friends/add", methods=["POST"])
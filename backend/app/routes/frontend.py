@@ -0,0 +1,31 @@
+from flask import Blueprint, abort, current_app
+from werkzeug.exceptions import NotFound
+
+from ..compression import send_precompressed
+
+frontend_bp = Blueprint('frontend', __name__)
+
+# Os ficheiros em assets/ têm hash no nome (build do Vite): nunca mudam
+_UM_ANO = 365 * 24 * 3600
+
+
+@frontend_bp.route('/', methods=['GET'])
+def index():
+    return send_precompressed(current_app.config['FRONTEND_DIST'], 'index.html', max_age=0)
+
+
+@frontend_bp.route('/assets/<path:filename>', methods=['GET'])
+def assets(filename):
+    resp = send_precompressed(current_app.config['FRONTEND_DIST'], f'assets/{filename}', max_age=_UM_ANO)
+    resp.cache_control.immutable = True
+    return resp
+
+
+@frontend_bp.route('/<path:filename>', methods=['GET'])
+def spa(filename):
+    if filename.startswith('api/'):
+        abort(404)
+    try:
+        return send_precompressed(current_app.config['FRONTEND_DIST'], filename, max_age=0)
+    except NotFound:   # rotas do React Router não são ficheiros
+        return index()
@@ -0,0 +1,47 @@
+import functools
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from ..metrics import registry
+from ..request_metrics import request_stats
+from ..sockets.event_log import event_log
+
+metrics_bp = Blueprint('metrics', __name__)
+
+_LOOPBACK = {'127.0.0.1', '::1'}
+
+
+def _restrito(view):
+    """Só com METRICS_ENABLED; depois, token Bearer ou (sem token configurado) loopback."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        cfg = current_app.config
+        if not cfg['METRICS_ENABLED']:
+            abort(404)
+        token = cfg['METRICS_TOKEN']
+        if token:
+            enviado = request.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not hmac.compare_digest(enviado.encode(), token.encode()):
+                abort(401)
+        elif request.remote_addr not in _LOOPBACK:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@metrics_bp.route('/api/internal/metrics/sockets', methods=['GET'])
+@_restrito
+def socket_metrics():
+    return jsonify(event_log.snapshot())
+
+
+@metrics_bp.route('/api/internal/metrics/requests', methods=['GET'])
+@_restrito
+def request_metrics():
+    return jsonify(request_stats.snapshot())
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@_restrito
+def prometheus_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,4 +1,6 @@
 from flask import Blueprint, jsonify, session
+from ..cache import cache
+from ..json_provider import json_list_response
 from ..services.private_chat_service import get_conversations, get_messages
 
 private_chat_bp = Blueprint('private_chat', __name__)
@@ -10,13 +12,14 @@ def _get_user_id():
 
 
 @private_chat_bp.route('/api/private-chat/conversations', methods=['GET'])
+@cache.etag(tags=lambda: [f'user:{_get_user_id()}:messages', 'nomes'])
 def conversations():
     user_id = _get_user_id()
     if not user_id:
         return jsonify({'erro': 'Não autenticado'}), 401
 
     data = get_conversations(user_id)
-    return jsonify(data)
+    return json_list_response(data)
 
 
 @private_chat_bp.route('/api/private-chat/messages/<int:friend_id>', methods=['GET'])
@@ -30,4 +33,4 @@ def messages(friend_id: int):
         status = 404 if 'não encontrado' in erro else 403
         return jsonify({'erro': erro}), status
 
-    return jsonify(msgs)
+    return json_list_response(msgs)
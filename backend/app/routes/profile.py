@@ -1,10 +1,17 @@
 from flask import Blueprint, request, jsonify
+from ..cache import cache
 from ..services.profile_service import get_profile, update_profile, change_password
 
 profile_bp = Blueprint('profile', __name__)
 
 
+def _tags_profile(user_id):
+    return [f'user:{user_id}:profile', f'user:{user_id}:stats', f'user:{user_id}:friends']
+
+
 @profile_bp.route('/api/profile/<int:user_id>', methods=['GET'])
+@cache.etag(tags=_tags_profile)
+@cache.cached(tags=_tags_profile)
 def get_profile_route(user_id):
     profile, erro = get_profile(user_id)
     if erro:
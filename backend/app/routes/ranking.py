@@ -1,9 +1,13 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint
+from ..cache import cache
+from ..json_provider import json_list_response
 from ..services.ranking_service import get_ranking
 
 ranking_bp = Blueprint('ranking', __name__)
 
 
 @ranking_bp.route('/api/ranking', methods=['GET'])
+@cache.etag(tags=['ranking', 'nomes'])
+@cache.cached(tags=['ranking', 'nomes'])
 def get_ranking_route():
-    return jsonify(get_ranking())
+    return json_list_response(get_ranking())
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify
 from ..models.user import Usuario, UserStats
 from ..models.social import Publicacao, Like
+from ..cache import cache
 from ..extensions import db
 
 stats_bp = Blueprint('stats', __name__)
@@ -14,7 +15,7 @@ def home():
             "/api/login", "/api/register", "/api/chat",
             "/api/status", "/api/friends/*", "/api/profile/<user_id>",
             "/api/tasks/*", "/api/ranking", "/api/ecoreal/*",
-            "/api/feed/*", "/api/posts/*",
+            "/api/feed/*", "/api/posts/*", "/api/users/search",
         ]
     })
 
@@ -28,11 +29,20 @@ def status():
 
 
 @stats_bp.route('/api/stats', methods=['GET'])
+@cache.etag(tags=['stats'])
+@cache.cached(tags=['stats'])
 def get_stats():
-    total_usuarios = Usuario.query.count()
-    total_publicacoes = Publicacao.query.count()
-    total_likes = Like.query.count()
-    total_tarefas = db.session.query(db.func.sum(UserStats.tarefas_completas)).scalar() or 0
+    # Um só round-trip: cada contador é uma subquery escalar
+    def _scalar(expr):
+        return db.session.query(expr).scalar_subquery()
+
+    linha = db.session.query(
+        _scalar(db.func.count(Usuario.id)),
+        _scalar(db.func.count(Publicacao.id)),
+        _scalar(db.func.count(Like.id)),
+        _scalar(db.func.coalesce(db.func.sum(UserStats.tarefas_completas), 0)),
+    ).one()
+    total_usuarios, total_publicacoes, total_likes, total_tarefas = linha
     return jsonify({
         "usuarios": total_usuarios,
         "publicacoes": total_publicacoes,
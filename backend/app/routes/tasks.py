@@ -1,20 +1,27 @@
+from datetime import date
+
 from flask import Blueprint, request, jsonify
-from ..services.tasks_service import get_user_tasks, completar_tarefa, desmarcar_tarefa
-from ..models.tasks import Tarefa
+from ..services.tasks_service import get_catalogo, get_user_tasks, completar_tarefa, completar_tarefas, desmarcar_tarefa
+from ..cache import cache
 
 tasks_bp = Blueprint('tasks', __name__)
 
 
+def _tags_user_tasks(user_id):
+    # A tag do dia muda o ETag e a chave à meia-noite, quando os períodos das tarefas viram
+    return ['tasks', f'user:{user_id}:tasks', f'dia:{date.today().isoformat()}']
+
+
 @tasks_bp.route('/api/tasks', methods=['GET'])
+@cache.etag(tags=['tasks'])
+@cache.cached(tags=['tasks'])
 def get_tasks():
-    tarefas = Tarefa.query.all()
-    return jsonify([{
-        "id": t.id, "titulo": t.titulo, "descricao": t.descricao,
-        "pontos": t.pontos, "categoria": t.categoria, "icone": t.icone,
-    } for t in tarefas])
+    return jsonify(get_catalogo())
 
 
 @tasks_bp.route('/api/tasks/user/<int:user_id>', methods=['GET'])
+@cache.etag(tags=lambda user_id: _tags_user_tasks(user_id))
+@cache.cached(tags=lambda user_id: _tags_user_tasks(user_id))
 def get_user_tasks_route(user_id):
     return jsonify(get_user_tasks(user_id))
 
@@ -37,6 +44,23 @@ def complete_task():
     return jsonify(resultado)
 
 
+@tasks_bp.route('/api/tasks/complete-batch', methods=['POST'])
+def complete_tasks_batch():
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    tarefa_ids = data.get('tarefa_ids')
+
+    if not user_id or not isinstance(tarefa_ids, list):
+        return jsonify({"erro": "Dados insuficientes"}), 400
+
+    resultado, erro = completar_tarefas(user_id, tarefa_ids)
+
+    if erro:
+        return jsonify({"erro": erro}), 400
+
+    return jsonify(resultado)
+
+
 @tasks_bp.route('/api/tasks/uncomplete', methods=['POST'])
 def uncomplete_task():
     data = request.get_json()
@@ -0,0 +1,17 @@
+from flask import Blueprint, current_app, jsonify, request
+from ..services.users_service import buscar_usuarios
+
+users_bp = Blueprint('users', __name__)
+
+
+@users_bp.route('/api/users/search', methods=['GET'])
+def search_users():
+    q = request.args.get('q', '')
+    limite = request.args.get('limite', current_app.config['BUSCA_POR_PAGINA'], type=int)
+
+    if not 1 <= limite <= current_app.config['BUSCA_POR_PAGINA_MAX']:
+        return jsonify({"erro": "Limite inválido"}), 400
+    if len(q) > current_app.config['BUSCA_MAX_CARACTERES']:
+        return jsonify({"erro": "Termo de busca demasiado longo"}), 400
+
+    return jsonify(buscar_usuarios(q, limite))
@@ -0,0 +1,170 @@
+"""
+Rollup diário da atividade: agregados por utilizador/dia, dias_ativos e
+expiração dos streaks quebrados.
+
+Tudo em SQL set-based (INSERT ... SELECT, UPDATE ... RETURNING), sem
+carregar objetos: o custo é o de ler as tarefas/fotos do intervalo e de
+um UPDATE por tabela, independentemente do número de utilizadores.
+
+- `atividade_diaria` é recalculada para o intervalo (apaga e volta a
+  inserir), por isso repetir um dia é seguro e apanha tarefas desmarcadas;
+- `dias_ativos` passa a ser o número de dias com pelo menos uma tarefa ou
+  foto, recontado só para quem teve atividade no intervalo;
+- um streak cujo último dia de atividade é anterior ao último dia do
+  intervalo já não pode continuar e fica a 0.
+
+Os dias são locais (os de `date.today()`, como `ultima_missao` e os
+períodos das tarefas); `completada_em`/`enviada_em` estão em UTC, por isso
+cada dia é agregado entre as suas meias-noites locais convertidas para UTC.
+
+Corre como job recorrente (`rollup_atividade`, agendado para
+ROLLUP_ATIVIDADE_HORA do dia seguinte) ou com `flask rollup-atividade`.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import Date, delete, func, insert, literal, literal_column, or_, select, union_all, update
+
+from ..extensions import db
+from ..jobs import job_recorrente
+from ..models.atividade import AtividadeDiaria
+from ..models.ecoreal import FotoMissao, MissaoDiaria
+from ..models.tasks import Tarefa, TarefaUsuario
+from ..models.user import UserStats
+
+logger = logging.getLogger('ecochat.jobs')
+
+_atividade = AtividadeDiaria.__table__
+_stats = UserStats.__table__
+
+_LOTE_IDS = 5000   # ids por IN (...) — abaixo do limite de parâmetros do SQLite
+
+
+def _meia_noite_utc(dia: date) -> datetime:
+    """Início do dia local `dia`, em UTC sem tzinfo (como as colunas guardam)."""
+    return datetime.combine(dia, time()).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _agregado(dia: date):
+    """SELECT user_id, dia, tarefas, fotos, pontos das tarefas e fotos do dia local `dia`."""
+    t0, t1 = _meia_noite_utc(dia), _meia_noite_utc(dia + timedelta(days=1))
+    tu, t = TarefaUsuario.__table__, Tarefa.__table__
+    f, m = FotoMissao.__table__, MissaoDiaria.__table__
+    tarefas = (
+        select(tu.c.user_id,
+               literal_column('1').label('tarefas'), literal_column('0').label('fotos'),
+               func.coalesce(t.c.pontos, 0).label('pontos'))
+        .select_from(tu.join(t, t.c.id == tu.c.tarefa_id))
+        .where(tu.c.completada_em >= t0, tu.c.completada_em < t1)
+    )
+    fotos = (
+        select(f.c.user_id,
+               literal_column('0'), literal_column('1'),
+               func.coalesce(t.c.pontos, 0) * 2)   # bónus x2 da missão
+        .select_from(f.join(m, m.c.id == f.c.missao_id).join(t, t.c.id == m.c.tarefa_id))
+        .where(f.c.enviada_em >= t0, f.c.enviada_em < t1)
+    )
+    u = union_all(tarefas, fotos).subquery()
+    return (
+        select(u.c.user_id, literal(dia, Date), func.sum(u.c.tarefas), func.sum(u.c.fotos), func.sum(u.c.pontos))
+        .group_by(u.c.user_id)
+    )
+
+
+def _recontar_dias_ativos(conn, condicao) -> None:
+    conn.execute(
+        update(_stats).where(condicao).values(
+            dias_ativos=select(func.count())
+            .where(_atividade.c.user_id == _stats.c.user_id)
+            .scalar_subquery()
+        )
+    )
+
+
+def expirar_streaks(conn, hoje: date) -> set[int]:
+    """Põe a 0 os streaks sem atividade ontem nem hoje. Devolve os user_ids alterados."""
+    return set(conn.execute(
+        update(_stats)
+        .where(_stats.c.streak_atual > 0,
+               or_(_stats.c.ultima_missao.is_(None), _stats.c.ultima_missao < hoje - timedelta(days=1)))
+        .values(streak_atual=0)
+        .returning(_stats.c.user_id)
+    ).scalars())
+
+
+def rollup(inicio: date, fim: date, conn=None, expirar_em: date | None = None) -> dict:
+    """
+    Recalcula a atividade de [inicio, fim) e expira os streaks em relação a
+    `expirar_em` (por omissão `fim`: o job corre no dia seguinte ao que
+    agrega). `conn` é uma Connection (migrações) ou, por omissão, a sessão;
+    o chamador faz commit. Devolve contagens e os user_ids alterados.
+    """
+    conn = conn if conn is not None else db.session
+    no_intervalo = (_atividade.c.dia >= inicio) & (_atividade.c.dia < fim)
+
+    antes = set(conn.execute(delete(_atividade).where(no_intervalo).returning(_atividade.c.user_id)).scalars())
+    # Um INSERT por dia: os limites de cada dia local em UTC mudam com a hora de verão
+    depois = set()
+    dia = inicio
+    while dia < fim:
+        depois |= set(conn.execute(
+            insert(_atividade)
+            .from_select(['user_id', 'dia', 'tarefas', 'fotos', 'pontos'], _agregado(dia))
+            .returning(_atividade.c.user_id)
+        ).scalars())
+        dia += timedelta(days=1)
+
+    _recontar_dias_ativos(conn, _stats.c.user_id.in_(select(_atividade.c.user_id).where(no_intervalo)))
+    # Quem tinha atividade no intervalo e deixou de ter (tarefas desmarcadas)
+    sem_atividade = sorted(antes - depois)
+    for i in range(0, len(sem_atividade), _LOTE_IDS):
+        _recontar_dias_ativos(conn, _stats.c.user_id.in_(sem_atividade[i:i + _LOTE_IDS]))
+
+    expirados = expirar_streaks(conn, expirar_em or fim)
+    return {
+        'utilizadores_ativos': len(depois),
+        'streaks_expirados': len(expirados),
+        'user_ids': antes | depois | expirados,
+    }
+
+
+def inicio_do_historico(conn=None) -> date | None:
+    """Dia (local) da tarefa ou foto mais antiga."""
+    conn = conn if conn is not None else db.session
+    primeiros = [
+        conn.execute(select(func.min(TarefaUsuario.completada_em))).scalar(),
+        conn.execute(select(func.min(FotoMissao.enviada_em))).scalar(),
+    ]
+    primeiros = [p for p in primeiros if p is not None]
+    if not primeiros:
+        return None
+    # O SQLite devolve texto nos agregados
+    primeiro = min(p if isinstance(p, datetime) else datetime.fromisoformat(str(p)) for p in primeiros)
+    return primeiro.replace(tzinfo=timezone.utc).astimezone().date()
+
+
+def tags_alteradas(user_ids) -> list[str]:
+    # dias_ativos e streak só aparecem no perfil de cada utilizador
+    return [f'user:{uid}:stats' for uid in user_ids]
+
+
+# ── Job recorrente ────────────────────────────────────────────────────────────
+
+def _proximo_rollup(anterior: dict | None):
+    """Dia seguinte ao último processado (ou ontem); corre à hora configurada do dia depois."""
+    dia = date.fromisoformat(anterior['dia']) + timedelta(days=1) if anterior else date.today() - timedelta(days=1)
+    hora = time.fromisoformat(current_app.config['ROLLUP_ATIVIDADE_HORA'])
+    # A hora é local; a fila trabalha em UTC
+    executar_em = datetime.combine(dia + timedelta(days=1), hora).astimezone(timezone.utc).replace(tzinfo=None)
+    return executar_em, {'dia': dia.isoformat()}
+
+
+@job_recorrente('rollup_atividade', proximo=_proximo_rollup, prioridade=-10, max_tentativas=3)
+def rollup_atividade(dia: str):
+    d = date.fromisoformat(dia)
+    resultado = rollup(d, d + timedelta(days=1))
+    logger.info("rollup de %s: %s utilizadores ativos, %s streaks expirados",
+                dia, resultado['utilizadores_ativos'], resultado['streaks_expirados'])
+    return tags_alteradas(resultado['user_ids'])
@@ -1,5 +1,7 @@
 from ..models.user import Usuario, UserStats
+from ..cache import cache
 from ..extensions import db
+from .gamification_service import calcular_nivel
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
@@ -18,10 +20,10 @@ def registrar_usuario(nome: str, email: str, senha: str):
 
     novo = Usuario(nome=nome, email=email, senha=generate_password_hash(senha))
     db.session.add(novo)
+    db.session.flush()
+    # Na mesma transação: o perfil conta com a linha de stats e não a cria ao ler
+    db.session.add(UserStats(user_id=novo.id, nivel=calcular_nivel(0)))
     db.session.commit()
-
-    stats = UserStats(user_id=novo.id)
-    db.session.add(stats)
-    db.session.commit()
+    cache.invalidate('stats', 'ranking')
 
     return novo, None
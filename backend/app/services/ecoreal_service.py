@@ -1,9 +1,11 @@
 from ..models.ecoreal import MissaoDiaria, FotoMissao
 from ..models.tasks import Tarefa
 from ..models.user import UserStats
+from ..cache import cache
 from ..extensions import db
-from .gamification_service import calcular_nivel
-from datetime import date, timedelta, datetime
+from ..jobs import enfileirar
+from .gamification_service import proximo_streak
+from datetime import date, datetime
 import os
 import random
 from werkzeug.utils import secure_filename
@@ -87,39 +89,28 @@ def upload_foto_missao(user_id: int, file):
     tarefa = Tarefa.query.get(missao_hoje.tarefa_id)
     pontos_bonus = tarefa.pontos * 2
 
+    # Pontos, nível e streak são aplicados pelo worker; a resposta mostra o streak previsto
+    enfileirar('atualizar_stats', user_id=user_id, pontos=pontos_bonus, tarefas=1, dia=hoje.isoformat())
+    enfileirar('otimizar_imagem', filename=filename)
     stats = UserStats.query.filter_by(user_id=user_id).first()
-    if stats:
-        stats.pontos += pontos_bonus
-        stats.tarefas_completas += 1
-        # Streak (lógica idêntica ao original)
-        if stats.ultima_missao == hoje - timedelta(days=1):
-            stats.streak_atual += 1
-        elif stats.ultima_missao != hoje:
-            stats.streak_atual = 1
-        stats.ultima_missao = hoje
-        stats.nivel = calcular_nivel(stats.pontos)
 
     db.session.commit()
+    cache.invalidate(f'user:{user_id}:stats')
 
     return {
         "sucesso": True,
         "mensagem": f"Missão completada! +{pontos_bonus} pontos (bônus x2) 🔥",
         "filename": filename,
         "pontos_ganhos": pontos_bonus,
-        "streak": stats.streak_atual if stats else 1,
+        "streak": proximo_streak(stats.ultima_missao, stats.streak_atual or 0, hoje) if stats else 1,
     }, None
 
 
 def get_feed_ecoreal(user_id: int) -> list:
-    from ..models.friends import Amizade
     from ..models.user import Usuario
+    from .friends_service import ids_amigos
 
-    amizades = Amizade.query.filter(
-        ((Amizade.user_id == user_id) | (Amizade.friend_id == user_id))
-        & (Amizade.status == "aceito")
-    ).all()
-
-    amigos_ids = [a.friend_id if a.user_id == user_id else a.user_id for a in amizades]
+    amigos_ids = list(db.session.execute(ids_amigos(user_id)).scalars())
     amigos_ids.append(user_id)
 
     fotos = (
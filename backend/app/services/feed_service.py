@@ -1,6 +1,10 @@
 from ..models.social import Publicacao, Like, Comentario
-from ..models.user import Usuario, UserStats
+from ..models.user import Usuario
+from ..cache import cache
 from ..extensions import db
+from ..jobs import enfileirar, job_handler
+from ..sockets.event_log import event_log
+from .friends_service import ids_amigos
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
@@ -15,7 +19,7 @@ def _allowed_file(filename: str) -> bool:
 
 
 def criar_post(user_id, descricao: str, categoria: str = 'geral', imagem_file=None):
-    """Cria publicação, adiciona +5 pontos. Devolve (Publicacao, Usuario)."""
+    """Cria publicação; +5 pontos, imagem e aviso aos amigos ficam na fila de jobs. Devolve (Publicacao, Usuario)."""
     imagem_filename = None
 
     if imagem_file and imagem_file.filename and _allowed_file(imagem_file.filename):
@@ -32,47 +36,65 @@ def criar_post(user_id, descricao: str, categoria: str = 'geral', imagem_file=No
         imagem=imagem_filename
     )
     db.session.add(nova_pub)
+    db.session.flush()
 
-    stats = UserStats.query.filter_by(user_id=int(user_id)).first()
-    if stats:
-        stats.pontos += 5  # igual ao original — sem recalcular nível
+    enfileirar('atualizar_stats', user_id=int(user_id), pontos=5)
+    enfileirar('notificar_amigos', user_id=int(user_id), post_id=nova_pub.id)
+    if imagem_filename:
+        enfileirar('otimizar_imagem', filename=imagem_filename)
 
     db.session.commit()
+    cache.invalidate('feed', 'stats')
 
     usuario = Usuario.query.get(int(user_id))
     return nova_pub, usuario
 
 
+def _contagens(modelo, post_ids: list) -> dict:
+    """{publicacao_id: total} para os posts pedidos, numa query agrupada."""
+    return dict(
+        db.session.query(modelo.publicacao_id, db.func.count(modelo.id))
+        .filter(modelo.publicacao_id.in_(post_ids))
+        .group_by(modelo.publicacao_id)
+        .all()
+    )
+
+
 def get_feed(user_id: int) -> list:
     """Devolve o feed global — todas as publicações, ordenadas da mais recente."""
     publicacoes = (
-        Publicacao.query
+        db.session.query(Publicacao, Usuario.nome)
+        .join(Usuario, Usuario.id == Publicacao.user_id)
         .order_by(Publicacao.criada_em.desc())
         .limit(100)
         .all()
     )
+    if not publicacoes:
+        return []
+
+    # Contadores de todos os posts da página em 3 queries, em vez de 3 por post
+    post_ids = [pub.id for pub, _ in publicacoes]
+    likes = _contagens(Like, post_ids)
+    comentarios = _contagens(Comentario, post_ids)
+    curtidos = {
+        pid for (pid,) in db.session.query(Like.publicacao_id)
+        .filter(Like.user_id == user_id, Like.publicacao_id.in_(post_ids))
+    }
 
-    feed = []
-    for pub in publicacoes:
-        usuario = Usuario.query.get(pub.user_id)
-        if not usuario:
-            continue
-        likes_count = Like.query.filter_by(publicacao_id=pub.id).count()
-        comentarios_count = Comentario.query.filter_by(publicacao_id=pub.id).count()
-        user_liked = Like.query.filter_by(publicacao_id=pub.id, user_id=user_id).first() is not None
-        feed.append({
+    return [
+        {
             "id": pub.id,
             "descricao": pub.descricao,
             "categoria": pub.categoria,
             "imagem_url": f"/api/uploads/{pub.imagem}" if pub.imagem else None,
-            "criada_em": pub.criada_em.isoformat(),
-            "usuario": {"id": usuario.id, "nome": usuario.nome},
-            "likes": likes_count,
-            "comentarios": comentarios_count,
-            "user_liked": user_liked,
-        })
-
-    return feed
+            "criada_em": pub.criada_em,
+            "usuario": {"id": pub.user_id, "nome": nome},
+            "likes": likes.get(pub.id, 0),
+            "comentarios": comentarios.get(pub.id, 0),
+            "user_liked": pub.id in curtidos,
+        }
+        for pub, nome in publicacoes
+    ]
 
 
 def toggle_like(post_id: int, user_id: int):
@@ -81,11 +103,13 @@ def toggle_like(post_id: int, user_id: int):
     if like_existente:
         db.session.delete(like_existente)
         db.session.commit()
+        cache.invalidate('feed', 'stats')
         likes = Like.query.filter_by(publicacao_id=post_id).count()
         return "removido", likes
     else:
         db.session.add(Like(user_id=user_id, publicacao_id=post_id))
         db.session.commit()
+        cache.invalidate('feed', 'stats')
         likes = Like.query.filter_by(publicacao_id=post_id).count()
         return "adicionado", likes
 
@@ -112,5 +136,26 @@ def add_comment(post_id: int, user_id: int, texto: str):
     novo = Comentario(user_id=user_id, publicacao_id=post_id, texto=texto)
     db.session.add(novo)
     db.session.commit()
+    cache.invalidate('feed', f'post:{post_id}')
     usuario = Usuario.query.get(user_id)
     return novo, usuario
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+@job_handler('notificar_amigos', prioridade=5, max_tentativas=3)
+def notificar_amigos(user_id: int, post_id: int):
+    """Avisa em tempo real os amigos do autor de que há uma publicação nova."""
+    pub = Publicacao.query.get(post_id)
+    if not pub:
+        return None
+    autor = Usuario.query.get(user_id)
+    amigos = db.session.execute(ids_amigos(user_id)).scalars()
+    payload = {
+        "id": pub.id,
+        "categoria": pub.categoria,
+        "usuario": {"id": user_id, "nome": autor.nome if autor else None},
+    }
+    for amigo_id in amigos:
+        event_log.emit('new_post', payload, to=f'user_{amigo_id}')
+    return None
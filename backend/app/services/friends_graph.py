@@ -0,0 +1,155 @@
+"""
+Grafo de amizades em memória, para sugestões de amigos de amigos.
+
+- `grafo.sugestoes(user_id, limite)` conta, para cada amigo de um amigo que
+  ainda não é amigo nem tem pedido pendente, quantos amigos em comum tem, e
+  devolve os `limite` com mais (empate: id menor). O custo é a soma dos
+  graus dos amigos, sem queries; o resultado fica num LRU por utilizador.
+  A contagem corre fora do lock: os conjuntos são frozensets que
+  `alterar` substitui em vez de modificar, e um resultado contado durante
+  uma escrita é devolvido mas não guardado.
+- O grafo (listas de adjacência dos aceites e dos pendentes) é carregado
+  com uma query na primeira utilização e depois atualizado no próprio
+  sítio por `grafo.alterar(a, b, estado)`, que friends_service chama depois
+  de cada commit. Uma alteração de (a, b) só muda as sugestões de a, b e
+  dos amigos de cada um, e só essas saem do LRU.
+- A versão é a da tag de cache `amizades`: se outro processo a alterou
+  (backend partilhado), o grafo local é recarregado na próxima leitura.
+  O TTL apanha alterações feitas à mão na BD.
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from sqlalchemy import select
+
+from ..cache import cache
+from ..extensions import db
+from ..models.friends import Amizade
+
+_TAG = 'amizades'
+
+
+class GrafoAmizades:
+    def __init__(self):
+        self.ttl = 600.0
+        self.max_sugestoes = 50_000
+        self._lock = threading.Lock()
+        self._carga = threading.Lock()
+        self._versao: int | None = None       # None: por carregar
+        self._carregado_em = 0.0
+        self._amigos: dict[int, frozenset] = {}
+        self._pendentes: dict[int, frozenset] = {}   # nos dois sentidos
+        self._geracao = 0                             # muda a cada escrita ou recarga
+        # user_id → (limite, [(amigo_id, em_comum), ...])
+        self._sugestoes: OrderedDict = OrderedDict()
+
+    def init_app(self, app) -> None:
+        self.ttl = app.config['AMIZADES_GRAFO_TTL']
+        self.max_sugestoes = app.config['SUGESTOES_CACHE_MAX']
+        with self._lock:
+            self._versao = None
+            self._geracao += 1
+            self._sugestoes.clear()
+        app.extensions['grafo_amizades'] = self
+
+    # ── Carregamento ──────────────────────────────────────────────
+
+    def _em_dia(self, versao: int) -> bool:
+        return self._versao == versao and time.monotonic() - self._carregado_em < self.ttl
+
+    def _atualizar(self) -> None:
+        """Recarrega o grafo se não estiver em dia com a tag (ou passou o TTL)."""
+        versao = cache.backend.tag_versions([_TAG])[0]
+        if self._em_dia(versao):
+            return
+        # Um só carregamento de cada vez; quem espera usa o resultado
+        with self._carga:
+            versao = cache.backend.tag_versions([_TAG])[0]
+            if self._em_dia(versao):
+                return
+            a = Amizade.__table__
+            amigos, pendentes = defaultdict(set), defaultdict(set)
+            linhas = db.session.execute(
+                select(a.c.user_id, a.c.friend_id, a.c.status).execution_options(yield_per=50_000)
+            )
+            for x, y, status in linhas:
+                if status == 'aceito':
+                    amigos[x].add(y)      # o outro sentido tem a sua própria linha
+                else:
+                    pendentes[x].add(y)
+                    pendentes[y].add(x)
+            amigos = {uid: frozenset(ids) for uid, ids in amigos.items()}
+            pendentes = {uid: frozenset(ids) for uid, ids in pendentes.items()}
+            with self._lock:
+                self._amigos, self._pendentes = amigos, pendentes
+                self._geracao += 1
+                self._sugestoes.clear()
+                # Lido de uma réplica logo a seguir a uma escrita: usar, mas recarregar na próxima
+                self._versao = versao if cache.versoes_confiaveis([versao]) else None
+                self._carregado_em = time.monotonic()
+
+    # ── Leitura ───────────────────────────────────────────────────
+
+    def sugestoes(self, user_id: int, limite: int) -> list[tuple[int, int]]:
+        self._atualizar()
+        with self._lock:
+            guardado = self._sugestoes.get(user_id)
+            if guardado is not None and guardado[0] >= limite:
+                self._sugestoes.move_to_end(user_id)
+                return guardado[1][:limite]
+            amigos_de, geracao = self._amigos, self._geracao
+            amigos = amigos_de.get(user_id, frozenset())
+            excluir = amigos | self._pendentes.get(user_id, frozenset()) | {user_id}
+
+        em_comum = Counter()
+        for amigo in amigos:
+            em_comum.update(amigos_de.get(amigo, ()))
+        for uid in excluir:
+            em_comum.pop(uid, None)
+        melhores = heapq.nsmallest(limite, em_comum.items(), key=lambda par: (-par[1], par[0]))
+
+        with self._lock:
+            if self._geracao == geracao:
+                self._sugestoes[user_id] = (limite, melhores)
+                self._sugestoes.move_to_end(user_id)
+                while len(self._sugestoes) > self.max_sugestoes:
+                    self._sugestoes.popitem(last=False)
+        return melhores
+
+    # ── Escrita ───────────────────────────────────────────────────
+
+    def alterar(self, a: int, b: int, estado: str | None) -> None:
+        """
+        Chamar depois do commit: (a, b) passou a 'aceito', 'pendente' ou deixou
+        de existir (None). Invalida a tag e atualiza o grafo local, se estava em dia.
+        """
+        a, b = int(a), int(b)
+        antes = cache.backend.tag_versions([_TAG])[0]
+        cache.invalidate(_TAG)
+        depois = cache.backend.tag_versions([_TAG])[0]
+        with self._lock:
+            if self._versao != antes:
+                # Por carregar ou já desatualizado: a próxima leitura recarrega tudo
+                self._versao = None
+                return
+            afetados = {a, b} | self._amigos.get(a, frozenset()) | self._amigos.get(b, frozenset())
+            # Conjuntos novos: uma contagem em curso continua a ver os antigos
+            for x, y in ((a, b), (b, a)):
+                amigos = self._amigos.get(x, frozenset()) - {y}
+                pendentes = self._pendentes.get(x, frozenset()) - {y}
+                if estado == 'aceito':
+                    amigos |= {y}
+                elif estado == 'pendente':
+                    pendentes |= {y}
+                self._amigos[x], self._pendentes[x] = amigos, pendentes
+            afetados |= self._amigos[a] | self._amigos[b]
+            for uid in afetados:
+                self._sugestoes.pop(uid, None)
+            self._geracao += 1
+            self._versao = depois
+
+
+grafo = GrafoAmizades()
@@ -1,45 +1,153 @@
-from ..models.friends import Amizade
-from ..models.user import Usuario
-from ..extensions import db
-
-
-def listar_amigos(user_id: int) -> list:
-    amizades = Amizade.query.filter(
-        ((Amizade.user_id == user_id) | (Amizade.friend_id == user_id))
-        & (Amizade.status == "aceito")
-    ).all()
-
-    amigos = []
-    for a in amizades:
-        amigo_id = a.friend_id if a.user_id == user_id else a.user_id
-        alvo = Usuario.query.get(amigo_id)
-        amigos.append({"id": alvo.id, "nome": alvo.nome, "email": alvo.email})
-    return amigos
-
-
-def listar_pendentes(user_id: int) -> list:
-    pedidos = Amizade.query.filter(
-        (Amizade.friend_id == user_id) & (Amizade.status == "pendente")
-    ).all()
+from collections import Counter
 
-    pendentes = []
-    for p in pedidos:
-        remetente = Usuario.query.get(p.user_id)
-        pendentes.append({
-            "amizade_id": p.id, "id": remetente.id,
-            "nome": remetente.nome, "email": remetente.email
-        })
-    return pendentes
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 
+from ..models.friends import Amizade
+from ..models.user import Usuario, UserStats, normalizar_busca
+from ..cache import cache
+from ..extensions import db
+from .friends_graph import grafo
+
+
+# ── Consultas ─────────────────────────────────────────────────────────────────
+# Cada amizade aceite guarda os dois sentidos (ver models/friends.py): estas
+# consultas leem só as linhas em que o utilizador é `user_id`, pelos índices.
+
+def ids_amigos(user_id: int):
+    """SELECT dos ids dos amigos de `user_id`, para usar em IN (...) ou iterar."""
+    return select(Amizade.friend_id).where(Amizade.user_id == user_id, Amizade.status == "aceito")
+
+
+def sao_amigos(user_a: int, user_b: int) -> bool:
+    """Amizade aceite entre os dois: uma leitura pela chave única (user_id, friend_id)."""
+    return db.session.execute(
+        select(Amizade.id)
+        .where(Amizade.user_id == user_a, Amizade.friend_id == user_b, Amizade.status == "aceito")
+    ).first() is not None
+
+
+def _par(user_a: int, user_b: int):
+    # As linhas do par nos dois sentidos: dois pontos da chave única (um OR
+    # de igualdades completas, que SQLite e Postgres leem pelo índice; um
+    # IN de tuplos faz o SQLite percorrer a tabela)
+    return or_(
+        (Amizade.user_id == user_a) & (Amizade.friend_id == user_b),
+        (Amizade.user_id == user_b) & (Amizade.friend_id == user_a),
+    )
+
+
+# ── Contadores ────────────────────────────────────────────────────────────────
+# UserStats.amigos_count / pendentes_count mudam na mesma transação que a
+# amizade, com incrementos atómicos (UPDATE ... SET n = n + d). As transições
+# de estado são condicionais (WHERE status = ...), por isso dois pedidos
+# simultâneos sobre a mesma amizade só contam uma vez.
+
+def _ajustar_contadores(amigos: Counter, pendentes: Counter) -> None:
+    for uid in set(amigos) | set(pendentes):
+        if amigos[uid] or pendentes[uid]:
+            db.session.execute(
+                update(UserStats).where(UserStats.user_id == uid).values(
+                    amigos_count=UserStats.amigos_count + amigos[uid],
+                    pendentes_count=UserStats.pendentes_count + pendentes[uid],
+                )
+            )
+
+
+def contadores(user_id: int):
+    """Contagens para os badges: uma leitura pela chave única de user_stats."""
+    linha = (
+        db.session.query(UserStats.amigos_count, UserStats.pendentes_count)
+        .filter(UserStats.user_id == user_id)
+        .first()
+    )
+    if not linha:
+        return None, "Usuário não encontrado"
+    return {"amigos_count": linha.amigos_count, "pendentes_count": linha.pendentes_count}, None
+
+
+def reconciliar_contadores(conn=None) -> set[int]:
+    """
+    Recalcula os contadores a partir de `amizade` onde divergirem (um
+    UPDATE). Devolve os user_ids corrigidos; o chamador faz commit.
+    """
+    conn = conn if conn is not None else db.session
+    a, s = Amizade.__table__, UserStats.__table__
+    amigos = (
+        select(func.count()).where(a.c.user_id == s.c.user_id, a.c.status == "aceito")
+        .scalar_subquery()
+    )
+    pendentes = (
+        select(func.count()).where(a.c.friend_id == s.c.user_id, a.c.status == "pendente")
+        .scalar_subquery()
+    )
+    return set(conn.execute(
+        update(s)
+        .where(or_(s.c.amigos_count != amigos, s.c.pendentes_count != pendentes))
+        .values(amigos_count=amigos, pendentes_count=pendentes)
+        .returning(s.c.user_id)
+    ).scalars())
+
+
+# ── Listagens ─────────────────────────────────────────────────────────────────
+
+def listar_amigos(user_id: int, apos: int = 0, limite: int = 100) -> list:
+    """
+    Amigos com id > `apos`, por id (keyset: a página seguinte começa depois
+    do último id). Um intervalo do índice (user_id, status, friend_id), já
+    ordenado, por isso o custo depende de `limite` e não do número de amigos.
+    """
+    consulta = (
+        select(Usuario.id, Usuario.nome, Usuario.email)
+        .join(Amizade, Amizade.friend_id == Usuario.id)
+        .where(Amizade.user_id == user_id, Amizade.status == "aceito", Amizade.friend_id > apos)
+        .order_by(Amizade.friend_id)
+        .limit(limite)
+    )
+    return [{"id": a.id, "nome": a.nome, "email": a.email} for a in db.session.execute(consulta)]
+
+
+def listar_pendentes(user_id: int, apos: int = 0, limite: int = 100) -> list:
+    """Pedidos recebidos, por id do remetente (keyset como em listar_amigos)."""
+    consulta = (
+        select(Amizade.id.label("amizade_id"), Usuario.id, Usuario.nome, Usuario.email)
+        .join(Usuario, Usuario.id == Amizade.user_id)
+        .where(Amizade.friend_id == user_id, Amizade.status == "pendente", Amizade.user_id > apos)
+        .order_by(Amizade.user_id)
+        .limit(limite)
+    )
+    return [
+        {"amizade_id": p.amizade_id, "id": p.id, "nome": p.nome, "email": p.email}
+        for p in db.session.execute(consulta)
+    ]
+
+
+def sugerir_amigos(user_id: int, limite: int = 10) -> list:
+    """Amigos de amigos, por número de amigos em comum (grafo em memória + uma query pelos nomes)."""
+    melhores = grafo.sugestoes(user_id, limite)
+    if not melhores:
+        return []
+    nomes = dict(
+        db.session.query(Usuario.id, Usuario.nome).filter(Usuario.id.in_([uid for uid, _ in melhores]))
+    )
+    return [
+        {"id": uid, "nome": nomes[uid], "amigos_em_comum": n}
+        for uid, n in melhores if uid in nomes
+    ]
+
+
+# ── Escritas ──────────────────────────────────────────────────────────────────
 
 def adicionar_amigo(user_id: int, alvo):
     """alvo pode ser int (id) ou str (email/nome)."""
     if isinstance(alvo, int):
-        amigo = Usuario.query.get(alvo)
+        amigo = db.session.get(Usuario, alvo)
     else:
+        # Colunas normalizadas e indexadas: sem distinguir maiúsculas nem acentos
+        termo = normalizar_busca(alvo)
         amigo = Usuario.query.filter(
-            (Usuario.email == alvo) | (Usuario.nome == alvo)
-        ).first()
+            (Usuario.email_busca == termo) | (Usuario.nome_busca == termo)
+        ).order_by(Usuario.email_busca != termo, Usuario.id).first()
 
     if not amigo:
         return None, "Usuário não encontrado"
@@ -47,59 +155,86 @@ def adicionar_amigo(user_id: int, alvo):
     if amigo.id == user_id:
         return None, "Você não pode adicionar a si mesmo"
 
-    existente = Amizade.query.filter(
-        ((Amizade.user_id == user_id) & (Amizade.friend_id == amigo.id))
-        | ((Amizade.user_id == amigo.id) & (Amizade.friend_id == user_id))
-    ).first()
-
-    if existente:
-        return None, "Vocês já são amigos" if existente.status == "aceito" else "Pedido já enviado"
+    # Uma amizade aceite tem sempre a linha (user_id, amigo); um pedido pode estar em qualquer sentido
+    estados = set(db.session.execute(select(Amizade.status).where(_par(user_id, amigo.id))).scalars())
+    if estados:
+        return None, "Vocês já são amigos" if "aceito" in estados else "Pedido já enviado"
 
     amizade = Amizade(user_id=user_id, friend_id=amigo.id, status="pendente")
-    db.session.add(amizade)
-    db.session.commit()
+    try:
+        db.session.add(amizade)
+        _ajustar_contadores(Counter(), Counter({amigo.id: 1}))   # faz flush do INSERT
+        db.session.commit()
+    except IntegrityError:
+        # O mesmo pedido, enviado em paralelo, ganhou a corrida
+        db.session.rollback()
+        return None, "Pedido já enviado"
+    cache.invalidate(f"user:{user_id}:friends", f"user:{amigo.id}:friends")
+    grafo.alterar(user_id, amigo.id, "pendente")
     return amizade, None
 
 
 def aceitar_amizade(user_id: int, friend_id: int):
-    amizade = Amizade.query.filter(
-        (Amizade.user_id == friend_id)
-        & (Amizade.friend_id == user_id)
-        & (Amizade.status == "pendente")
-    ).first()
+    aceites = db.session.execute(
+        update(Amizade)
+        .where(Amizade.user_id == friend_id, Amizade.friend_id == user_id, Amizade.status == "pendente")
+        .values(status="aceito")
+    ).rowcount
 
-    if not amizade:
+    if not aceites:
         return False, "Pedido não encontrado"
 
-    amizade.status = "aceito"
+    # O outro sentido: um pedido cruzado (user_id → friend_id) passa também a aceite; senão, é criado
+    cruzados = db.session.execute(
+        update(Amizade)
+        .where(Amizade.user_id == user_id, Amizade.friend_id == friend_id, Amizade.status == "pendente")
+        .values(status="aceito")
+    ).rowcount
+    if not cruzados:
+        db.session.add(Amizade(user_id=user_id, friend_id=friend_id, status="aceito"))
+
+    _ajustar_contadores(Counter({user_id: 1, friend_id: 1}), Counter({user_id: -1, friend_id: -cruzados}))
     db.session.commit()
+    cache.invalidate(f"user:{user_id}:friends", f"user:{friend_id}:friends")
+    grafo.alterar(user_id, friend_id, "aceito")
     return True, None
 
 
 def recusar_amizade(user_id: int, friend_id: int):
-    amizade = Amizade.query.filter(
-        (Amizade.user_id == friend_id)
-        & (Amizade.friend_id == user_id)
-        & (Amizade.status == "pendente")
-    ).first()
+    recusados = db.session.execute(
+        delete(Amizade)
+        .where(Amizade.user_id == friend_id, Amizade.friend_id == user_id, Amizade.status == "pendente")
+    ).rowcount
 
-    if not amizade:
+    if not recusados:
         return False, "Pedido não encontrado"
 
-    db.session.delete(amizade)
+    _ajustar_contadores(Counter(), Counter({user_id: -recusados}))
     db.session.commit()
+    cache.invalidate(f"user:{user_id}:friends", f"user:{friend_id}:friends")
+    grafo.alterar(user_id, friend_id, None)
     return True, None
 
 
 def remover_amigo(user_id: int, friend_id: int):
-    amizade = Amizade.query.filter(
-        ((Amizade.user_id == user_id) & (Amizade.friend_id == friend_id))
-        | ((Amizade.user_id == friend_id) & (Amizade.friend_id == user_id))
-    ).first()
+    # Apaga a amizade ou um pedido pendente, em qualquer sentido
+    removidas = db.session.execute(
+        delete(Amizade).where(_par(user_id, friend_id))
+        .returning(Amizade.user_id, Amizade.friend_id, Amizade.status)
+    ).all()
 
-    if not amizade:
+    if not removidas:
         return False, "Amizade não encontrada"
 
-    db.session.delete(amizade)
+    amigos, pendentes = Counter(), Counter()
+    for dono, destinatario, status in removidas:
+        # Uma aceite conta no dono de cada linha; um pedido, no destinatário
+        if status == "aceito":
+            amigos[dono] -= 1
+        else:
+            pendentes[destinatario] -= 1
+    _ajustar_contadores(amigos, pendentes)
     db.session.commit()
+    cache.invalidate(f"user:{user_id}:friends", f"user:{friend_id}:friends")
+    grafo.alterar(user_id, friend_id, None)
     return True, None
@@ -1,36 +1,146 @@
+from bisect import bisect_right
 from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple
 
+from flask import current_app
+from sqlalchemy import case, func, literal, or_, update
 
-def calcular_nivel(pontos: int) -> str:
-    """Retorna o nível baseado nos pontos (idêntico ao original)."""
-    if pontos < 500:
-        return "Eco Iniciante"
-    elif pontos < 1000:
-        return "Guardião Verde"
-    elif pontos < 2000:
-        return "Defensor Verde"
-    else:
-        return "Eco Master"
-
-
-def atualizar_streak(stats) -> None:
-    """Atualiza streak e dias_ativos no objeto UserStats."""
-    hoje = date.today()
-    if stats.ultima_missao is None:
-        stats.streak_atual = 1
-    elif stats.ultima_missao == hoje:
-        pass  # Já completou hoje, streak não muda
-    elif stats.ultima_missao == hoje - timedelta(days=1):
-        stats.streak_atual += 1  # Dia consecutivo!
-    else:
-        stats.streak_atual = 1  # Quebrou a sequência, recomeça
+from ..extensions import db
+from ..jobs import job_handler
+from ..models.user import UserStats
+
+
+# ── Níveis ────────────────────────────────────────────────────────────────────
+# A tabela vem de NIVEIS (config): pares (pontos mínimos, nome) por ordem crescente.
+
+class Nivel(NamedTuple):
+    nome: str
+    minimo: int
+    proximo: int | None      # pontos do nível seguinte; None no último
+    progresso: float         # % do caminho entre `minimo` e `proximo`
+
+
+@lru_cache(maxsize=8)
+def _compilar(niveis: tuple) -> tuple[list[int], list[str]]:
+    try:
+        limites = [m for m, _ in niveis]
+        valida = bool(limites) and limites[0] == 0 and limites == sorted(set(limites))
+    except (TypeError, ValueError):   # entradas que não são pares, ou limites não comparáveis
+        valida = False
+    if not valida:
+        raise ValueError("NIVEIS tem de ser pares (pontos mínimos, nome), a começar em 0 "
+                         "e com limites estritamente crescentes")
+    return limites, [nome for _, nome in niveis]
+
+
+def _tabela(app=None) -> tuple[list[int], list[str]]:
+    try:
+        niveis = tuple(map(tuple, (app or current_app).config['NIVEIS']))
+    except TypeError:
+        niveis = ()    # não é uma sequência de sequências: _compilar recusa
+    return _compilar(niveis)
+
+
+def validar_niveis(app) -> None:
+    """Compila NIVEIS no arranque: uma tabela inválida falha no create_app, não no primeiro pedido."""
+    _tabela(app)
+
+
+def nivel_para(pontos: int | None) -> Nivel:
+    """Nível, limite do seguinte e progresso para os pontos dados (bisect na tabela)."""
+    limites, nomes = _tabela()
+    pontos = max(0, pontos or 0)
+    i = bisect_right(limites, pontos) - 1
+    if i + 1 == len(limites):
+        return Nivel(nomes[i], limites[i], None, 100.0)
+    progresso = 100.0 * (pontos - limites[i]) / (limites[i + 1] - limites[i])
+    return Nivel(nomes[i], limites[i], limites[i + 1], round(progresso, 1))
+
+
+def calcular_nivel(pontos: int | None) -> str:
+    """Retorna o nome do nível para os pontos dados."""
+    limites, nomes = _tabela()
+    return nomes[bisect_right(limites, max(0, pontos or 0)) - 1]
+
+
+def sql_nivel(pontos):
+    """`calcular_nivel` como expressão SQL sobre uma coluna (para recalcular em massa)."""
+    limites, nomes = _tabela()
+    pontos = func.coalesce(pontos, 0)
+    return case(
+        *((pontos >= m, nome) for m, nome in reversed(list(zip(limites[1:], nomes[1:])))),
+        else_=literal(nomes[0]),
+    )
+
+
+def recalcular_niveis(conn=None) -> set[int]:
+    """
+    Atualiza `nivel` de todos os utilizadores cujo nível guardado não
+    corresponde à tabela atual (depois de mudar NIVEIS). Um só UPDATE;
+    devolve os user_ids alterados. O chamador faz commit.
+    """
+    conn = conn if conn is not None else db.session
+    stats = UserStats.__table__
+    novo = sql_nivel(stats.c.pontos)
+    return set(conn.execute(
+        update(stats)
+        .where(or_(stats.c.nivel.is_(None), stats.c.nivel != novo))
+        .values(nivel=novo)
+        .returning(stats.c.user_id)
+    ).scalars())
+
+
+# ── Streaks ───────────────────────────────────────────────────────────────────
+
+def proximo_streak(ultima: date | None, atual: int, hoje: date) -> int:
+    """Streak depois de uma atividade em `hoje` (sem alterar nada)."""
+    if ultima == hoje:
+        return atual  # Já contou hoje, streak não muda
+    if ultima == hoje - timedelta(days=1):
+        return atual + 1  # Dia consecutivo!
+    return 1  # Primeira vez ou quebrou a sequência, recomeça
+
+
+def atualizar_streak(stats, hoje: date | None = None) -> None:
+    """
+    Atualiza streak e dias_ativos (uma vez por dia) no objeto UserStats. Um
+    dia anterior a `ultima_missao` (job repetido ou atrasado por backoff)
+    não mexe em nada: o streak já contou um dia mais recente.
+    """
+    hoje = hoje or date.today()
+    if stats.ultima_missao is not None and hoje < stats.ultima_missao:
+        return
+    if stats.ultima_missao != hoje:
+        # O rollup noturno reconta dias_ativos a partir da atividade_diaria
+        stats.dias_ativos = (stats.dias_ativos or 0) + 1
+    stats.streak_atual = proximo_streak(stats.ultima_missao, stats.streak_atual or 0, hoje)
     stats.ultima_missao = hoje
-    stats.dias_ativos += 1
 
 
-def adicionar_pontos(stats, pontos: int) -> str | None:
-    """Adiciona pontos, atualiza nível e devolve novo nível se houve subida."""
-    nivel_anterior = stats.nivel
-    stats.pontos += pontos
+def aplicar_stats(stats, pontos: int = 0, tarefas: int = 0, dia: date | None = None) -> list[str]:
+    """
+    Aplica pontos/tarefas (deltas, podem ser negativos) ao objeto UserStats,
+    já bloqueado pelo chamador, recalcula o nível e, com `dia`, atualiza o
+    streak como se a atividade fosse nesse dia. Devolve as tags de cache a
+    invalidar depois do commit.
+    """
+    stats.pontos = max(0, (stats.pontos or 0) + pontos)
+    stats.tarefas_completas = max(0, (stats.tarefas_completas or 0) + tarefas)
     stats.nivel = calcular_nivel(stats.pontos)
-    return stats.nivel if stats.nivel != nivel_anterior else None
+    if dia:
+        atualizar_streak(stats, dia)
+    return ['stats', 'ranking', f'user:{stats.user_id}:stats']
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+@job_handler('atualizar_stats', prioridade=10)
+def atualizar_stats(user_id: int, pontos: int = 0, tarefas: int = 0, dia: str | None = None):
+    """aplicar_stats fora do pedido (publicações, EcoReal); `dia` em ISO."""
+    stats = UserStats.query.filter_by(user_id=user_id).with_for_update().first()
+    if not stats:
+        return None
+    tags = aplicar_stats(stats, pontos, tarefas, date.fromisoformat(dia) if dia else None)
+    db.session.flush()
+    return tags
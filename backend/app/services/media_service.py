@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from flask import current_app
+
+from ..jobs import job_handler
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # dependência opcional — sem ela as imagens ficam como foram enviadas
+    Image = None
+
+
+@job_handler('otimizar_imagem', prioridade=0, max_tentativas=3)
+def otimizar_imagem(filename: str):
+    """Endireita (EXIF) e reduz a imagem enviada para IMAGEM_MAX_LADO px, no mesmo ficheiro."""
+    if Image is None:
+        return None
+    pasta = current_app.config['UPLOAD_FOLDER']
+    caminho = os.path.join(pasta, filename)
+    if not os.path.isfile(caminho):
+        return None
+
+    max_lado = current_app.config['IMAGEM_MAX_LADO']
+    with Image.open(caminho) as original:
+        formato = original.format
+        if original.getexif().get(0x0112, 1) == 1 and max(original.size) <= max_lado:
+            return None  # já está direita e pequena
+        imagem = ImageOps.exif_transpose(original)
+        imagem.thumbnail((max_lado, max_lado))
+        if formato == 'JPEG' and imagem.mode not in ('RGB', 'L'):
+            imagem = imagem.convert('RGB')
+        # Escrever ao lado e trocar: quem estiver a servir a imagem nunca vê um ficheiro a meio
+        fd, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                imagem.save(f, format=formato, optimize=True)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+    return None
@@ -1,80 +1,98 @@
 from datetime import datetime, timezone
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, case
+from ..cache import cache
+from ..database import dialeto
 from ..extensions import db
 from ..models.private_message import PrivateMessage
-from ..models.friends import Amizade
 from ..models.user import Usuario
+from .friends_service import sao_amigos
 
 
 # ─── helpers ──────────────────────────────────────────────────────────────────
 
-def _sao_amigos(user_a: int, user_b: int) -> bool:
-    """Verifica se dois utilizadores têm amizade aceite (bidirecional)."""
-    return db.session.query(Amizade).filter(
-        or_(
-            and_(Amizade.user_id == user_a, Amizade.friend_id == user_b),
-            and_(Amizade.user_id == user_b, Amizade.friend_id == user_a)
-        ),
-        Amizade.status == "aceito"
-    ).first() is not None
-
-
 def _usuario_existe(user_id: int) -> bool:
     return db.session.get(Usuario, user_id) is not None
 
 
 # ─── serviços públicos ────────────────────────────────────────────────────────
 
+def _ultimas_mensagens(user_id: int):
+    """
+    Subquery com a última mensagem de cada conversa do utilizador
+    (colunas: other_id, content, created_at).
+    """
+    other_id = case(
+        (PrivateMessage.sender_id == user_id, PrivateMessage.receiver_id),
+        else_=PrivateMessage.sender_id,
+    ).label('other_id')
+    minhas = or_(PrivateMessage.sender_id == user_id, PrivateMessage.receiver_id == user_id)
+
+    if dialeto() == 'postgresql':
+        # DISTINCT ON devolve a primeira linha de cada grupo segundo o ORDER BY
+        return (
+            db.session.query(other_id, PrivateMessage.content, PrivateMessage.created_at)
+            .filter(minhas)
+            .distinct(other_id)
+            .order_by(other_id, PrivateMessage.created_at.desc(), PrivateMessage.id.desc())
+            .subquery()
+        )
+
+    ordem = db.func.row_number().over(
+        partition_by=other_id,
+        order_by=(PrivateMessage.created_at.desc(), PrivateMessage.id.desc()),
+    ).label('ordem')
+    numeradas = (
+        db.session.query(other_id, PrivateMessage.content, PrivateMessage.created_at, ordem)
+        .filter(minhas)
+        .subquery()
+    )
+    return (
+        db.session.query(numeradas.c.other_id, numeradas.c.content, numeradas.c.created_at)
+        .filter(numeradas.c.ordem == 1)
+        .subquery()
+    )
+
+
 def get_conversations(user_id: int) -> list:
     """
     Retorna a lista de conversas recentes do utilizador.
     Cada item inclui o outro utilizador, última mensagem, hora e contagem de não lidas.
+    Uma única query, independentemente do número de conversas.
     """
-    # Busca todos os interlocutores distintos
-    sent = db.session.query(PrivateMessage.receiver_id).filter(
-        PrivateMessage.sender_id == user_id
-    ).distinct()
-    received = db.session.query(PrivateMessage.sender_id).filter(
-        PrivateMessage.receiver_id == user_id
-    ).distinct()
-
-    interlocutores_ids = set()
-    for row in sent:
-        interlocutores_ids.add(row[0])
-    for row in received:
-        interlocutores_ids.add(row[0])
-
-    conversations = []
-    for other_id in interlocutores_ids:
-        other = db.session.get(Usuario, other_id)
-        if not other:
-            continue
-
-        # Última mensagem da conversa
-        last_msg = PrivateMessage.query.filter(
-            or_(
-                and_(PrivateMessage.sender_id == user_id, PrivateMessage.receiver_id == other_id),
-                and_(PrivateMessage.sender_id == other_id, PrivateMessage.receiver_id == user_id)
-            )
-        ).order_by(PrivateMessage.created_at.desc()).first()
-
-        # Mensagens não lidas (recebidas pelo user_id e ainda não lidas)
-        unread_count = PrivateMessage.query.filter(
-            PrivateMessage.sender_id == other_id,
-            PrivateMessage.receiver_id == user_id,
-            PrivateMessage.read_at.is_(None)
-        ).count()
-
-        conversations.append({
-            'friend': {'id': other.id, 'nome': other.nome, 'email': other.email},
-            'last_message': last_msg.content if last_msg else '',
-            'last_at': last_msg.created_at.isoformat() if last_msg else '',
-            'unread_count': unread_count,
-        })
+    ultimas = _ultimas_mensagens(user_id)
+
+    # Mensagens não lidas (recebidas pelo user_id e ainda não lidas), por remetente
+    nao_lidas = (
+        db.session.query(
+            PrivateMessage.sender_id.label('other_id'),
+            db.func.count(PrivateMessage.id).label('total'),
+        )
+        .filter(PrivateMessage.receiver_id == user_id, PrivateMessage.read_at.is_(None))
+        .group_by(PrivateMessage.sender_id)
+        .subquery()
+    )
 
-    # Ordenar pela mensagem mais recente
-    conversations.sort(key=lambda c: c['last_at'], reverse=True)
-    return conversations
+    linhas = (
+        db.session.query(
+            Usuario.id, Usuario.nome, Usuario.email,
+            ultimas.c.content, ultimas.c.created_at,
+            db.func.coalesce(nao_lidas.c.total, 0),
+        )
+        .join(ultimas, ultimas.c.other_id == Usuario.id)
+        .outerjoin(nao_lidas, nao_lidas.c.other_id == Usuario.id)
+        .order_by(ultimas.c.created_at.desc())
+        .all()
+    )
+
+    return [
+        {
+            'friend': {'id': other_id, 'nome': nome, 'email': email},
+            'last_message': content,
+            'last_at': created_at,
+            'unread_count': unread_count,
+        }
+        for other_id, nome, email, content, created_at, unread_count in linhas
+    ]
 
 
 def get_messages(user_id: int, friend_id: int) -> tuple[list, str | None]:
@@ -86,7 +104,7 @@ def get_messages(user_id: int, friend_id: int) -> tuple[list, str | None]:
     if not _usuario_existe(friend_id):
         return [], "Utilizador não encontrado"
 
-    if not _sao_amigos(user_id, friend_id):
+    if not sao_amigos(user_id, friend_id):
         return [], "Não são amigos"
 
     # Marcar mensagens recebidas como lidas
@@ -101,6 +119,7 @@ def get_messages(user_id: int, friend_id: int) -> tuple[list, str | None]:
         msg.read_at = now
     if unread:
         db.session.commit()
+        cache.invalidate(f'user:{user_id}:messages')
 
     # Histórico completo ordenado
     messages = PrivateMessage.query.filter(
@@ -129,7 +148,7 @@ def save_message(sender_id: int, receiver_id: int, content: str) -> tuple:
     if sender_id == receiver_id:
         return None, "Não podes enviar mensagem a ti mesmo"
 
-    if not _sao_amigos(sender_id, receiver_id):
+    if not sao_amigos(sender_id, receiver_id):
         return None, "Não são amigos"
 
     msg = PrivateMessage(
@@ -139,4 +158,5 @@ def save_message(sender_id: int, receiver_id: int, content: str) -> tuple:
     )
     db.session.add(msg)
     db.session.commit()
+    cache.invalidate(f'user:{sender_id}:messages', f'user:{receiver_id}:messages')
     return msg.to_dict(), None
@@ -1,42 +1,41 @@
 from ..models.user import Usuario, UserStats
-from ..models.friends import Amizade
+from ..cache import cache
 from ..extensions import db
-from .gamification_service import calcular_nivel
+from .gamification_service import nivel_para
 from werkzeug.security import check_password_hash, generate_password_hash
 
 
 def get_profile(user_id: int):
-    usuario = Usuario.query.get(user_id)
-    if not usuario:
+    """
+    Perfil num só SELECT (utilizador + stats, com os contadores de amigos), sem
+    escritas: os UserStats são criados no registo (ou pela migração 5) e o
+    nível é mantido por quem altera os pontos.
+    """
+    linha = (
+        db.session.query(Usuario.id, Usuario.nome, Usuario.email, UserStats.pontos, UserStats.nivel,
+                         UserStats.tarefas_completas, UserStats.dias_ativos, UserStats.streak_atual,
+                         UserStats.amigos_count, UserStats.pendentes_count)
+        .outerjoin(UserStats, UserStats.user_id == Usuario.id)
+        .filter(Usuario.id == user_id)
+        .first()
+    )
+    if not linha:
         return None, "Usuário não encontrado"
 
-    stats = UserStats.query.filter_by(user_id=user_id).first()
-    if not stats:
-        stats = UserStats(user_id=user_id)
-        db.session.add(stats)
-        db.session.commit()
-
-    amigos_count = Amizade.query.filter(
-        ((Amizade.user_id == user_id) | (Amizade.friend_id == user_id))
-        & (Amizade.status == "aceito")
-    ).count()
-
-    nivel = calcular_nivel(stats.pontos)
-    if stats.nivel != nivel:
-        stats.nivel = nivel
-        db.session.commit()
-
+    nivel = nivel_para(linha.pontos)
     return {
-        "id": usuario.id,
-        "nome": usuario.nome,
-        "email": usuario.email,
-        "pontos": stats.pontos,
-        "nivel": stats.nivel,
-        "tarefas_completas": stats.tarefas_completas,
-        "dias_ativos": stats.dias_ativos,
-        "amigos_count": amigos_count,
-        "proximo_nivel": 2000 if stats.pontos < 2000 else 3000,
-        "streak": stats.streak_atual,
+        "id": linha.id,
+        "nome": linha.nome,
+        "email": linha.email,
+        "pontos": linha.pontos or 0,
+        "nivel": linha.nivel or nivel.nome,
+        "tarefas_completas": linha.tarefas_completas or 0,
+        "dias_ativos": linha.dias_ativos or 0,
+        "amigos_count": linha.amigos_count or 0,
+        "pendentes_count": linha.pendentes_count or 0,
+        "proximo_nivel": nivel.proximo,       # None no último nível
+        "progresso_nivel": nivel.progresso,   # %
+        "streak": linha.streak_atual or 0,
     }, None
 
 
@@ -54,6 +53,9 @@ def update_profile(user_id: int, novo_nome: str = None, novo_email: str = None):
         usuario.nome = novo_nome
 
     db.session.commit()
+    cache.invalidate(f'user:{user_id}:profile')
+    if novo_nome or novo_email:
+        cache.invalidate('nomes')   # aparecem no feed, ranking, amigos e conversas
     return {"id": usuario.id, "nome": usuario.nome, "email": usuario.email}, None
 
 
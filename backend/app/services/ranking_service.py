@@ -1,24 +1,31 @@
 from ..models.user import Usuario, UserStats
+from ..extensions import db
 
 
 def get_ranking() -> list:
-    usuarios = Usuario.query.all()
+    """Ranking global numa só query; a posição vem de uma window function."""
+    posicao = db.func.row_number().over(
+        order_by=(UserStats.pontos.desc(), Usuario.id)
+    ).label('posicao')
 
-    ranking = []
-    for usuario in usuarios:
-        stats = UserStats.query.filter_by(user_id=usuario.id).first()
-        if stats:
-            ranking.append({
-                "id": usuario.id,
-                "nome": usuario.nome,
-                "pontos": stats.pontos,
-                "nivel": stats.nivel,
-                "tarefas_completas": stats.tarefas_completas,
-            })
+    linhas = (
+        db.session.query(
+            Usuario.id, Usuario.nome, UserStats.pontos, UserStats.nivel,
+            UserStats.tarefas_completas, posicao,
+        )
+        .join(UserStats, UserStats.user_id == Usuario.id)
+        .order_by(UserStats.pontos.desc(), Usuario.id)
+        .all()
+    )
 
-    ranking.sort(key=lambda x: x['pontos'], reverse=True)
-
-    for i, user in enumerate(ranking):
-        user['posicao'] = i + 1
-
-    return ranking
+    return [
+        {
+            "id": linha.id,
+            "nome": linha.nome,
+            "pontos": linha.pontos,
+            "nivel": linha.nivel,
+            "tarefas_completas": linha.tarefas_completas,
+            "posicao": linha.posicao,
+        }
+        for linha in linhas
+    ]
@@ -0,0 +1,218 @@
+"""
+Catálogo de tarefas em memória e estado de conclusão por utilizador.
+
+- `catalogo.snapshot()` devolve um `Catalogo` imutável (tuplo de tarefas +
+  índice por id). A versão é a da tag de cache `tasks`: qualquer escrita
+  ORM em Tarefa invalida a tag depois do commit e o snapshot seguinte é
+  reconstruído (uma query); de resto, ler o catálogo não toca na BD.
+- `catalogo.completadas(user_id)` devolve um bitset (int) em que o bit `i`
+  diz se a tarefa na posição `i` do snapshot está completada no período
+  atual. Vive num LRU por processo, validado pela versão da tag
+  `user:<id>:tasks` e pelo dia, e é atualizado no próprio sítio por
+  completar/desmarcar.
+
+Períodos: cada conclusão guarda `periodo_inicio` (o dia, a segunda-feira
+ou o dia 1, conforme a categoria daily/weekly/monthly). "Já foi feita
+neste período?" é uma igualdade no índice (user_id, tarefa_id,
+periodo_inicio); quando o período muda, a conclusão antiga simplesmente
+deixa de coincidir — nada é reescrito.
+
+Renderizar a página de tarefas é então juntar os dois, sem queries.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import chain
+
+from sqlalchemy import Date, case, cast, event, func, literal, or_
+
+from ..cache import cache
+from ..db_session import RoutingSession
+from ..extensions import db
+from ..models.tasks import Tarefa, TarefaUsuario
+
+
+# Tarefas de outras categorias não se repetem: um só período, para sempre
+PERIODO_UNICO = date(1970, 1, 1)
+
+
+def inicio_periodo(categoria: str, dia: date) -> date:
+    """Primeiro dia do período (da categoria) que contém `dia`."""
+    if categoria == 'daily':
+        return dia
+    if categoria == 'weekly':
+        return dia - timedelta(days=dia.weekday())   # segunda-feira
+    if categoria == 'monthly':
+        return dia.replace(day=1)
+    return PERIODO_UNICO
+
+
+def sql_inicio_periodo(categoria, instante, dialeto: str):
+    """`inicio_periodo` como expressão SQL sobre colunas (para preencher em massa)."""
+    if dialeto == 'postgresql':
+        dia = cast(instante, Date)
+        semana = cast(func.date_trunc('week', instante), Date)
+        mes = cast(func.date_trunc('month', instante), Date)
+    else:
+        dia = func.date(instante)
+        semana = func.date(instante, 'weekday 0', '-6 days')
+        mes = func.date(instante, 'start of month')
+    return case(
+        (categoria == 'daily', dia),
+        (categoria == 'weekly', semana),
+        (categoria == 'monthly', mes),
+        else_=literal(PERIODO_UNICO, Date),
+    )
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    versao: int
+    tarefas: tuple             # dicts prontos a serializar, por ordem de id
+    indice: dict = field(repr=False)   # tarefa_id → posição (bit) em `tarefas`
+    criado_em: float = 0.0
+
+    def get(self, tarefa_id: int) -> dict | None:
+        i = self.indice.get(tarefa_id)
+        return self.tarefas[i] if i is not None else None
+
+    def bits(self, conclusoes, hoje: date) -> int:
+        """Bitset das (tarefa_id, periodo_inicio) que pertencem ao período atual de cada tarefa."""
+        bits = 0
+        for tarefa_id, periodo in conclusoes:
+            i = self.indice.get(tarefa_id)
+            if i is not None and periodo == inicio_periodo(self.tarefas[i]['categoria'], hoje):
+                bits |= 1 << i
+        return bits
+
+    def periodo_mais_antigo(self, hoje: date) -> date:
+        """O mais antigo dos períodos atuais das tarefas recorrentes."""
+        inicios = {inicio_periodo(t['categoria'], hoje) for t in self.tarefas} - {PERIODO_UNICO}
+        return min(inicios, default=hoje)
+
+
+def _tag_user(user_id: int) -> str:
+    return f'user:{user_id}:tasks'
+
+
+class CatalogoTarefas:
+    def __init__(self):
+        self.ttl = 300.0
+        self.max_bitsets = 100_000
+        self._snapshot: Catalogo | None = None
+        self._lock = threading.Lock()
+        # user_id → (versão do catálogo, versão da tag do utilizador, dia, bitset)
+        self._bitsets: OrderedDict = OrderedDict()
+
+    def init_app(self, app) -> None:
+        self.ttl = app.config['TAREFAS_CATALOGO_TTL']
+        self.max_bitsets = app.config['TAREFAS_BITSETS_MAX']
+        with self._lock:
+            self._snapshot = None
+            self._bitsets.clear()
+        app.extensions['catalogo_tarefas'] = self
+
+    # ── Catálogo ──────────────────────────────────────────────────
+
+    def snapshot(self) -> Catalogo:
+        versao = cache.backend.tag_versions(['tasks'])[0]
+        atual = self._snapshot
+        # O TTL apanha alterações feitas à mão na BD, que não passam pela tag
+        if atual is not None and atual.versao == versao and time.monotonic() - atual.criado_em < self.ttl:
+            return atual
+        with self._lock:
+            atual = self._snapshot
+            if atual is None or atual.versao != versao or time.monotonic() - atual.criado_em >= self.ttl:
+                atual = self._construir(versao)
+                if cache.versoes_confiaveis([versao]):
+                    self._snapshot = atual
+        return atual
+
+    @staticmethod
+    def _construir(versao: int) -> Catalogo:
+        tarefas = tuple(
+            {
+                "id": t.id, "titulo": t.titulo, "descricao": t.descricao,
+                "pontos": t.pontos, "categoria": t.categoria, "icone": t.icone,
+            }
+            for t in Tarefa.query.order_by(Tarefa.id)
+        )
+        return Catalogo(versao, tarefas, {t['id']: i for i, t in enumerate(tarefas)}, time.monotonic())
+
+    # ── Conclusões por utilizador ─────────────────────────────────
+
+    def completadas(self, user_id: int, cat: Catalogo | None = None) -> int:
+        cat = cat or self.snapshot()
+        hoje = date.today()
+        versao_user = cache.backend.tag_versions([_tag_user(user_id)])[0]
+        with self._lock:
+            entrada = self._bitsets.get(user_id)
+            # Um bitset de ontem pode ter conclusões de períodos que já acabaram
+            if entrada is not None and entrada[:3] == (cat.versao, versao_user, hoje):
+                self._bitsets.move_to_end(user_id)
+                return entrada[3]
+
+        conclusoes = (
+            db.session.query(TarefaUsuario.tarefa_id, TarefaUsuario.periodo_inicio)
+            .filter(TarefaUsuario.user_id == user_id,
+                    or_(TarefaUsuario.periodo_inicio >= cat.periodo_mais_antigo(hoje),
+                        TarefaUsuario.periodo_inicio == PERIODO_UNICO))
+        )
+        bits = cat.bits(conclusoes, hoje)
+        # Lido de uma réplica logo a seguir a uma escrita: pode não a incluir
+        if cache.versoes_confiaveis([versao_user]):
+            self._guardar(user_id, (cat.versao, versao_user, hoje), bits)
+        return bits
+
+    def marcar(self, user_id: int, tarefa_ids, completada: bool) -> None:
+        """Chamar depois do commit: invalida a tag do utilizador e atualiza o bitset local."""
+        tag = _tag_user(user_id)
+        antes = cache.backend.tag_versions([tag])[0]
+        cache.invalidate(tag)
+        versao_user = cache.backend.tag_versions([tag])[0]
+        with self._lock:
+            entrada = self._bitsets.get(user_id)
+        cat = self._snapshot
+        hoje = date.today()
+        # Só se o bitset estava em dia antes desta escrita; senão é reconstruído na próxima leitura
+        if (entrada is None or cat is None or entrada[:3] != (cat.versao, antes, hoje)
+                or any(t not in cat.indice for t in tarefa_ids)):
+            return
+        mascara = 0
+        for tarefa_id in tarefa_ids:
+            mascara |= 1 << cat.indice[tarefa_id]
+        bits = entrada[3] | mascara if completada else entrada[3] & ~mascara
+        self._guardar(user_id, (cat.versao, versao_user, hoje), bits)
+
+    def _guardar(self, user_id: int, validade: tuple, bits: int) -> None:
+        with self._lock:
+            self._bitsets[user_id] = (*validade, bits)
+            self._bitsets.move_to_end(user_id)
+            while len(self._bitsets) > self.max_bitsets:
+                self._bitsets.popitem(last=False)
+
+
+catalogo = CatalogoTarefas()
+
+
+# ── Invalidação automática ────────────────────────────────────────────────────
+# Qualquer insert/update/delete ORM de Tarefa invalida a tag `tasks` após o commit.
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _marcar_catalogo_alterado(sessao, flush_context):
+    if any(isinstance(o, Tarefa) for o in chain(sessao.new, sessao.dirty, sessao.deleted)):
+        sessao.info['tarefas_alteradas'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidar_catalogo(sessao):
+    if sessao.info.pop('tarefas_alteradas', False):
+        cache.invalidate('tasks')
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _descartar_marca(sessao):
+    sessao.info.pop('tarefas_alteradas', None)
@@ -1,71 +1,156 @@
-from ..models.tasks import Tarefa, TarefaUsuario
-from ..models.user import UserStats
-from ..extensions import db
-from .gamification_service import adicionar_pontos, atualizar_streak, calcular_nivel
-
+from datetime import date
 
-def get_user_tasks(user_id: int) -> list:
-    todas_tarefas = Tarefa.query.all()
-    completadas_ids = {tc.tarefa_id for tc in TarefaUsuario.query.filter_by(user_id=user_id).all()}
-
-    return [
-        {
-            "id": t.id, "titulo": t.titulo, "descricao": t.descricao,
-            "pontos": t.pontos, "categoria": t.categoria, "icone": t.icone,
-            "completada": t.id in completadas_ids,
-        }
-        for t in todas_tarefas
-    ]
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
 
+from ..cache import cache
+from ..models.tasks import TarefaUsuario
+from ..models.user import UserStats
+from ..extensions import db
+from .gamification_service import aplicar_stats
+from .tasks_catalog import catalogo, inicio_periodo
 
-def completar_tarefa(user_id: int, tarefa_id: int):
-    tarefa = Tarefa.query.get(tarefa_id)
-    if not tarefa:
-        return None, "Tarefa não encontrada"
 
-    if TarefaUsuario.query.filter_by(user_id=user_id, tarefa_id=tarefa_id).first():
-        return None, "Tarefa já foi completada"
+def get_catalogo() -> list:
+    return list(catalogo.snapshot().tarefas)
 
-    db.session.add(TarefaUsuario(user_id=user_id, tarefa_id=tarefa_id))
 
-    stats = UserStats.query.filter_by(user_id=user_id).first()
-    novo_nivel = None
+def get_user_tasks(user_id: int) -> list:
+    cat = catalogo.snapshot()
+    bits = catalogo.completadas(user_id, cat)
+    return [{**t, "completada": bool(bits >> i & 1)} for i, t in enumerate(cat.tarefas)]
+
+
+def completar_tarefas(user_id: int, tarefa_ids: list):
+    """
+    Completa várias tarefas numa só transação (sincronização offline).
+
+    Valida tudo com uma query, insere as conclusões novas e aplica a soma dos
+    pontos, o nível e o streak uma só vez, na mesma transação. Devolve
+    (resultado, erro); o resultado traz o estado de cada item: 'completada',
+    'ja_completada' ou 'nao_encontrada'.
+    """
+    try:
+        user_id, ids = int(user_id), [int(t) for t in tarefa_ids]
+    except (TypeError, ValueError):
+        return None, "ID de tarefa inválido"
+    if not ids:
+        return None, "Nenhuma tarefa indicada"
+    limite = current_app.config['TAREFAS_LOTE_MAX']
+    if len(ids) > limite:
+        return None, f"Máximo de {limite} tarefas por pedido"
+
+    try:
+        return _completar(user_id, ids), None
+    except IntegrityError:
+        # Um pedido paralelo completou alguma destas tarefas primeiro (índice
+        # único por período); repetir (com os stats também desfeitos) mostra-a
+        # como 'ja_completada'
+        db.session.rollback()
+        return _completar(user_id, ids), None
+
+
+def _completar(user_id: int, ids: list) -> dict:
+    cat = catalogo.snapshot()
+    hoje = date.today()
+    # Bloqueia os stats primeiro: pedidos paralelos do mesmo utilizador esperam aqui
+    stats = UserStats.query.filter_by(user_id=user_id).with_for_update().first()
+    # Tarefas diárias/semanais/mensais podem voltar a ser feitas no período seguinte
+    periodos = {t: inicio_periodo(cat.get(t)["categoria"], hoje) for t in set(ids) if cat.get(t)}
+    feitas = set()
+    if periodos:
+        feitas = {
+            (tarefa_id, periodo) for tarefa_id, periodo in
+            db.session.query(TarefaUsuario.tarefa_id, TarefaUsuario.periodo_inicio).filter(
+                TarefaUsuario.user_id == user_id,
+                TarefaUsuario.tarefa_id.in_(periodos),
+                TarefaUsuario.periodo_inicio.in_(set(periodos.values())),
+            )
+        }
 
-    if stats:
-        novo_nivel = adicionar_pontos(stats, tarefa.pontos)
-        stats.tarefas_completas += 1
-        atualizar_streak(stats)
+    resultados, novas = [], []
+    for tarefa_id in ids:
+        tarefa = cat.get(tarefa_id)
+        if not tarefa:
+            estado = "nao_encontrada"
+        elif (tarefa_id, periodos[tarefa_id]) in feitas:
+            estado = "ja_completada"
+        else:
+            estado = "completada"
+            feitas.add((tarefa_id, periodos[tarefa_id]))   # repetida no mesmo pedido
+            novas.append(tarefa)
+        resultados.append({
+            "tarefa_id": tarefa_id, "estado": estado,
+            "pontos": (tarefa["pontos"] or 0) if estado == "completada" else 0,
+        })
+
+    pontos = sum(r["pontos"] for r in resultados)
+    tags, nivel_antes = [], stats.nivel if stats else None
+    if novas:
+        db.session.add_all(
+            TarefaUsuario(user_id=user_id, tarefa_id=t["id"], periodo_inicio=periodos[t["id"]])
+            for t in novas
+        )
+        if stats:
+            tags = aplicar_stats(stats, pontos, len(novas), hoje)
+    # Lidos antes do commit, que expira o objeto
+    novos_pontos, nivel, streak = (stats.pontos or 0, stats.nivel, stats.streak_atual) if stats else (0, None, 1)
 
     db.session.commit()
+    cache.invalidate(*tags)
+    if novas:
+        catalogo.marcar(user_id, [t["id"] for t in novas], True)
 
     return {
-        "sucesso": True,
-        "mensagem": f"Parabéns! +{tarefa.pontos} pontos",
-        "novos_pontos": stats.pontos if stats else 0,
-        "nivel": stats.nivel if stats else "Eco Iniciante",
-        "novo_nivel": novo_nivel,
-        "streak": stats.streak_atual if stats else 1,
-    }, None
+        "sucesso": bool(novas),
+        "mensagem": f"Parabéns! +{pontos} pontos" if novas else "Nenhuma tarefa nova",
+        "resultados": resultados,
+        "pontos_ganhos": pontos,
+        "novos_pontos": novos_pontos,
+        "nivel": nivel or "Eco Iniciante",
+        "novo_nivel": nivel if stats and nivel != nivel_antes else None,
+        "streak": streak,
+    }
+
+
+def completar_tarefa(user_id: int, tarefa_id: int):
+    resultado, erro = completar_tarefas(user_id, [tarefa_id])
+    if erro:
+        return None, erro
+    estado = resultado.pop("resultados")[0]["estado"]
+    if estado == "nao_encontrada":
+        return None, "Tarefa não encontrada"
+    if estado == "ja_completada":
+        return None, "Tarefa já foi completada"
+    del resultado["pontos_ganhos"]
+    return resultado, None
 
 
 def desmarcar_tarefa(user_id: int, tarefa_id: int):
-    tarefa_usuario = TarefaUsuario.query.filter_by(user_id=user_id, tarefa_id=tarefa_id).first()
+    user_id, tarefa_id = int(user_id), int(tarefa_id)
+    tarefa = catalogo.snapshot().get(tarefa_id)
+    if not tarefa:
+        return None, "Tarefa não estava completada"
+
+    # Só a conclusão do período atual; as anteriores são histórico
+    tarefa_usuario = TarefaUsuario.query.filter_by(
+        user_id=user_id, tarefa_id=tarefa_id,
+        periodo_inicio=inicio_periodo(tarefa["categoria"], date.today()),
+    ).first()
     if not tarefa_usuario:
         return None, "Tarefa não estava completada"
 
-    tarefa = Tarefa.query.get(tarefa_id)
+    stats = UserStats.query.filter_by(user_id=user_id).with_for_update().first()
     db.session.delete(tarefa_usuario)
-
-    stats = UserStats.query.filter_by(user_id=user_id).first()
-    if stats and tarefa:
-        stats.pontos = max(0, stats.pontos - tarefa.pontos)
-        stats.tarefas_completas = max(0, stats.tarefas_completas - 1)
-        stats.nivel = calcular_nivel(stats.pontos)
+    tags = aplicar_stats(stats, -(tarefa["pontos"] or 0), -1) if stats else []
+    novos_pontos = stats.pontos if stats else 0
 
     db.session.commit()
+    cache.invalidate(*tags)
+    catalogo.marcar(user_id, [tarefa_id], False)
 
     return {
         "sucesso": True,
         "mensagem": "Tarefa desmarcada",
-        "novos_pontos": stats.pontos if stats else 0,
+        "novos_pontos": novos_pontos,
     }, None
@@ -0,0 +1,52 @@
+"""
+Busca de utilizadores para encontrar amigos (typeahead).
+
+O termo é normalizado como as colunas `nome_busca`/`email_busca` (sem
+acentos, minúsculas) e cada coluna é lida como um intervalo do seu índice,
+[termo, termo⁺), já ordenado e limitado: o custo depende do número de
+resultados pedidos, não do número de utilizadores.
+"""
+
+from sqlalchemy import literal, select, union_all
+
+from ..extensions import db
+from ..models.user import Usuario, normalizar_busca
+
+
+def _fim_do_prefixo(termo: str) -> str:
+    # Primeira string maior do que todas as que começam por `termo`
+    return termo[:-1] + chr(ord(termo[-1]) + 1)
+
+
+def buscar_usuarios(q: str, limite: int = 10) -> list:
+    """
+    Utilizadores cujo nome ou email começa por `q`; primeiro os nomes, por
+    ordem. O email só vem nos resultados que coincidiram pelo email (quem o
+    procura já conhece esse prefixo); os outros trazem só id e nome.
+    """
+    termo = normalizar_busca(q)
+    if not termo:
+        return []
+    fim = _fim_do_prefixo(termo)
+
+    por_coluna = [
+        select(Usuario.id, Usuario.nome, Usuario.email, literal(ordem).label("ordem"), coluna.label("chave"))
+        .where(coluna >= termo, coluna < fim)
+        .order_by(coluna)
+        .limit(limite)
+        .subquery()
+        for ordem, coluna in enumerate((Usuario.nome_busca, Usuario.email_busca))
+    ]
+    todos = union_all(*(select(sub) for sub in por_coluna)).subquery()
+    linhas = db.session.execute(select(todos).order_by(todos.c.ordem, todos.c.chave, todos.c.id))
+
+    resultados = {}
+    for u in linhas:
+        # Quem coincide pelo nome e pelo email aparece uma vez, no lugar do nome
+        if u.id not in resultados:
+            if len(resultados) == limite:
+                continue
+            resultados[u.id] = {"id": u.id, "nome": u.nome}
+        if u.ordem == 1:
+            resultados[u.id]["email"] = u.email
+    return list(resultados.values())
@@ -7,10 +7,18 @@ Regras de segurança:
 - Cada utilizador entra na sua própria room: user_<id>
 """
 
-from flask import session
-from flask_socketio import emit, join_room, disconnect as sio_disconnect
+import threading
+
+from flask import current_app, session
+from flask_socketio import join_room, disconnect as sio_disconnect
 from ..extensions import socketio
 from ..services.private_chat_service import save_message
+from .event_log import event_log
+from .typing_coalescer import TypingCoalescer
+
+emit = event_log.emit
+
+_typing_lock = threading.Lock()
 
 
 def _get_session_user_id():
@@ -18,20 +26,58 @@ def _get_session_user_id():
     return session.get('user_id')
 
 
+def _get_typing_coalescer() -> TypingCoalescer:
+    """Coalescer por app; arranca a tarefa de expiração na primeira utilização."""
+    coalescer = current_app.extensions.get('typing_coalescer')
+    if coalescer is not None:
+        return coalescer
+
+    with _typing_lock:
+        coalescer = current_app.extensions.get('typing_coalescer')
+        if coalescer is None:
+            cfg = current_app.config
+            coalescer = TypingCoalescer(
+                expiry=cfg['TYPING_EXPIRY_SECONDS'],
+                rate=cfg['TYPING_RATE_LIMIT'],
+                burst=cfg['TYPING_RATE_BURST'],
+            )
+            current_app.extensions['typing_coalescer'] = coalescer
+            socketio.start_background_task(
+                _expirar_typing, coalescer, cfg['TYPING_SWEEP_INTERVAL']
+            )
+    return coalescer
+
+
+def _emit_typing(sender_id: int, receiver_id: int, is_typing: bool) -> None:
+    emit('user_typing', {
+        'sender_id': sender_id,
+        'is_typing': is_typing,
+    }, to=f'user_{receiver_id}')
+
+
+def _expirar_typing(coalescer: TypingCoalescer, intervalo: float) -> None:
+    """Envia is_typing=false aos pares que deixaram de enviar eventos."""
+    while True:
+        socketio.sleep(intervalo)
+        for sender_id, receiver_id in coalescer.expire():
+            _emit_typing(sender_id, receiver_id, False)
+
+
 # ── connect ───────────────────────────────────────────────────────────────────
 
 @socketio.on('connect')
+@event_log.tracked('connect')
 def on_connect():
     user_id = _get_session_user_id()
-    print(f'[Socket] CONNECT tentativa — session user_id={user_id!r} | session keys={list(session.keys())}')
 
     if not user_id:
-        print('[Socket] ❌ Rejeitado — sem user_id na sessão (cookie não chegou?)')
+        # Sempre registado: normalmente significa que o cookie não chegou
+        event_log.log('connect_rejected', force=True,
+                      session_keys=list(session.keys()))
         return False  # Rejeita a ligação
 
     room = f'user_{user_id}'
     join_room(room)
-    print(f'[Socket] ✅ Utilizador {user_id} conectado → room {room}')
 
     emit('connected', {'user_id': user_id, 'room': room})
 
@@ -39,6 +85,7 @@ def on_connect():
 # ── private_message ───────────────────────────────────────────────────────────
 
 @socketio.on('private_message')
+@event_log.tracked('private_message')
 def on_private_message(data):
     """
     Payload esperado: { receiver_id: int, content: str }
@@ -75,29 +122,39 @@ def on_private_message(data):
 # ── typing ────────────────────────────────────────────────────────────────────
 
 @socketio.on('typing')
+@event_log.tracked('typing')
 def on_typing(data):
     """
     Payload esperado: { receiver_id: int, is_typing: bool }
+    Só as transições de estado chegam ao receiver (ver TypingCoalescer).
     """
     sender_id = _get_session_user_id()
     if not sender_id:
         return
 
-    receiver_id = data.get('receiver_id')
+    try:
+        receiver_id = int(data.get('receiver_id'))
+    except (TypeError, ValueError):
+        return
     is_typing = bool(data.get('is_typing', False))
 
     if not receiver_id:
         return
 
-    emit('user_typing', {
-        'sender_id': sender_id,
-        'is_typing': is_typing,
-    }, to=f'user_{receiver_id}')
+    estado = _get_typing_coalescer().update(sender_id, receiver_id, is_typing)
+    if estado is None:
+        return
+
+    _emit_typing(sender_id, receiver_id, estado)
 
 
 # ── disconnect ────────────────────────────────────────────────────────────────
 
 @socketio.on('disconnect')
+@event_log.tracked('disconnect')
 def on_disconnect():
     user_id = _get_session_user_id()
-    print(f'[Socket] Utilizador {user_id} desconectado')
+
+    if user_id:
+        for receiver_id in _get_typing_coalescer().drop_sender(user_id):
+            _emit_typing(user_id, receiver_id, False)
@@ -0,0 +1,149 @@
+"""
+Logging estruturado e contadores dos eventos Socket.IO.
+
+Substitui os `print` por pacote: cada evento é contado sempre, mas só uma
+fração (SOCKET_EVENT_SAMPLING, por tipo de evento) chega ao log, numa linha
+JSON. Os contadores (eventos/s por tipo, latência dos emits) ficam
+disponíveis em `snapshot()` para serem lidos por um endpoint.
+"""
+
+import functools
+import json
+import logging
+import random
+import threading
+import time
+
+import flask_socketio
+from flask import has_request_context, session
+
+from ..extensions import socketio
+from ..metrics import SOCKET_EMIT_SECONDS, SOCKET_EVENTS
+
+logger = logging.getLogger('ecochat.socket')
+
+# Janela (em segundos) usada para calcular eventos/s
+_JANELA = 60
+
+
+class _Serie:
+    """Contador total + anel de buckets por segundo para a taxa recente."""
+
+    __slots__ = ('total', 'soma', 'maximo', '_buckets')
+
+    def __init__(self):
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self._buckets = [(0, 0)] * _JANELA   # (segundo, contagem)
+
+    def registar(self, agora: float, valor: float = 0.0) -> None:
+        self.total += 1
+        self.soma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+        segundo = int(agora)
+        i = segundo % _JANELA
+        marca, contagem = self._buckets[i]
+        self._buckets[i] = (segundo, contagem + 1 if marca == segundo else 1)
+
+    def taxa(self, agora: float) -> float:
+        limite = int(agora) - _JANELA
+        return sum(c for s, c in self._buckets if s > limite) / _JANELA
+
+
+class SocketEventLog:
+    def __init__(self):
+        self.enabled = True
+        self.sampling: dict[str, float] = {}
+        self.default_rate = 0.0
+        self._lock = threading.Lock()
+        self._eventos: dict[str, _Serie] = {}
+        self._emits: dict[str, _Serie] = {}
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config['SOCKET_EVENT_LOG']
+        self.sampling = dict(app.config['SOCKET_EVENT_SAMPLING'])
+        self.default_rate = self.sampling.pop('*', 0.0)
+
+        if self.enabled and not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    # ── contadores ────────────────────────────────────────────────
+
+    def _registar(self, tabela: dict, nome: str, valor: float = 0.0) -> None:
+        agora = time.time()
+        with self._lock:
+            serie = tabela.get(nome)
+            if serie is None:
+                serie = tabela[nome] = _Serie()
+            serie.registar(agora, valor)
+
+    def snapshot(self) -> dict:
+        agora = time.time()
+        with self._lock:
+            return {
+                'events': {
+                    nome: {'total': s.total, 'per_second': round(s.taxa(agora), 3)}
+                    for nome, s in self._eventos.items()
+                },
+                'emits': {
+                    nome: {
+                        'total': s.total,
+                        'per_second': round(s.taxa(agora), 3),
+                        'latency_avg_ms': round(s.soma / s.total * 1000, 3) if s.total else 0.0,
+                        'latency_max_ms': round(s.maximo * 1000, 3),
+                    }
+                    for nome, s in self._emits.items()
+                },
+            }
+
+    # ── logging ───────────────────────────────────────────────────
+
+    def log(self, event: str, level: int = logging.INFO, force: bool = False, **fields) -> None:
+        """Escreve uma linha JSON, sujeita à taxa de amostragem do evento."""
+        if not self.enabled:
+            return
+        rate = self.sampling.get(event, self.default_rate)
+        if not force and (rate <= 0 or (rate < 1 and random.random() >= rate)):
+            return
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, json.dumps({'event': event, 'sample_rate': rate, **fields},
+                                     ensure_ascii=False, default=str))
+
+    def tracked(self, event: str):
+        """Decorador para handlers: conta, mede e regista (amostrado) o evento."""
+        def decorator(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                inicio = time.perf_counter()
+                resultado = handler(*args, **kwargs)
+                duracao = time.perf_counter() - inicio
+                self._registar(self._eventos, event, duracao)
+                SOCKET_EVENTS.inc(event)
+                self.log(event,
+                         user_id=session.get('user_id') if has_request_context() else None,
+                         rejected=resultado is False,
+                         duration_ms=round(duracao * 1000, 3))
+                return resultado
+            return wrapper
+        return decorator
+
+    def emit(self, event: str, *args, **kwargs) -> None:
+        """Emite (dentro ou fora de um handler) medindo a latência do emit."""
+        inicio = time.perf_counter()
+        if has_request_context():
+            flask_socketio.emit(event, *args, **kwargs)
+        else:
+            socketio.emit(event, *args, **kwargs)
+        duracao = time.perf_counter() - inicio
+        self._registar(self._emits, event, duracao)
+        SOCKET_EMIT_SECONDS.observe(event, value=duracao)
+
+
+event_log = SocketEventLog()
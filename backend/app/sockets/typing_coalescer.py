@@ -0,0 +1,82 @@
+"""
+Coalescer do indicador "está a escrever".
+
+O cliente emite `typing` a cada tecla; aqui guardamos o estado por par
+(sender, receiver) e só deixamos passar as transições (False → True e
+True → False). Quem pára de enviar eventos expira ao fim de `expiry`
+segundos, e clientes que martelam o evento são limitados por um token
+bucket por sender.
+"""
+
+import threading
+import time
+
+
+class TypingCoalescer:
+    def __init__(self, expiry: float = 5.0, rate: float = 10.0, burst: int = 20,
+                 clock=time.monotonic):
+        self.expiry = expiry
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (sender_id, receiver_id) -> instante do último evento is_typing=True
+        self._ativos: dict[tuple[int, int], float] = {}
+        # sender_id -> (tokens disponíveis, instante da última recarga)
+        self._buckets: dict[int, tuple[float, float]] = {}
+
+    def _consumir_token(self, sender_id: int, agora: float) -> bool:
+        tokens, ultimo = self._buckets.get(sender_id, (float(self.burst), agora))
+        tokens = min(float(self.burst), tokens + (agora - ultimo) * self.rate)
+        if tokens < 1.0:
+            self._buckets[sender_id] = (tokens, agora)
+            return False
+        self._buckets[sender_id] = (tokens - 1.0, agora)
+        return True
+
+    def update(self, sender_id: int, receiver_id: int, is_typing: bool) -> bool | None:
+        """
+        Regista um evento do cliente.
+        Devolve o novo estado se houve transição (deve ser emitido) ou None.
+        """
+        agora = self._clock()
+        chave = (sender_id, receiver_id)
+        with self._lock:
+            if not self._consumir_token(sender_id, agora):
+                return None
+
+            estava = chave in self._ativos
+            if is_typing:
+                self._ativos[chave] = agora
+                return True if not estava else None
+
+            if estava:
+                del self._ativos[chave]
+                return False
+            return None
+
+    def expire(self) -> list[tuple[int, int]]:
+        """Remove os pares inativos há mais de `expiry` segundos e devolve-os."""
+        limite = self._clock() - self.expiry
+        with self._lock:
+            expirados = [chave for chave, visto in self._ativos.items() if visto <= limite]
+            for chave in expirados:
+                del self._ativos[chave]
+            # Buckets cheios há tempo suficiente já não limitam ninguém
+            cheios = [s for s, (_, ultimo) in self._buckets.items()
+                      if ultimo <= limite - self.burst / self.rate]
+            for sender_id in cheios:
+                del self._buckets[sender_id]
+        return expirados
+
+    def drop_sender(self, sender_id: int) -> list[int]:
+        """Esquece o sender (ex.: desconexão). Devolve os receivers que o viam a escrever."""
+        with self._lock:
+            receivers = [r for (s, r) in self._ativos if s == sender_id]
+            for receiver_id in receivers:
+                del self._ativos[(sender_id, receiver_id)]
+            self._buckets.pop(sender_id, None)
+        return receivers
+
+    def __len__(self) -> int:
+        return len(self._ativos)
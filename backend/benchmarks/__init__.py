@@ -0,0 +1 @@
+# Benchmarks — correr a partir de backend/: python -m benchmarks.<nome>
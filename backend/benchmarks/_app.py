@@ -0,0 +1,33 @@
+"""Helpers partilhados pelos benchmarks: criar a app apontada para outra BD."""
+
+import os
+
+from app import create_app
+from app.config import Config
+
+
+def uri_de(db: str) -> str:
+    """Aceita um URI SQLAlchemy ou um caminho para um ficheiro SQLite."""
+    if '://' in db:
+        return db
+    return f"sqlite:///{os.path.abspath(db)}"
+
+
+def criar_app(db: str, **overrides):
+    """App com a configuração normal, mas sem ruído de logs durante as medições."""
+    config = type('BenchConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': uri_de(db),
+        'SOCKET_EVENT_LOG': False,
+        'SLOW_REQUEST_MS': float('inf'),
+        'SLOW_REQUEST_QUERIES': float('inf'),
+        **overrides,
+    })
+    return create_app(config)
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """Percentil por nearest-rank sobre uma lista já ordenada."""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, round(p / 100 * len(valores)) - 1))
+    return valores[k]
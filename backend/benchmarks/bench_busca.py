@@ -0,0 +1,86 @@
+"""
+Latência da busca de utilizadores (/api/users/search) com muitos
+utilizadores.
+
+Cria uma BD nova com N utilizadores com nomes portugueses (com acentos) e
+mede `buscar_usuarios` para prefixos de vários comprimentos, escritos sem
+acentos e com maiúsculas, como num typeahead. Os dados são inseridos
+diretamente na tabela, já normalizados, para o setup não dominar.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_busca
+    python -m benchmarks.bench_busca --usuarios 1000000 --db /tmp/busca.db
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.extensions import db
+from app.models import criar_schema, Usuario
+from app.models.user import normalizar_busca
+from app.services.users_service import buscar_usuarios
+from ._app import criar_app
+
+_LOTE = 50_000
+
+NOMES = ['João', 'Maria', 'José', 'Ana', 'António', 'Inês', 'Conceição', 'Luís', 'Sónia', 'Rui',
+         'Beatriz', 'Tomás', 'Leonor', 'Gonçalo', 'Mónica', 'André', 'Íris', 'Simão', 'Lúcia', 'Hélder']
+APELIDOS = ['Silva', 'Santos', 'Ferreira', 'Pereira', 'Oliveira', 'Costa', 'Rodrigues', 'Martins',
+            'Jesus', 'Sousa', 'Fernandes', 'Gonçalves', 'Gomes', 'Lopes', 'Marques', 'Alves', 'Simões',
+            'Ribeiro', 'Conceição', 'Brandão']
+TERMOS = ['j', 'jo', 'joa', 'joao s', 'CONCEI', 'goncalo bran', 'user12', 'user12345@', 'zz']
+
+
+def _popular(n: int, rnd: random.Random) -> None:
+    def linhas():
+        for i in range(1, n + 1):
+            nome = f'{rnd.choice(NOMES)} {rnd.choice(APELIDOS)} {rnd.choice(APELIDOS)}'
+            email = f'user{i}@bench.eco'
+            yield {'id': i, 'nome': nome, 'email': email, 'senha': 'x',
+                   'nome_busca': normalizar_busca(nome), 'email_busca': email}
+
+    lote = []
+    with db.engine.begin() as conn:
+        for linha in linhas():
+            lote.append(linha)
+            if len(lote) >= _LOTE:
+                conn.execute(Usuario.__table__.insert(), lote)
+                lote = []
+        if lote:
+            conn.execute(Usuario.__table__.insert(), lote)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da busca de utilizadores.')
+    parser.add_argument('--usuarios', type=int, default=1_000_000)
+    parser.add_argument('--limite', type=int, default=10)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--db', default=None, help='ficheiro SQLite ou URI vazio (por omissão, temporário)')
+    args = parser.parse_args()
+
+    destino = args.db or os.path.join(tempfile.mkdtemp(), 'busca.db')
+    app = criar_app(destino, JOBS_WORKER_EMBUTIDO=False)
+    with app.app_context():
+        criar_schema()
+        inicio = time.perf_counter()
+        _popular(args.usuarios, random.Random(42))
+        print(f"setup: {args.usuarios:,} utilizadores ({time.perf_counter() - inicio:.1f}s)")
+
+        for termo in TERMOS:
+            tempos = []
+            for _ in range(args.repeticoes):
+                t0 = time.perf_counter()
+                resultados = buscar_usuarios(termo, args.limite)
+                tempos.append((time.perf_counter() - t0) * 1000)
+                db.session.rollback()
+            tempos.sort()
+            print(f"{termo!r:>16}: {len(resultados):>2} resultados — mediana {statistics.median(tempos):.2f} ms, "
+                  f"p99 {tempos[int(len(tempos) * 0.99) - 1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Concorrência SQLite: leitores do feed + escritores de likes em simultâneo.
+
+Corre o mesmo cenário com o perfil de SQLITE_PRAGMAS da config e, com
+--comparar, também sem ele (journal DELETE, pragmas por omissão), e conta
+os erros "database is locked".
+
+Uso: python -m benchmarks.bench_concorrencia bench.db [--leitores 8 --escritores 4 --duracao 10]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from flask import got_request_exception
+
+from app.models import Publicacao, Usuario
+from ._app import criar_app, percentil
+
+
+def _cenario(db_path: str, args, **overrides) -> dict:
+    app = criar_app(db_path, **overrides)
+    with app.app_context():
+        users = [u for (u,) in Usuario.query.with_entities(Usuario.id).limit(1000)]
+        posts = [p for (p,) in Publicacao.query.with_entities(Publicacao.id)
+                 .order_by(Publicacao.criada_em.desc()).limit(100)]
+
+    bloqueios = [0]
+    lock = threading.Lock()
+
+    def _on_exception(sender, exception, **extra):
+        if 'database is locked' in str(exception):
+            with lock:
+                bloqueios[0] += 1
+    got_request_exception.connect(_on_exception, app)
+
+    resultados = {'leitura': [], 'escrita': []}
+    erros = {'leitura': 0, 'escrita': 0}
+    fim = [float('inf')]
+    pronto = threading.Barrier(args.leitores + args.escritores + 1)
+
+    def trabalhador(tipo, seed):
+        rnd = random.Random(seed)
+        cliente = app.test_client()
+        locais, falhas = [], 0
+        pronto.wait()
+        while time.perf_counter() < fim[0]:
+            t = time.perf_counter()
+            if tipo == 'leitura':
+                resp = cliente.get(f'/api/feed/{rnd.choice(users)}')
+            else:
+                resp = cliente.post(f'/api/posts/{rnd.choice(posts)}/like',
+                                    json={'user_id': rnd.choice(users)})
+            locais.append(time.perf_counter() - t)
+            falhas += resp.status_code != 200
+        with lock:
+            resultados[tipo].extend(locais)
+            erros[tipo] += falhas
+
+    threads = [threading.Thread(target=trabalhador, args=('leitura', i)) for i in range(args.leitores)]
+    threads += [threading.Thread(target=trabalhador, args=('escrita', 1000 + i)) for i in range(args.escritores)]
+    for t in threads:
+        t.start()
+    pronto.wait()
+    inicio = time.perf_counter()
+    fim[0] = inicio + args.duracao
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+    got_request_exception.disconnect(_on_exception, app)
+
+    resumo = {'database_is_locked': bloqueios[0]}
+    for tipo, lat in resultados.items():
+        lat.sort()
+        resumo[tipo] = {
+            'ops': len(lat), 'erros': erros[tipo], 'ops_s': round(len(lat) / decorrido, 1),
+            'p50_ms': round(percentil(lat, 50) * 1000, 2), 'p99_ms': round(percentil(lat, 99) * 1000, 2),
+        }
+    return resumo
+
+
+def _imprimir(nome: str, r: dict) -> None:
+    print(f"[{nome}] database is locked: {r['database_is_locked']}")
+    for tipo in ('leitura', 'escrita'):
+        x = r[tipo]
+        print(f"  {tipo:<8} ops={x['ops']:<7} erros={x['erros']:<5} {x['ops_s']:>8} ops/s "
+              f"p50={x['p50_ms']}ms p99={x['p99_ms']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Leituras do feed + likes concorrentes em SQLite.')
+    parser.add_argument('db')
+    parser.add_argument('--leitores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--duracao', type=float, default=10.0)
+    parser.add_argument('--comparar', action='store_true',
+                        help='corre também sem o perfil (journal DELETE, pragmas por omissão)')
+    args = parser.parse_args()
+
+    if args.comparar:
+        _imprimir('sem perfil', _cenario(args.db, args,
+                                         SQLITE_PRAGMAS={'journal_mode': 'DELETE'},
+                                         DB_POOL_SIZE=5, DB_MAX_OVERFLOW=10))
+    _imprimir('perfil WAL', _cenario(args.db, args))
+
+
+if __name__ == '__main__':
+    main()
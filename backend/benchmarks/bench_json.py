@@ -0,0 +1,101 @@
+"""
+Custo de serialização JSON das respostas grandes, sem BD.
+
+Compara o provider por omissão do Flask (json da stdlib, como `jsonify`)
+com o FastJSONProvider (orjson) e com o envio em streaming, sobre um feed
+de 1.000 publicações e um histórico de 10.000 mensagens sintéticos. Mede
+tempo de CPU por resposta (process_time), não latência de rede.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --feed 5000 --mensagens 50000 --repeticoes 50
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import FastJSONProvider
+from ._app import criar_app
+
+
+def _feed(n: int, datas_nativas: bool) -> list[dict]:
+    base = datetime(2026, 1, 1, 12, 0, 0, 123456)
+    itens = []
+    for i in range(n):
+        criada = base - timedelta(minutes=i)
+        itens.append({
+            "id": n - i,
+            "descricao": f"Ação sustentável #{i} — reciclei 3 garrafas e fui de bicicleta 🚲🌱",
+            "categoria": "reciclagem",
+            "imagem_url": f"/api/uploads/post_{i}.jpg" if i % 3 else None,
+            "criada_em": criada if datas_nativas else criada.isoformat(),
+            "usuario": {"id": i % 500, "nome": f"Eco User {i % 500}"},
+            "likes": i % 97,
+            "comentarios": i % 13,
+            "user_liked": i % 5 == 0,
+        })
+    return itens
+
+
+def _historico(n: int) -> list[dict]:
+    base = datetime(2026, 1, 1, 8, 0, 0)
+    return [
+        {
+            'id': i,
+            'sender_id': 1 + i % 2,
+            'receiver_id': 2 - i % 2,
+            'content': f'Mensagem {i}: olá! Já fizeste a missão de hoje? 🌍',
+            'created_at': (base + timedelta(seconds=30 * i)).isoformat(),
+            'read_at': (base + timedelta(seconds=30 * i + 5)).isoformat(),
+            'sender_nome': 'Maria Silva' if i % 2 else 'João Pedro',
+        }
+        for i in range(n)
+    ]
+
+
+def _medir(fn, repeticoes: int) -> tuple[float, int]:
+    fn()   # aquecimento
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        tamanho = fn()
+    return (time.process_time() - inicio) / repeticoes * 1000, tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da serialização JSON.')
+    parser.add_argument('--feed', type=int, default=1_000, help='publicações no feed')
+    parser.add_argument('--mensagens', type=int, default=10_000, help='mensagens no histórico')
+    parser.add_argument('--repeticoes', type=int, default=30)
+    args = parser.parse_args()
+
+    app = criar_app('sqlite://')
+    stdlib = DefaultJSONProvider(app)
+    rapido = FastJSONProvider(app)
+    if not rapido.usar_orjson:
+        print("aviso: orjson não está instalado — o FastJSONProvider usa a stdlib")
+
+    casos = {
+        f'feed {args.feed}': (_feed(args.feed, False), _feed(args.feed, True)),
+        f'historico {args.mensagens}': (_historico(args.mensagens), _historico(args.mensagens)),
+    }
+
+    print(f"{'payload':<18} {'provider':<12} {'ms CPU':>9} {'bytes':>10} {'vs stdlib':>10}")
+    with app.app_context():
+        for nome, (com_strings, com_datas) in casos.items():
+            variantes = {
+                'stdlib': lambda: len(stdlib.response(com_strings).get_data()),
+                'rapido': lambda: len(rapido.response(com_datas).get_data()),
+                'streaming': lambda: sum(len(p) for p in rapido.stream_list(com_datas)),
+            }
+            base = None
+            for provider, fn in variantes.items():
+                ms, tamanho = _medir(fn, args.repeticoes)
+                base = base or ms
+                print(f"{nome:<18} {provider:<12} {ms:>9.2f} {tamanho:>10,} {base / ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
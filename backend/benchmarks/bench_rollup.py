@@ -0,0 +1,92 @@
+"""
+Custo do rollup noturno (app/services/atividade_service.py) com muitos
+utilizadores.
+
+Cria uma BD nova com N utilizadores e UserStats (streaks e última
+atividade aleatórios) e as tarefas completadas de ontem por uma fração
+deles, e mede `rollup(ontem, hoje)`: agregação, recontagem de dias_ativos
+e expiração de streaks. Os dados são inseridos diretamente nas tabelas,
+sem hashing de senhas, para o setup não dominar.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_rollup
+    python -m benchmarks.bench_rollup --usuarios 1000000 --ativos 0.2 --db /tmp/rollup.db
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from app.extensions import db
+from app.models import criar_schema, Usuario, UserStats, Tarefa, TarefaUsuario
+from app.services.atividade_service import rollup
+from app.services.tasks_catalog import inicio_periodo
+from ._app import criar_app
+
+_LOTE = 50_000
+
+
+def _inserir(conn, tabela, linhas) -> None:
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= _LOTE:
+            conn.execute(tabela.insert(), lote)
+            lote = []
+    if lote:
+        conn.execute(tabela.insert(), lote)
+
+
+def _popular(n: int, ativos: float, tarefas_por_ativo: int, rnd: random.Random) -> int:
+    hoje = date.today()
+    ontem = hoje - timedelta(days=1)
+    tarefas = [(t.id, inicio_periodo(t.categoria, ontem)) for t in Tarefa.query.all()]
+    with db.engine.begin() as conn:
+        _inserir(conn, Usuario.__table__, (
+            {'id': i, 'nome': f'U{i}', 'email': f'u{i}@bench', 'senha': 'x'} for i in range(1, n + 1)))
+        _inserir(conn, UserStats.__table__, (
+            {'user_id': i, 'pontos': rnd.randint(0, 3000), 'tarefas_completas': rnd.randint(0, 200),
+             'dias_ativos': rnd.randint(0, 100), 'streak_atual': rnd.randint(0, 10),
+             'ultima_missao': hoje - timedelta(days=rnd.randint(0, 5))}
+            for i in range(1, n + 1)))
+        ids_ativos = rnd.sample(range(1, n + 1), int(n * ativos))
+        _inserir(conn, TarefaUsuario.__table__, (
+            {'user_id': uid, 'tarefa_id': tarefa_id, 'periodo_inicio': periodo,
+             'completada_em': datetime.combine(ontem, datetime.min.time()) + timedelta(seconds=rnd.randint(0, 86_399))}
+            for uid in ids_ativos for tarefa_id, periodo in rnd.sample(tarefas, tarefas_por_ativo)))
+    return len(ids_ativos) * tarefas_por_ativo
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do rollup noturno da atividade.')
+    parser.add_argument('--usuarios', type=int, default=1_000_000)
+    parser.add_argument('--ativos', type=float, default=0.2, help='fração com atividade ontem')
+    parser.add_argument('--tarefas-por-ativo', type=int, default=2)
+    parser.add_argument('--db', default=None, help='ficheiro SQLite ou URI vazio (por omissão, temporário)')
+    args = parser.parse_args()
+
+    destino = args.db or os.path.join(tempfile.mkdtemp(), 'rollup.db')
+    app = criar_app(destino, JOBS_WORKER_EMBUTIDO=False)
+    rnd = random.Random(42)
+    with app.app_context():
+        criar_schema()
+        inicio = time.perf_counter()
+        linhas = _popular(args.usuarios, args.ativos, args.tarefas_por_ativo, rnd)
+        print(f"setup: {args.usuarios:,} utilizadores, {linhas:,} tarefas ontem "
+              f"({time.perf_counter() - inicio:.1f}s)")
+
+        hoje = date.today()
+        for rodada in ('primeira', 'repetida'):
+            inicio = time.perf_counter()
+            resultado = rollup(hoje - timedelta(days=1), hoje)
+            db.session.commit()
+            print(f"rollup ({rodada}): {time.perf_counter() - inicio:.2f}s — "
+                  f"{resultado['utilizadores_ativos']:,} ativos, "
+                  f"{resultado['streaks_expirados']:,} streaks expirados")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark de arranque: import + create_app + primeiro pedido, num processo
+novo de cada vez (arranque a frio, como um worker a reiniciar).
+
+Uso: python -m benchmarks.bench_startup [bd] [--repeticoes 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_SONDA = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from benchmarks._app import criar_app
+t1 = time.perf_counter()
+app = criar_app(sys.argv[1])
+t2 = time.perf_counter()
+resp = app.test_client().get('/api/status')
+t3 = time.perf_counter()
+assert resp.status_code == 200, resp.status_code
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1,
+                  'primeiro_pedido': t3 - t2, 'total': t3 - t0}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de arranque até ao primeiro pedido.')
+    parser.add_argument('db', nargs='?', default=os.path.join(os.getcwd(), 'ecochat.db'))
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    medicoes = []
+    for _ in range(args.repeticoes):
+        saida = subprocess.run([sys.executable, '-c', _SONDA, args.db], check=True,
+                               capture_output=True, text=True, cwd=os.getcwd())
+        medicoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    print(f"{'fase':<16} {'mediana':>10} {'min':>10} {'max':>10}")
+    for fase in ('import', 'create_app', 'primeiro_pedido', 'total'):
+        valores = [m[fase] * 1000 for m in medicoes]
+        print(f"{fase:<16} {statistics.median(valores):>8.1f}ms {min(valores):>8.1f}ms {max(valores):>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
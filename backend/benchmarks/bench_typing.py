@@ -0,0 +1,82 @@
+"""
+Benchmark do relay de typing: compara frames emitidos sem coalescer
+(um por evento, comportamento antigo) com os emitidos pelo TypingCoalescer.
+
+Uso: python -m benchmarks.bench_typing [--pares 1000] [--segundos 60]
+"""
+
+import argparse
+import random
+import time
+
+from app.sockets.typing_coalescer import TypingCoalescer
+
+
+class _Relogio:
+    """Relógio simulado para o benchmark não depender do tempo real."""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _gerar_eventos(pares: int, segundos: float, seed: int) -> list[tuple[float, int, int, bool]]:
+    """Rajadas de escrita (~8 teclas/s) intercaladas com pausas, por par."""
+    rnd = random.Random(seed)
+    eventos = []
+    for i in range(pares):
+        sender, receiver = i * 2 + 1, i * 2 + 2
+        t = rnd.uniform(0, 5)
+        while t < segundos:
+            fim_rajada = t + rnd.uniform(1, 10)
+            while t < min(fim_rajada, segundos):
+                eventos.append((t, sender, receiver, True))
+                t += rnd.expovariate(8)
+            # O cliente envia is_typing=false 2s após a última tecla (às vezes perde-se)
+            if rnd.random() > 0.1:
+                eventos.append((t + 2, sender, receiver, False))
+            t += 2 + rnd.uniform(1, 15)
+        # Alguns clientes "martelam" o evento em loop
+        if i % 50 == 0:
+            eventos.extend((j / 100, sender, receiver, True) for j in range(int(segundos * 100)))
+    eventos.sort(key=lambda e: e[0])
+    return eventos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pares', type=int, default=1000)
+    parser.add_argument('--segundos', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    eventos = _gerar_eventos(args.pares, args.segundos, args.seed)
+
+    relogio = _Relogio()
+    coalescer = TypingCoalescer(clock=relogio)
+    emitidos = 0
+    proximo_sweep = 1.0
+
+    inicio = time.perf_counter()
+    for t, sender, receiver, is_typing in eventos:
+        while proximo_sweep <= t:
+            relogio.agora = proximo_sweep
+            emitidos += len(coalescer.expire())
+            proximo_sweep += 1.0
+        relogio.agora = t
+        if coalescer.update(sender, receiver, is_typing) is not None:
+            emitidos += 1
+    duracao = time.perf_counter() - inicio
+
+    total = len(eventos)
+    print(f"Eventos recebidos:     {total}")
+    print(f"Frames sem coalescer:  {total}")
+    print(f"Frames com coalescer:  {emitidos}")
+    print(f"Redução:               {100 * (1 - emitidos / total):.1f}%")
+    print(f"Custo por evento:      {duracao / total * 1e6:.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""
+Gerador de dados sintéticos para benchmarks.
+
+Popula uma BD com volumes configuráveis: utilizadores, amizades com
+distribuição em lei de potência (preferential attachment), publicações,
+likes, comentários, mensagens privadas, tarefas completadas e um ano de
+missões diárias com fotos. Todos os utilizadores têm a senha "123456".
+
+Uso (a partir de backend/):
+    python -m benchmarks.gerar_dados bench.db --preset medio
+    python -m benchmarks.gerar_dados bench.db --usuarios 100000 --likes 2000000
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app.database import sincronizar_sequencias
+from app.extensions import db
+from app.models import (
+    criar_schema, Usuario, UserStats, Amizade, Tarefa, TarefaUsuario, MissaoDiaria, FotoMissao,
+    Publicacao, Like, Comentario, PrivateMessage,
+)
+from app.services.friends_service import reconciliar_contadores
+from app.services.gamification_service import calcular_nivel
+from app.services.tasks_catalog import inicio_periodo
+from ._app import criar_app
+
+PRESETS = {
+    'pequeno': dict(usuarios=1_000, amizades_media=10, posts=5_000, likes=50_000,
+                    comentarios=10_000, mensagens=50_000, dias=30, participacao=0.1),
+    'medio': dict(usuarios=20_000, amizades_media=20, posts=100_000, likes=1_000_000,
+                  comentarios=200_000, mensagens=1_000_000, dias=365, participacao=0.05),
+    'grande': dict(usuarios=100_000, amizades_media=30, posts=500_000, likes=5_000_000,
+                   comentarios=1_000_000, mensagens=5_000_000, dias=365, participacao=0.05),
+}
+
+_LOTE = 10_000
+
+CATEGORIAS = ['geral', 'reciclagem', 'energia', 'agua', 'transporte']
+
+
+def _inserir(modelo, linhas) -> int:
+    """Insere em lotes via Core (executemany) — sem objetos ORM."""
+    total = 0
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= _LOTE:
+            db.session.execute(modelo.__table__.insert(), lote)
+            db.session.commit()
+            total += len(lote)
+            lote = []
+    if lote:
+        db.session.execute(modelo.__table__.insert(), lote)
+        db.session.commit()
+        total += len(lote)
+    return total
+
+
+def _proximo_id(modelo) -> int:
+    return (db.session.query(db.func.max(modelo.id)).scalar() or 0) + 1
+
+
+def _instante(rnd: random.Random, inicio: datetime, dias: int) -> datetime:
+    return inicio + timedelta(seconds=rnd.uniform(0, dias * 86400))
+
+
+def _grafo_amizades(rnd: random.Random, ids: list[int], media: int) -> list[tuple[int, int]]:
+    """Preferential attachment: o grau segue aproximadamente uma lei de potência."""
+    m = max(1, media // 2)
+    extremos: list[int] = ids[:m + 1]
+    pares: set[tuple[int, int]] = set()
+    for i, a in enumerate(ids[:m + 1]):
+        for b in ids[i + 1:m + 1]:
+            pares.add((a, b))
+
+    for novo in ids[m + 1:]:
+        alvos = {rnd.choice(extremos) for _ in range(m)}
+        alvos.discard(novo)
+        for alvo in alvos:
+            pares.add((alvo, novo) if rnd.random() < 0.5 else (novo, alvo))
+            extremos.append(alvo)
+            extremos.append(novo)
+    return list(pares)
+
+
+def gerar(args) -> None:
+    rnd = random.Random(args.seed)
+    agora = datetime.now().replace(microsecond=0)
+    inicio = agora - timedelta(days=args.dias)
+    t0 = time.perf_counter()
+
+    def passo(nome, n):
+        print(f"  {nome:<22} {n:>10,}  ({time.perf_counter() - t0:6.1f}s)")
+
+    # ── utilizadores + stats ────────────────────────────────────────
+    senha = generate_password_hash('123456')
+    primeiro = _proximo_id(Usuario)
+    ids = list(range(primeiro, primeiro + args.usuarios))
+    passo('usuarios', _inserir(Usuario, (
+        {'id': uid, 'nome': f'Eco User {uid}', 'email': f'user{uid}@bench.eco', 'senha': senha,
+         'nome_busca': f'eco user {uid}', 'email_busca': f'user{uid}@bench.eco'}
+        for uid in ids
+    )))
+
+    def _stats(uid):
+        pontos = int(rnd.paretovariate(1.2) * 100)
+        streak = rnd.randint(0, 30)
+        return {
+            'user_id': uid, 'pontos': pontos, 'nivel': calcular_nivel(pontos),
+            'tarefas_completas': rnd.randint(0, 200), 'dias_ativos': rnd.randint(0, args.dias),
+            'streak_atual': streak,
+            'ultima_missao': date.today() - timedelta(days=rnd.randint(0, 3)) if streak else None,
+        }
+    passo('user_stats', _inserir(UserStats, (_stats(uid) for uid in ids)))
+
+    # ── amizades ────────────────────────────────────────────────────
+    pares = _grafo_amizades(rnd, ids, args.amizades_media)
+    estados = ['pendente' if rnd.random() < 0.05 else 'aceito' for _ in pares]
+    # Aceites nos dois sentidos, pendentes só do remetente (ver models/friends.py)
+    passo('amizades', _inserir(Amizade, (
+        {'user_id': x, 'friend_id': y, 'status': estado}
+        for (a, b), estado in zip(pares, estados)
+        for x, y in (((a, b), (b, a)) if estado == 'aceito' else ((a, b),))
+    )))
+    with db.engine.begin() as conn:
+        passo('contadores amizade', len(reconciliar_contadores(conn)))
+    aceites = [p for p, estado in zip(pares, estados) if estado == 'aceito']
+
+    # Autores/leitores ativos: pesos Zipf para haver "influencers"
+    pesos = [1 / (i + 1) ** 0.8 for i in range(len(ids))]
+    ativos = ids[:]
+    rnd.shuffle(ativos)
+
+    # ── publicações, likes, comentários ─────────────────────────────
+    primeiro_post = _proximo_id(Publicacao)
+    autores = rnd.choices(ativos, weights=pesos, k=args.posts)
+    passo('publicacoes', _inserir(Publicacao, (
+        {'id': primeiro_post + i, 'user_id': autor,
+         'descricao': f'Ação sustentável #{primeiro_post + i}',
+         'categoria': rnd.choice(CATEGORIAS), 'criada_em': _instante(rnd, inicio, args.dias)}
+        for i, autor in enumerate(autores)
+    )))
+    posts = list(range(primeiro_post, primeiro_post + args.posts))
+    pesos_posts = [1 / (i + 1) ** 0.9 for i in range(len(posts))]
+
+    def _likes():
+        vistos = set()
+        alvos = rnd.choices(posts, weights=pesos_posts, k=args.likes)
+        for post_id in alvos:
+            uid = rnd.choice(ids)
+            if (uid, post_id) in vistos:
+                continue
+            vistos.add((uid, post_id))
+            yield {'user_id': uid, 'publicacao_id': post_id}
+    passo('likes', _inserir(Like, _likes()))
+
+    passo('comentarios', _inserir(Comentario, (
+        {'user_id': rnd.choice(ids), 'publicacao_id': post_id,
+         'texto': 'Muito bem! 🌱', 'criada_em': _instante(rnd, inicio, args.dias)}
+        for post_id in rnd.choices(posts, weights=pesos_posts, k=args.comentarios)
+    )))
+
+    # ── mensagens privadas entre amigos ─────────────────────────────
+    def _mensagens():
+        if not aceites:
+            return
+        conversas = rnd.choices(aceites, k=args.mensagens)
+        for a, b in conversas:
+            sender, receiver = (a, b) if rnd.random() < 0.5 else (b, a)
+            criada = _instante(rnd, inicio, args.dias)
+            lida = criada + timedelta(minutes=5) if criada < agora - timedelta(days=1) else None
+            yield {'sender_id': sender, 'receiver_id': receiver, 'content': 'Olá! 🌍',
+                   'created_at': criada, 'read_at': lida}
+    passo('mensagens', _inserir(PrivateMessage, _mensagens()))
+
+    # ── tarefas e missões diárias ───────────────────────────────────
+    tarefas = Tarefa.query.all()
+    if tarefas:
+        def _tarefas_usuario():
+            for uid in ids:
+                for t in rnd.sample(tarefas, rnd.randint(0, len(tarefas))):
+                    instante = _instante(rnd, inicio, args.dias)
+                    yield {'user_id': uid, 'tarefa_id': t.id, 'completada_em': instante,
+                           'periodo_inicio': inicio_periodo(t.categoria, instante.date())}
+        passo('tarefas_usuario', _inserir(TarefaUsuario, _tarefas_usuario()))
+
+        diarias = [t for t in tarefas if t.categoria == 'daily'] or tarefas
+        existentes = {d for (d,) in db.session.query(MissaoDiaria.data)}
+        primeira_missao = _proximo_id(MissaoDiaria)
+        missoes = []
+        for i in range(args.dias):
+            dia = date.today() - timedelta(days=args.dias - 1 - i)
+            if dia not in existentes:
+                missoes.append({'id': primeira_missao + len(missoes), 'data': dia,
+                                'tarefa_id': rnd.choice(diarias).id})
+        passo('missoes_diarias', _inserir(MissaoDiaria, missoes))
+
+        def _fotos():
+            for m in missoes:
+                enviada = datetime.combine(m['data'], datetime.min.time())
+                n = int(len(ids) * args.participacao)
+                for uid in rnd.sample(ids, n):
+                    yield {'user_id': uid, 'missao_id': m['id'], 'filename': f'bench_{uid}.jpg',
+                           'enviada_em': enviada + timedelta(seconds=rnd.randint(0, 86399))}
+        passo('fotos_missao', _inserir(FotoMissao, _fotos()))
+
+    # Os ids foram inseridos explicitamente: no PostgreSQL as sequências ficam para trás
+    with db.engine.begin() as conn:
+        sincronizar_sequencias(conn, db.metadata.sorted_tables)
+
+    print(f"Concluído em {time.perf_counter() - t0:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Popula uma BD com dados sintéticos.')
+    parser.add_argument('db', help='caminho do ficheiro SQLite ou URI SQLAlchemy')
+    parser.add_argument('--preset', choices=PRESETS, default='pequeno')
+    parser.add_argument('--usuarios', type=int)
+    parser.add_argument('--amizades-media', type=int, help='grau médio do grafo de amizades')
+    parser.add_argument('--posts', type=int)
+    parser.add_argument('--likes', type=int)
+    parser.add_argument('--comentarios', type=int)
+    parser.add_argument('--mensagens', type=int)
+    parser.add_argument('--dias', type=int, help='dias de histórico (missões diárias)')
+    parser.add_argument('--participacao', type=float,
+                        help='fração de utilizadores que envia foto em cada missão')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for chave, valor in PRESETS[args.preset].items():
+        if getattr(args, chave) is None:
+            setattr(args, chave, valor)
+
+    app = criar_app(args.db)
+    with app.app_context():
+        criar_schema()
+        gerar(args)
+
+
+if __name__ == '__main__':
+    main()
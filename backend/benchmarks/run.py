@@ -0,0 +1,199 @@
+"""
+Benchmark dos caminhos principais, em processo (Flask test client).
+
+Cenários: feed, ranking, conversas, historico, tarefas, perfil, amigos,
+socket_chat. Cada cenário corre durante --duracao segundos com --threads
+clientes em paralelo e reporta throughput e percentis de latência.
+
+Uso (a partir de backend/, sobre uma BD criada com benchmarks.gerar_dados):
+    python -m benchmarks.run bench.db
+    python -m benchmarks.run bench.db --cenarios feed,ranking --guardar base.json
+    python -m benchmarks.run bench.db --comparar base.json
+    python -m benchmarks.run bench.db --sem-cache      # mede as queries, não a cache
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+
+from app.extensions import db, socketio
+from app.models import Amizade, Usuario
+from ._app import criar_app, percentil
+
+
+def _amostra_pares(n: int, seed: int) -> list[tuple[int, int]]:
+    """Pares (user, amigo) com amizade aceite, para cenários que precisam de sessão."""
+    rnd = random.Random(seed)
+    total = Amizade.query.filter_by(status='aceito').count()
+    if not total:
+        return []
+    offsets = sorted(rnd.sample(range(total), min(n, total)))
+    pares = []
+    for off in offsets:
+        a = Amizade.query.filter_by(status='aceito').order_by(Amizade.id).offset(off).first()
+        pares.append((a.user_id, a.friend_id))
+    return pares
+
+
+def _login(cliente, user_id: int) -> None:
+    email = db.session.get(Usuario, user_id).email
+    resp = cliente.post('/api/login', json={'email': email, 'senha': '123456'})
+    assert resp.status_code == 200, f"login falhou para {email}"
+
+
+# ── cenários ──────────────────────────────────────────────────────────────────
+# Cada cenário recebe (app, pares, rnd) e devolve uma função `passo()` por
+# thread; `passo()` faz uma operação e devolve True se correu bem.
+
+def _cenario_get(rota):
+    def preparar(app, pares, rnd):
+        cliente = app.test_client()
+
+        def passo():
+            user_id, friend_id = rnd.choice(pares)
+            return cliente.get(rota.format(user_id=user_id, friend_id=friend_id)).status_code == 200
+        return passo
+    return preparar
+
+
+def _cenario_sessao(rota):
+    def preparar(app, pares, rnd):
+        user_id, friend_id = rnd.choice(pares)
+        cliente = app.test_client()
+        with app.app_context():
+            _login(cliente, user_id)
+
+        def passo():
+            return cliente.get(rota.format(friend_id=friend_id)).status_code == 200
+        return passo
+    return preparar
+
+
+def _cenario_socket_chat(app, pares, rnd):
+    user_id, friend_id = rnd.choice(pares)
+    cliente_http = app.test_client()
+    with app.app_context():
+        _login(cliente_http, user_id)
+    sio = socketio.test_client(app, flask_test_client=cliente_http)
+
+    def passo():
+        sio.emit('private_message', {'receiver_id': friend_id, 'content': 'bench 🌱'})
+        recebidos = sio.get_received()
+        return any(m['name'] == 'new_private_message' for m in recebidos)
+    return passo
+
+
+CENARIOS = {
+    'feed': _cenario_get('/api/feed/{user_id}'),
+    'ranking': _cenario_get('/api/ranking'),
+    'perfil': _cenario_get('/api/profile/{user_id}'),
+    'amigos': _cenario_get('/api/friends/{user_id}'),
+    'tarefas': _cenario_get('/api/tasks/user/{user_id}'),
+    'conversas': _cenario_sessao('/api/private-chat/conversations'),
+    'historico': _cenario_sessao('/api/private-chat/messages/{friend_id}'),
+    'socket_chat': _cenario_socket_chat,
+}
+
+
+def correr(app, nome: str, pares, threads: int, duracao: float, seed: int) -> dict:
+    latencias: list[float] = []
+    erros = [0]
+    lock = threading.Lock()
+    fim = [float('inf')]   # definido quando todas as threads estiverem prontas
+    pronto = threading.Barrier(threads + 1)
+
+    def trabalhador(i):
+        rnd = random.Random(seed * 1000 + i)
+        passo = CENARIOS[nome](app, pares, rnd)
+        locais, falhas = [], 0
+        pronto.wait()
+        while time.perf_counter() < fim[0]:
+            t = time.perf_counter()
+            ok = passo()
+            locais.append(time.perf_counter() - t)
+            falhas += not ok
+        with lock:
+            latencias.extend(locais)
+            erros[0] += falhas
+
+    ts = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    pronto.wait()
+    inicio = time.perf_counter()
+    fim[0] = inicio + duracao
+    for t in ts:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'pedidos': len(latencias),
+        'erros': erros[0],
+        'rps': round(len(latencias) / decorrido, 1),
+        'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+        'max_ms': round(latencias[-1] * 1000, 2) if latencias else 0.0,
+    }
+
+
+def _imprimir(resultados: dict, base: dict | None) -> None:
+    cab = f"{'cenário':<12} {'pedidos':>8} {'erros':>6} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    if base:
+        cab += f" {'Δ req/s':>9} {'Δ p95':>8}"
+    print(cab)
+    for nome, r in resultados.items():
+        linha = (f"{nome:<12} {r['pedidos']:>8} {r['erros']:>6} {r['rps']:>9} "
+                 f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}")
+        if base and nome in base:
+            b = base[nome]
+            d_rps = (r['rps'] / b['rps'] - 1) * 100 if b['rps'] else 0
+            d_p95 = (r['p95_ms'] / b['p95_ms'] - 1) * 100 if b['p95_ms'] else 0
+            linha += f" {d_rps:>+8.1f}% {d_p95:>+7.1f}%"
+        print(linha)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos caminhos principais da API.')
+    parser.add_argument('db', help='caminho do ficheiro SQLite ou URI SQLAlchemy')
+    parser.add_argument('--cenarios', default=','.join(CENARIOS))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duracao', type=float, default=5.0, help='segundos por cenário')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--guardar', help='grava os resultados em JSON (baseline)')
+    parser.add_argument('--comparar', help='JSON de uma corrida anterior para comparar')
+    parser.add_argument('--sem-cache', action='store_true', help='desliga a cache de respostas')
+    args = parser.parse_args()
+
+    app = criar_app(args.db, **({'CACHE_BACKEND': 'none'} if args.sem_cache else {}))
+    with app.app_context():
+        pares = _amostra_pares(200, args.seed)
+    if not pares:
+        parser.error('a BD não tem amizades aceites — gere dados com benchmarks.gerar_dados')
+
+    resultados = {}
+    for nome in args.cenarios.split(','):
+        if nome not in CENARIOS:
+            parser.error(f'cenário desconhecido: {nome}')
+        resultados[nome] = correr(app, nome, pares, args.threads, args.duracao, args.seed)
+        print(f"  {nome}: {resultados[nome]['rps']} req/s", flush=True)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)['resultados']
+
+    print()
+    _imprimir(resultados, base)
+
+    if args.guardar:
+        with open(args.guardar, 'w') as f:
+            json.dump({'db': args.db, 'threads': args.threads, 'duracao': args.duracao,
+                       'resultados': resultados}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Fixtures partilhadas pelos testes (a partir de backend/: `python -m pytest`).
+
+O fixture `uri` corre cada teste em SQLite e em PostgreSQL. A variante
+PostgreSQL precisa de TEST_POSTGRES_URL (ex.: postgresql://user@localhost/ecochat_test);
+cada teste usa um schema próprio, apagado no fim. Sem a variável, ou sem
+servidor, essa variante é ignorada (skip).
+"""
+
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.config import Config
+from app.database import normalizar_uri
+from app.extensions import db
+from app.models import criar_schema, Usuario, UserStats
+from app.services.gamification_service import calcular_nivel
+
+
+def criar_app(uri: str, **overrides):
+    config = type('TestConfig', (Config,), {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'JOBS_WORKER_EMBUTIDO': False,
+        'SOCKET_EVENT_LOG': False,
+        'REQUEST_METRICS': False,
+        **overrides,
+    })
+    return create_app(config)
+
+
+def _uri_postgres(base: str, request):
+    engine = create_engine(normalizar_uri(base))
+    try:
+        with engine.connect():
+            pass
+    except OperationalError:
+        engine.dispose()
+        pytest.skip('PostgreSQL de TEST_POSTGRES_URL indisponível')
+    schema = f'teste_{uuid.uuid4().hex[:12]}'
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA {schema}'))
+
+    def _apagar():
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        engine.dispose()
+    request.addfinalizer(_apagar)
+    return f"{base}{'&' if '?' in base else '?'}options=-csearch_path%3D{schema}"
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def uri(request, tmp_path):
+    if request.param == 'sqlite':
+        return f"sqlite:///{tmp_path / 'ecochat.db'}"
+    base = os.environ.get('TEST_POSTGRES_URL')
+    if not base:
+        pytest.skip('TEST_POSTGRES_URL não definido')
+    return _uri_postgres(base, request)
+
+
+@pytest.fixture
+def app(uri):
+    app = criar_app(uri)
+    with app.app_context():
+        criar_schema()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def novo_usuario(app):
+    """Cria utilizadores com stats: novo_usuario('Ana', pontos=10) → id."""
+    contador = iter(range(1, 10_000))
+
+    def _criar(nome: str | None = None, pontos: int = 0) -> int:
+        n = next(contador)
+        u = Usuario(nome=nome or f'Utilizador {n}', email=f'u{n}@teste.eco', senha='x')
+        db.session.add(u)
+        db.session.flush()
+        db.session.add(UserStats(user_id=u.id, pontos=pontos, nivel=calcular_nivel(pontos)))
+        db.session.commit()
+        return u.id
+    return _criar
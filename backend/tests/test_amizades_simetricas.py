@@ -0,0 +1,142 @@
+"""
+Migração 8 (amizades aceites nos dois sentidos): as consultas sem OR dão,
+depois da migração, o mesmo que as consultas com OR davam antes.
+
+As consultas "antigas" são as de antes da migração, copiadas para aqui. As
+diferenças que a migração introduz de propósito são aplicadas ao resultado
+antigo antes de comparar: cada amigo ou pedido conta uma vez (sem linhas
+repetidas) e um pedido pendente entre quem já é amigo desaparece.
+"""
+
+import itertools
+
+import pytest
+from sqlalchemy import delete, insert, or_, select, text, union_all
+
+from app.extensions import db
+from app.migrations import aplicar_pendentes
+from app.models import Amizade, Usuario
+from app.models.schema import SchemaVersion
+from app.services.friends_service import contadores, ids_amigos, listar_amigos, listar_pendentes, sao_amigos
+
+N_USUARIOS = 7
+
+# Linhas no formato antigo: uma aceite guardava um só sentido (ou os dois,
+# se os dois pedidos se cruzaram), sem a chave única por sentido
+LINHAS_ANTIGAS = [
+    (1, 2, 'aceito'),      # um sentido
+    (2, 1, 'pendente'),    # pedido ao lado de uma amizade aceite
+    (3, 1, 'aceito'),
+    (3, 1, 'aceito'),      # repetida no mesmo sentido
+    (1, 4, 'aceito'),
+    (4, 1, 'aceito'),      # já nos dois sentidos
+    (5, 1, 'pendente'),
+    (1, 5, 'pendente'),    # pedidos cruzados, ainda por aceitar
+    (6, 1, 'pendente'),
+    (6, 1, 'pendente'),    # pedido repetido
+    (2, 3, 'aceito'),
+    (6, 2, 'pendente'),
+    (7, 3, 'aceito'),
+    (3, 7, 'pendente'),
+]
+
+
+# ── Consultas antigas ─────────────────────────────────────────────────────────
+
+def _ids_amigos_antigo(user_id: int) -> list[int]:
+    amizades = db.session.execute(
+        select(Amizade.user_id, Amizade.friend_id)
+        .where(or_(Amizade.user_id == user_id, Amizade.friend_id == user_id), Amizade.status == 'aceito')
+    ).all()
+    return [b if a == user_id else a for a, b in amizades]
+
+
+def _sao_amigos_antigo(a: int, b: int) -> bool:
+    return db.session.execute(
+        select(Amizade.id).where(
+            or_((Amizade.user_id == a) & (Amizade.friend_id == b),
+                (Amizade.user_id == b) & (Amizade.friend_id == a)),
+            Amizade.status == 'aceito',
+        )
+    ).first() is not None
+
+
+def _listar_amigos_antigo(user_id: int) -> list[dict]:
+    lados = [
+        select(outro.label('amigo_id')).where(proprio == user_id, Amizade.status == 'aceito').subquery()
+        for proprio, outro in ((Amizade.user_id, Amizade.friend_id), (Amizade.friend_id, Amizade.user_id))
+    ]
+    ids = union_all(*(select(lado.c.amigo_id) for lado in lados)).subquery()
+    consulta = (
+        select(Usuario.id, Usuario.nome, Usuario.email)
+        .join(ids, ids.c.amigo_id == Usuario.id)
+        .order_by(Usuario.id)
+    )
+    return [{'id': a.id, 'nome': a.nome, 'email': a.email} for a in db.session.execute(consulta)]
+
+
+def _listar_pendentes_antigo(user_id: int) -> list[dict]:
+    consulta = (
+        select(Usuario.id, Usuario.nome, Usuario.email)
+        .join(Amizade, Usuario.id == Amizade.user_id)
+        .where(Amizade.friend_id == user_id, Amizade.status == 'pendente')
+        .order_by(Amizade.user_id)
+    )
+    return [{'id': p.id, 'nome': p.nome, 'email': p.email} for p in db.session.execute(consulta)]
+
+
+def _sem_repetidos(itens: list[dict]) -> list[dict]:
+    vistos = set()
+    return [i for i in itens if not (i['id'] in vistos or vistos.add(i['id']))]
+
+
+def _todas_as_paginas(listar, user_id: int, limite: int = 2) -> list[dict]:
+    itens, apos = [], 0
+    while True:
+        pagina = listar(user_id, apos, limite)
+        assert len(pagina) <= limite
+        itens += pagina
+        if len(pagina) < limite:
+            return itens
+        apos = pagina[-1]['id']
+
+
+# ── Teste ─────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def formato_antigo(app, novo_usuario):
+    """BD com amizades no formato de antes da migração 8, ainda por aplicar."""
+    for _ in range(N_USUARIOS):
+        novo_usuario()
+    db.session.execute(text('DROP INDEX ux_amizade_user_friend'))
+    db.session.execute(insert(Amizade), [
+        {'user_id': a, 'friend_id': b, 'status': status} for a, b, status in LINHAS_ANTIGAS
+    ])
+    db.session.execute(delete(SchemaVersion).where(SchemaVersion.versao == 8))
+    db.session.commit()
+
+
+def test_consultas_simetricas_equivalem_as_antigas(formato_antigo):
+    usuarios = range(1, N_USUARIOS + 1)
+    amigos = {u: _sem_repetidos(_listar_amigos_antigo(u)) for u in usuarios}
+    ids = {u: set(_ids_amigos_antigo(u)) for u in usuarios}
+    pares = {(a, b): _sao_amigos_antigo(a, b) for a, b in itertools.permutations(usuarios, 2)}
+    pendentes = {
+        u: [p for p in _sem_repetidos(_listar_pendentes_antigo(u)) if p['id'] not in ids[u]]
+        for u in usuarios
+    }
+    # O fixture cobre os casos que a migração tem de arrumar
+    assert _listar_amigos_antigo(1) != amigos[1]
+    assert _listar_pendentes_antigo(1) != pendentes[1]
+
+    assert aplicar_pendentes(echo=lambda *_: None) == 1
+
+    for u in usuarios:
+        assert set(db.session.execute(ids_amigos(u)).scalars()) == ids[u]
+        assert [a['id'] for a in amigos[u]] == sorted(ids[u])
+        assert _todas_as_paginas(listar_amigos, u) == amigos[u]
+        novos_pendentes = _todas_as_paginas(listar_pendentes, u)
+        assert [{k: p[k] for k in ('id', 'nome', 'email')} for p in novos_pendentes] == pendentes[u]
+        assert contadores(u)[0] == {'amigos_count': len(ids[u]), 'pendentes_count': len(pendentes[u])}
+    for (a, b), antes in pares.items():
+        assert sao_amigos(a, b) is antes
@@ -0,0 +1,71 @@
+"""
+Rollup diário da atividade (app/services/atividade_service.py) e o
+preenchimento do histórico na migração 3.
+"""
+
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.migrations import _m0003_atividade_diaria
+from app.models import AtividadeDiaria, Tarefa, TarefaUsuario, UserStats
+from app.services.atividade_service import rollup
+
+
+@pytest.fixture
+def fuso(monkeypatch):
+    """Corre o teste com o fuso local `nome` (TZ), repondo o original no fim."""
+    def _mudar(nome: str):
+        monkeypatch.setenv('TZ', nome)
+        time.tzset()
+    yield _mudar
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _tarefa() -> int:
+    tarefa = Tarefa(titulo='Regar a horta', pontos=5, categoria='daily')
+    db.session.add(tarefa)
+    db.session.flush()
+    return tarefa.id
+
+
+def test_migracao_3_mantem_os_streaks_de_ontem(app, novo_usuario):
+    hoje = date.today()
+    ontem, anteontem = hoje - timedelta(days=1), hoje - timedelta(days=2)
+    ativo, parado = novo_usuario(), novo_usuario()
+    tarefa_id = _tarefa()
+    db.session.add(TarefaUsuario(user_id=ativo, tarefa_id=tarefa_id, periodo_inicio=ontem,
+                                 completada_em=datetime.combine(ontem, datetime.min.time()).replace(hour=12)
+                                 .astimezone(timezone.utc).replace(tzinfo=None)))
+    for uid, streak, ultima in [(ativo, 4, ontem), (parado, 2, anteontem)]:
+        stats = db.session.execute(select(UserStats).where(UserStats.user_id == uid)).scalar_one()
+        stats.streak_atual, stats.ultima_missao = streak, ultima
+    db.session.commit()
+
+    with db.engine.begin() as conn:
+        _m0003_atividade_diaria(conn)
+
+    stats = {s.user_id: s for s in db.session.execute(select(UserStats)).scalars()}
+    assert (stats[ativo].streak_atual, stats[parado].streak_atual) == (4, 0)
+    assert stats[ativo].dias_ativos == 1
+
+
+def test_dias_agregados_no_fuso_local(app, novo_usuario, fuso):
+    fuso('America/Sao_Paulo')   # UTC-3, sem hora de verão
+    uid = novo_usuario()
+    tarefa_id = _tarefa()
+    # 01:30 UTC do dia 10 ainda é dia 9 em São Paulo
+    db.session.add(TarefaUsuario(user_id=uid, tarefa_id=tarefa_id, periodo_inicio=date(2026, 3, 9),
+                                 completada_em=datetime(2026, 3, 10, 1, 30)))
+    db.session.commit()
+
+    rollup(date(2026, 3, 9), date(2026, 3, 11))
+    db.session.commit()
+
+    dias = db.session.execute(select(AtividadeDiaria.dia, AtividadeDiaria.tarefas)
+                              .where(AtividadeDiaria.user_id == uid)).all()
+    assert [tuple(d) for d in dias] == [(date(2026, 3, 9), 1)]
@@ -0,0 +1,34 @@
+"""
+Busca de utilizadores por prefixo (app/services/users_service.py).
+"""
+
+from app.extensions import db
+from app.models import Usuario
+from app.services.users_service import buscar_usuarios
+
+
+def _usuario(nome: str, email: str) -> int:
+    u = Usuario(nome=nome, email=email, senha='x')
+    db.session.add(u)
+    db.session.commit()
+    return u.id
+
+
+def test_email_so_quando_coincide_pelo_email(app):
+    joana = _usuario('Joana Silva', 'jsilva@teste.eco')
+    joao = _usuario('João Costa', 'joao@teste.eco')
+    rui = _usuario('Rui', 'rjo@teste.eco')
+
+    assert buscar_usuarios('jo') == [
+        {'id': joana, 'nome': 'Joana Silva'},
+        {'id': joao, 'nome': 'João Costa', 'email': 'joao@teste.eco'},
+    ]
+    assert buscar_usuarios('rj') == [{'id': rui, 'nome': 'Rui', 'email': 'rjo@teste.eco'}]
+    assert buscar_usuarios('Rui') == [{'id': rui, 'nome': 'Rui'}]
+
+
+def test_nome_que_cresce_na_normalizacao_cabe_na_coluna(app):
+    # Cada 'ﬃ' passa a 'ffi': 100 caracteres normalizados dariam 300
+    uid = _usuario('ﬃ' * 100, 'ligaduras@teste.eco')
+    assert len(db.session.get(Usuario, uid).nome_busca) == 120
+    assert [u['id'] for u in buscar_usuarios('ffiffi')] == [uid]
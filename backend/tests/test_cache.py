@@ -0,0 +1,34 @@
+"""
+Versões das tags da cache de respostas (app/cache.py).
+"""
+
+import pytest
+
+from app.cache import MemoryBackend
+
+from conftest import criar_app
+
+
+def test_tag_esquecida_nunca_volta_atras():
+    backend = MemoryBackend(max_entries=10, max_tags=3)
+    backend.bump(['a'])
+    versao_a = backend.tag_versions(['a'])[0]
+    versao_z = backend.tag_versions(['z'])[0]
+
+    backend.bump(['b', 'c', 'd'])
+    assert list(backend._tags) == ['b', 'c', 'd']
+    # Esquecer 'a' pode dar um miss a mais ('z' muda), nunca um hit antigo
+    assert backend.tag_versions(['a'])[0] >= versao_a
+    assert backend.tag_versions(['z'])[0] >= versao_z
+
+    backend.bump(['a'])
+    assert backend.tag_versions(['a'])[0] > versao_a
+    assert len(backend._tags) == 3
+
+
+@pytest.mark.parametrize('backend', ['memory', 'none'])
+def test_versoes_locais_recusam_varios_processos(tmp_path, backend):
+    uri = f"sqlite:///{tmp_path / 'ecochat.db'}"
+    with pytest.raises(RuntimeError, match='WEB_CONCURRENCY=2'):
+        criar_app(uri, CACHE_BACKEND=backend, WEB_PROCESSOS=2)
+    assert criar_app(uri, CACHE_BACKEND=backend, WEB_PROCESSOS=1)
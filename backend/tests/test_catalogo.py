@@ -0,0 +1,133 @@
+"""
+Catálogo de tarefas em memória e bitsets de conclusão (app/services/tasks_catalog.py).
+"""
+
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.cache import cache
+from app.extensions import db
+from app.models import Tarefa, TarefaUsuario
+from app.services.tasks_catalog import catalogo, inicio_periodo
+
+
+@contextmanager
+def _queries():
+    """Conta as queries enviadas à BD dentro do bloco."""
+    feitas = []
+
+    def _contar(*args):
+        feitas.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', _contar)
+    try:
+        yield feitas
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _contar)
+
+
+@pytest.fixture
+def tarefas(app):
+    """Regar (diária), Separar (semanal), Plantar (única) → ids."""
+    novas = [Tarefa(titulo='Regar a horta', pontos=5, categoria='daily'),
+             Tarefa(titulo='Separar o lixo', pontos=10, categoria='weekly'),
+             Tarefa(titulo='Plantar uma árvore', pontos=50, categoria='special')]
+    db.session.add_all(novas)
+    db.session.commit()
+    return [t.id for t in novas]
+
+
+def _concluir(uid: int, tarefa_id: int, dia: date) -> None:
+    categoria = catalogo.snapshot().get(tarefa_id)['categoria']
+    db.session.add(TarefaUsuario(user_id=uid, tarefa_id=tarefa_id, periodo_inicio=inicio_periodo(categoria, dia)))
+    db.session.commit()
+
+
+def test_snapshot_reutilizado_ate_a_tag_mudar(app, tarefas):
+    antes = catalogo.snapshot()
+    with _queries() as feitas:
+        assert catalogo.snapshot() is antes
+    assert feitas == []
+
+    # Uma escrita desfeita não invalida
+    db.session.add(Tarefa(titulo='Desligar luzes', pontos=3, categoria='daily'))
+    db.session.flush()
+    db.session.rollback()
+    assert catalogo.snapshot() is antes
+
+    # Uma escrita ORM invalida a tag `tasks` no commit: o snapshot seguinte é outro
+    db.session.add(Tarefa(titulo='Desligar luzes', pontos=3, categoria='daily'))
+    db.session.commit()
+    depois = catalogo.snapshot()
+    assert depois is not antes and depois.versao != antes.versao
+    assert [t['titulo'] for t in depois.tarefas][-1] == 'Desligar luzes'
+    assert len(antes.tarefas) == len(depois.tarefas) - 1   # o antigo não muda para quem ainda o tem
+
+    # Alterações à mão na BD: basta invalidar a tag
+    cache.invalidate('tasks')
+    assert catalogo.snapshot() is not depois
+
+
+def test_completadas_por_periodo(app, novo_usuario, tarefas):
+    regar, separar, plantar = tarefas
+    uid = novo_usuario()
+    hoje = date.today()
+    _concluir(uid, regar, hoje - timedelta(days=1))    # período anterior: não conta
+    _concluir(uid, separar, hoje)
+    _concluir(uid, plantar, hoje - timedelta(days=400))   # única: conta para sempre
+
+    cat = catalogo.snapshot()
+    bits = catalogo.completadas(uid, cat)
+    assert bits == 1 << cat.indice[separar] | 1 << cat.indice[plantar]
+    with _queries() as feitas:
+        assert catalogo.completadas(uid, cat) == bits
+    assert feitas == []
+
+
+def test_marcar_atualiza_o_bitset_sem_ir_a_bd(app, novo_usuario, tarefas):
+    regar, separar, _ = tarefas
+    uid = novo_usuario()
+    cat = catalogo.snapshot()
+    assert catalogo.completadas(uid, cat) == 0
+
+    _concluir(uid, regar, date.today())
+    _concluir(uid, separar, date.today())
+    catalogo.marcar(uid, [regar, separar], True)
+    with _queries() as feitas:
+        assert catalogo.completadas(uid, cat) == 1 << cat.indice[regar] | 1 << cat.indice[separar]
+        catalogo.marcar(uid, [separar], False)
+        assert catalogo.completadas(uid, cat) == 1 << cat.indice[regar]
+    assert feitas == []
+
+
+def test_marcar_com_bitset_desatualizado_volta_a_ler(app, novo_usuario, tarefas):
+    regar, separar, _ = tarefas
+    uid = novo_usuario()
+    cat = catalogo.snapshot()
+    assert catalogo.completadas(uid, cat) == 0
+
+    # Outro processo conclui 'separar' e invalida a tag do utilizador
+    _concluir(uid, separar, date.today())
+    cache.invalidate(f'user:{uid}:tasks')
+    # Este só sabe de 'regar': não pode juntar um bit a um bitset que já não está em dia
+    _concluir(uid, regar, date.today())
+    catalogo.marcar(uid, [regar], True)
+    with _queries() as feitas:
+        assert catalogo.completadas(uid, cat) == 1 << cat.indice[regar] | 1 << cat.indice[separar]
+    assert len(feitas) == 1
+
+
+def test_bitset_refeito_quando_o_catalogo_muda(app, novo_usuario, tarefas):
+    regar = tarefas[0]
+    uid = novo_usuario()
+    _concluir(uid, regar, date.today())
+    catalogo.completadas(uid)
+
+    db.session.add(Tarefa(titulo='Desligar luzes', pontos=3, categoria='daily'))
+    db.session.commit()
+    cat = catalogo.snapshot()
+    with _queries() as feitas:
+        assert catalogo.completadas(uid, cat) == 1 << cat.indice[regar]
+    assert len(feitas) == 1
@@ -0,0 +1,52 @@
+"""
+Compressão das respostas e o LRU dos corpos comprimidos (app/compression.py),
+e o build do frontend servido pela app (app/routes/frontend.py).
+"""
+
+import gzip
+
+import pytest
+
+from app.routes import frontend
+
+from conftest import criar_app
+
+
+def test_mesmo_etag_com_outro_corpo_nao_reusa_bytes(tmp_path):
+    app = criar_app(f"sqlite:///{tmp_path / 'ecochat.db'}", COMPRESS_FAST=False)
+    corpos = iter(['a' * 2048, 'b' * 2048])
+
+    @app.get('/_teste/etag-fixo')
+    def _etag_fixo():
+        resp = app.response_class(next(corpos), mimetype='text/plain')
+        resp.set_etag('fixo')
+        return resp
+
+    client = app.test_client()
+    respostas = [client.get('/_teste/etag-fixo', headers={'Accept-Encoding': 'gzip'}) for _ in range(2)]
+    assert [r.headers['Content-Encoding'] for r in respostas] == ['gzip', 'gzip']
+    assert [gzip.decompress(r.data)[:1] for r in respostas] == [b'a', b'b']
+
+
+def test_rotas_do_frontend_caem_no_index(tmp_path, monkeypatch):
+    dist = tmp_path / 'build'
+    dist.mkdir()
+    (dist / 'index.html').write_text('<html>EcoChat</html>')
+    (dist / 'robots.txt').write_text('User-agent: *')
+    app = criar_app(f"sqlite:///{tmp_path / 'ecochat.db'}", FRONTEND_DIST=str(dist))
+    client = app.test_client()
+
+    assert client.get('/robots.txt').data == b'User-agent: *'
+    assert client.get('/amigos/3').data == b'<html>EcoChat</html>'     # rota do React Router
+    assert client.get('/api/nao-existe').status_code == 404
+
+    # Só um ficheiro inexistente cai no index; outros erros não são escondidos
+    enviar = frontend.send_precompressed
+
+    def _avaria(diretorio, ficheiro, **kwargs):
+        if ficheiro == 'index.html':
+            return enviar(diretorio, ficheiro, **kwargs)
+        raise PermissionError('sem acesso')
+    monkeypatch.setattr(frontend, 'send_precompressed', _avaria)
+    with pytest.raises(PermissionError):
+        client.get('/robots.txt')
@@ -0,0 +1,98 @@
+"""
+Contadores de amigos e de pedidos pendentes em UserStats
+(app/services/friends_service.py): mantidos por cada escrita e
+reparados por reconciliar_contadores.
+"""
+
+from sqlalchemy import delete, func, select, update
+
+from app.extensions import db
+from app.models import Amizade, UserStats
+from app.services.friends_service import (
+    aceitar_amizade, adicionar_amigo, contadores, reconciliar_contadores, recusar_amizade, remover_amigo,
+)
+
+
+def _contadores(*uids: int) -> list[tuple[int, int]]:
+    db.session.expire_all()
+    return [tuple(contadores(u)[0].values()) for u in uids]
+
+
+def _recontados(*uids: int) -> list[tuple[int, int]]:
+    """(amigos, pendentes) contados nas linhas de `amizade`."""
+    def _contar(*condicoes):
+        return db.session.scalar(select(func.count()).select_from(Amizade).where(*condicoes))
+    return [(_contar(Amizade.user_id == u, Amizade.status == 'aceito'),
+             _contar(Amizade.friend_id == u, Amizade.status == 'pendente')) for u in uids]
+
+
+def test_contadores_acompanham_cada_escrita(app, novo_usuario):
+    ana, rui, eva, ivo = (novo_usuario() for _ in range(4))
+    todos = (ana, rui, eva, ivo)
+
+    def _passo(esperado):
+        assert _contadores(*todos) == esperado
+        assert _recontados(*todos) == esperado
+
+    for de, para in [(rui, ana), (eva, ana), (ivo, ana)]:
+        assert adicionar_amigo(de, para)[1] is None
+    _passo([(0, 3), (0, 0), (0, 0), (0, 0)])
+    # Pedidos cruzados ana ↔ ivo (dois pedidos simultâneos passam ambos a verificação)
+    db.session.add(Amizade(user_id=ana, friend_id=ivo, status='pendente'))
+    db.session.commit()
+    assert reconciliar_contadores() == {ivo}
+    db.session.commit()
+    _passo([(0, 3), (0, 0), (0, 0), (0, 1)])
+
+    assert adicionar_amigo(rui, ana)[1] == 'Pedido já enviado'          # sem efeito
+    _passo([(0, 3), (0, 0), (0, 0), (0, 1)])
+
+    assert aceitar_amizade(ana, rui) == (True, None)
+    _passo([(1, 2), (1, 0), (0, 0), (0, 1)])
+
+    assert aceitar_amizade(ana, ivo) == (True, None)                   # leva o pedido cruzado
+    _passo([(2, 1), (1, 0), (0, 0), (1, 0)])
+
+    assert recusar_amizade(ana, eva) == (True, None)
+    _passo([(2, 0), (1, 0), (0, 0), (1, 0)])
+    assert recusar_amizade(ana, eva) == (False, 'Pedido não encontrado')
+    _passo([(2, 0), (1, 0), (0, 0), (1, 0)])
+
+    assert remover_amigo(rui, ana) == (True, None)
+    _passo([(1, 0), (0, 0), (0, 0), (1, 0)])
+
+    assert adicionar_amigo(eva, rui)[1] is None
+    assert remover_amigo(eva, rui) == (True, None)                    # desfaz um pedido enviado
+    _passo([(1, 0), (0, 0), (0, 0), (1, 0)])
+    assert remover_amigo(eva, rui) == (False, 'Amizade não encontrada')
+
+
+def test_contadores_pela_api(client, novo_usuario):
+    ana, rui = novo_usuario(), novo_usuario()
+    assert client.get(f'/api/friends/counts/{ana}').get_json() == {'amigos_count': 0, 'pendentes_count': 0}
+    client.post('/api/friends/add', json={'user_id': rui, 'alvo': 'u1@teste.eco'})
+    assert client.get(f'/api/friends/counts/{ana}').get_json() == {'amigos_count': 0, 'pendentes_count': 1}
+    client.post('/api/friends/accept', json={'user_id': ana, 'friend_id': rui})
+    assert client.get(f'/api/friends/counts/{ana}').get_json() == {'amigos_count': 1, 'pendentes_count': 0}
+    assert client.get('/api/friends/counts/999').status_code == 404
+
+
+def test_reconciliar_repara_so_os_divergentes(app, novo_usuario):
+    ana, rui, eva, ivo = (novo_usuario() for _ in range(4))
+    adicionar_amigo(rui, ana)
+    aceitar_amizade(ana, rui)
+    adicionar_amigo(eva, ana)
+    adicionar_amigo(ivo, rui)
+    assert reconciliar_contadores() == set()
+
+    # Desvios: um contador mexido à mão e uma amizade apagada sem passar pelo serviço
+    db.session.execute(update(UserStats).where(UserStats.user_id == ivo).values(amigos_count=7))
+    db.session.execute(delete(Amizade).where(Amizade.user_id == eva))
+    db.session.commit()
+    assert _contadores(ana, ivo) == [(1, 1), (7, 0)]
+
+    assert reconciliar_contadores() == {ana, ivo}
+    db.session.commit()
+    assert _contadores(ana, rui, eva, ivo) == [(1, 0), (1, 1), (0, 0), (0, 0)]
+    assert _contadores(ana, rui, eva, ivo) == _recontados(ana, rui, eva, ivo)
+    assert reconciliar_contadores() == set()
@@ -0,0 +1,103 @@
+"""As queries portáveis dão o mesmo resultado em SQLite e PostgreSQL."""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.database import copiar_dados, sincronizar_sequencias
+from app.extensions import db
+from app.models import criar_schema, Comentario, Like, PrivateMessage, Publicacao, Usuario, UserStats
+from app.services.feed_service import get_feed
+from app.services.private_chat_service import get_conversations
+from app.services.ranking_service import get_ranking
+
+from conftest import criar_app
+
+
+def test_ranking_ordena_por_pontos_e_desempata_por_id(novo_usuario):
+    ids = [novo_usuario(pontos=p) for p in (50, 80, 80, 10)]
+    ranking = get_ranking()
+    assert [r['id'] for r in ranking] == [ids[1], ids[2], ids[0], ids[3]]
+    assert [r['posicao'] for r in ranking] == [1, 2, 3, 4]
+
+
+def test_conversas_ultima_mensagem_e_nao_lidas(novo_usuario):
+    eu, ana, rui = novo_usuario(), novo_usuario('Ana'), novo_usuario('Rui')
+    t0 = datetime(2026, 1, 1, 12)
+    for minutos, de, para, texto, lida in [
+        (1, ana, eu, 'olá', False),
+        (2, eu, ana, 'olá Ana', True),
+        (3, rui, eu, 'tudo bem?', False),
+        (4, rui, eu, 'responde', False),
+        (5, ana, eu, 'até logo', False),
+    ]:
+        db.session.add(PrivateMessage(sender_id=de, receiver_id=para, content=texto,
+                                      created_at=t0 + timedelta(minutes=minutos),
+                                      read_at=t0 if lida else None))
+    db.session.commit()
+
+    conversas = get_conversations(eu)
+    assert [(c['friend']['id'], c['last_message'], c['unread_count']) for c in conversas] == [
+        (ana, 'até logo', 2),
+        (rui, 'responde', 2),
+    ]
+
+
+def test_feed_contagens_agrupadas(novo_usuario):
+    eu, outro = novo_usuario(), novo_usuario()
+    pubs = [Publicacao(user_id=outro, descricao=f'post {i}', criada_em=datetime(2026, 1, 1, i)) for i in range(3)]
+    db.session.add_all(pubs)
+    db.session.flush()
+    db.session.add_all([
+        Like(user_id=eu, publicacao_id=pubs[0].id),
+        Like(user_id=outro, publicacao_id=pubs[0].id),
+        Like(user_id=outro, publicacao_id=pubs[2].id),
+        Comentario(user_id=eu, publicacao_id=pubs[2].id, texto='boa'),
+    ])
+    db.session.commit()
+
+    feed = {p['id']: (p['likes'], p['comentarios'], p['user_liked']) for p in get_feed(eu)}
+    assert feed == {pubs[0].id: (2, 0, True), pubs[1].id: (0, 0, False), pubs[2].id: (1, 1, False)}
+
+
+def test_stats_num_round_trip(client, novo_usuario):
+    for pontos in (0, 5):
+        novo_usuario(pontos=pontos)
+    db.session.execute(UserStats.__table__.update().values(tarefas_completas=3))
+    db.session.commit()
+    resp = client.get('/api/stats').get_json()
+    assert (resp['usuarios'], resp['publicacoes'], resp['likes'], resp['tarefas_completas']) == (2, 0, 0, 6)
+
+
+def test_sincronizar_sequencias_depois_de_ids_explicitos(app):
+    with db.engine.begin() as conn:
+        conn.execute(insert(Usuario.__table__), [
+            {'id': i, 'nome': f'U{i}', 'email': f'u{i}@teste.eco', 'senha': 'x'} for i in (1, 2, 7)
+        ])
+        sincronizar_sequencias(conn, [Usuario.__table__])
+
+    novo = Usuario(nome='Novo', email='novo@teste.eco', senha='x')
+    db.session.add(novo)
+    db.session.commit()
+    assert novo.id == 8
+
+
+def test_copiar_dados_para_bd_vazia(uri, tmp_path):
+    origem = criar_app(f"sqlite:///{tmp_path / 'origem.db'}")
+    with origem.app_context():
+        criar_schema()
+        db.session.add_all(Usuario(nome=f'U{i}', email=f'u{i}@teste.eco', senha='x') for i in range(5))
+        db.session.commit()
+        copiar_dados(uri, echo=lambda *_: None)
+        db.engine.dispose()
+
+    destino = criar_app(uri)
+    with destino.app_context():
+        assert db.session.scalar(select(func.count()).select_from(Usuario)) == 5
+        # As sequências seguem os ids copiados
+        novo = Usuario(nome='Novo', email='novo@teste.eco', senha='x')
+        db.session.add(novo)
+        db.session.commit()
+        assert novo.id == 6
+        db.session.remove()
+        db.engine.dispose()
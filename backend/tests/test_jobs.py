@@ -0,0 +1,146 @@
+"""
+Fila de jobs (app/jobs.py): repetição com backoff, recuperação de jobs
+presos e o job atualizar_stats aplicado uma só vez e por ordem de dia.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.jobs import HANDLERS, Worker, enfileirar
+from app.models import Job, UserStats
+
+
+def _stats(uid: int) -> UserStats:
+    db.session.expire_all()
+    return db.session.execute(select(UserStats).where(UserStats.user_id == uid)).scalar_one()
+
+
+def _job(job_id: int) -> Job:
+    db.session.expire_all()
+    return db.session.get(Job, job_id)
+
+
+@pytest.fixture
+def instavel(monkeypatch):
+    """Handler 'teste_instavel' que falha nas primeiras `falhas` execuções."""
+    chamadas = []
+
+    def _handler(falhas):
+        chamadas.append(falhas)
+        if len(chamadas) <= falhas:
+            raise RuntimeError(f'falha {len(chamadas)}')
+
+    monkeypatch.setitem(HANDLERS, 'teste_instavel', (_handler, 0, 3))
+    return chamadas
+
+
+def _pronto_ja(job_id: int) -> None:
+    """Salta o backoff: o job fica pronto a correr agora."""
+    db.session.execute(update(Job).where(Job.id == job_id).values(executar_em=datetime.utcnow()))
+    db.session.commit()
+
+
+def test_falha_volta_a_fila_com_backoff(app, instavel):
+    job = enfileirar('teste_instavel', falhas=1)
+    db.session.commit()
+    job_id = job.id
+    worker = Worker(app, nome='a', tipos=['teste_instavel'])
+
+    antes = datetime.utcnow()
+    assert worker.processar_disponiveis() == 1
+    job = _job(job_id)
+    assert (job.estado, job.tentativas, job.worker) == ('pendente', 1, None)
+    assert 'falha 1' in job.erro
+    # JOBS_BACKOFF_BASE=2s com ±20%: ainda não está pronto
+    assert job.executar_em >= antes + timedelta(seconds=1.5)
+    assert worker.processar_disponiveis() == 0
+
+    _pronto_ja(job_id)
+    assert worker.processar_disponiveis() == 1
+    job = _job(job_id)
+    assert (job.estado, job.tentativas, job.erro) == ('concluido', 2, None)
+    assert len(instavel) == 2
+
+
+def test_esgota_as_tentativas_e_fica_falhado(app, instavel):
+    job = enfileirar('teste_instavel', falhas=10)
+    db.session.commit()
+    job_id = job.id
+    worker = Worker(app, nome='a', tipos=['teste_instavel'])
+
+    for _ in range(3):
+        _pronto_ja(job_id)
+        assert worker.processar_disponiveis() == 1
+    job = _job(job_id)
+    assert (job.estado, job.tentativas) == ('falhado', 3)
+    assert job.concluido_em is not None
+    _pronto_ja(job_id)
+    assert worker.processar_disponiveis() == 0
+
+
+def test_job_preso_e_recuperado_aplica_uma_so_vez(app, novo_usuario):
+    uid = novo_usuario(pontos=10)
+    job = enfileirar('atualizar_stats', user_id=uid, pontos=5, tarefas=1)
+    db.session.commit()
+    job_id = job.id
+
+    # O worker A reclama o job e fica parado para lá de JOBS_TIMEOUT
+    lento, rapido = Worker(app, nome='a'), Worker(app, nome='b', tipos=['atualizar_stats'])
+    linha = lento._reclamar()
+    assert linha.id == job_id
+    db.session.execute(update(Job).where(Job.id == job_id)
+                       .values(iniciado_em=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+
+    # O worker B devolve-o à fila e executa-o
+    assert rapido.recuperar_presos() == 1
+    assert rapido.processar_disponiveis() == 1
+    assert (_stats(uid).pontos, _stats(uid).tarefas_completas) == (15, 1)
+
+    # A acaba depois: as suas escritas são desfeitas
+    lento._executar(linha)
+    job = _job(job_id)
+    assert (job.estado, job.worker, job.tentativas) == ('concluido', 'b', 2)
+    assert (_stats(uid).pontos, _stats(uid).tarefas_completas) == (15, 1)
+
+
+def test_falha_de_reclamacao_perdida_nao_mexe_no_job(app, instavel):
+    job = enfileirar('teste_instavel', falhas=1)
+    db.session.commit()
+    job_id = job.id
+    lento, rapido = Worker(app, nome='a'), Worker(app, nome='b', tipos=['teste_instavel'])
+    linha = lento._reclamar()
+    db.session.execute(update(Job).where(Job.id == job_id)
+                       .values(iniciado_em=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+    rapido.recuperar_presos()
+    linha_b = rapido._reclamar()
+
+    lento._executar(linha)           # falha (1.ª chamada), mas o job já é de B
+    job = _job(job_id)
+    assert (job.estado, job.worker) == ('em_curso', 'b')
+    rapido._executar(linha_b)
+    assert _job(job_id).estado == 'concluido'
+
+
+def test_atualizar_stats_ignora_dia_anterior_a_ultima_missao(app, novo_usuario):
+    uid = novo_usuario()
+    hoje = date.today()
+    ontem, anteontem = hoje - timedelta(days=1), hoje - timedelta(days=2)
+    stats = _stats(uid)
+    stats.streak_atual, stats.ultima_missao, stats.dias_ativos = 3, ontem, 3
+    db.session.commit()
+
+    # O job de hoje corre antes do de anteontem (repetido depois de um backoff)
+    enfileirar('atualizar_stats', user_id=uid, pontos=5, tarefas=1, dia=hoje.isoformat())
+    db.session.commit()
+    enfileirar('atualizar_stats', user_id=uid, pontos=5, tarefas=1, dia=anteontem.isoformat())
+    db.session.commit()
+    assert Worker(app, tipos=['atualizar_stats']).processar_disponiveis() == 2
+
+    stats = _stats(uid)
+    assert (stats.streak_atual, stats.ultima_missao, stats.dias_ativos) == (4, hoje, 4)
+    assert (stats.pontos, stats.tarefas_completas) == (10, 2)
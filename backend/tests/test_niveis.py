@@ -0,0 +1,64 @@
+"""
+Tabela de níveis (NIVEIS) e o bisect sobre ela (app/services/gamification_service.py).
+"""
+
+import pytest
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models import UserStats
+from app.services.gamification_service import calcular_nivel, nivel_para, recalcular_niveis, sql_nivel
+
+from conftest import criar_app
+
+
+@pytest.mark.parametrize('niveis', [
+    (),
+    ((10, 'A'), (20, 'B')),               # não começa em 0
+    ((0, 'A'), (500, 'B'), (500, 'C')),   # limite repetido
+    ((0, 'A'), (1000, 'B'), (500, 'C')),  # fora de ordem
+    ((0, 'A'), (500,)),                   # entrada sem nome
+    ((0, 'A'), ('500', 'B')),             # limite não numérico
+    (0, 500),
+])
+def test_tabela_invalida_falha_no_arranque(tmp_path, niveis):
+    with pytest.raises(ValueError, match='NIVEIS'):
+        criar_app(f"sqlite:///{tmp_path / 'ecochat.db'}", NIVEIS=niveis)
+
+
+@pytest.mark.parametrize('pontos, nome, minimo, proximo, progresso', [
+    (None, 'Eco Iniciante', 0, 500, 0.0),
+    (-20, 'Eco Iniciante', 0, 500, 0.0),
+    (499, 'Eco Iniciante', 0, 500, 99.8),
+    (500, 'Guardião Verde', 500, 1000, 0.0),     # exatamente no limite
+    (750, 'Guardião Verde', 500, 1000, 50.0),
+    (1999, 'Defensor Verde', 1000, 2000, 99.9),
+    (2000, 'Eco Master', 2000, None, 100.0),     # último nível
+    (10**9, 'Eco Master', 2000, None, 100.0),
+])
+def test_nivel_para_nos_limites(app, pontos, nome, minimo, proximo, progresso):
+    assert tuple(nivel_para(pontos)) == (nome, minimo, proximo, progresso)
+    assert calcular_nivel(pontos) == nome
+
+
+def test_recalcular_niveis(app, novo_usuario):
+    pontos = [0, 499, 500, 999, 1000, 2000, 5000]
+    ids = [novo_usuario(pontos=p) for p in pontos]
+    # Um nível guardado desatualizado e outro em falta
+    db.session.execute(update(UserStats).where(UserStats.user_id == ids[0]).values(nivel='Eco Master'))
+    db.session.execute(update(UserStats).where(UserStats.user_id == ids[1]).values(nivel=None))
+    db.session.commit()
+    assert recalcular_niveis() == {ids[0], ids[1]}
+    db.session.commit()
+
+    app.config['NIVEIS'] = ((0, 'Semente'), (500, 'Rebento'), (1000, 'Árvore'), (3000, 'Floresta'))
+    alterados = recalcular_niveis()
+    db.session.commit()
+    assert alterados == set(ids)
+
+    guardados = dict(db.session.execute(select(UserStats.user_id, UserStats.nivel)).all())
+    assert [guardados[u] for u in ids] == [
+        'Semente', 'Semente', 'Rebento', 'Rebento', 'Árvore', 'Árvore', 'Floresta']
+    # A expressão SQL dá o mesmo que o bisect em Python
+    assert [db.session.scalar(select(sql_nivel(p))) for p in pontos] == [calcular_nivel(p) for p in pontos]
+    assert recalcular_niveis() == set()
@@ -0,0 +1,72 @@
+"""
+Listagens de amigos e pedidos por keyset (?apos=<último id>&limite=N),
+em app/services/friends_service.py e app/routes/friends.py.
+"""
+
+import pytest
+
+from app.services.friends_service import aceitar_amizade, adicionar_amigo, remover_amigo
+
+
+def _paginas(client, url, limite):
+    """Segue o cursor até uma página curta; devolve os ids de cada página."""
+    paginas, apos = [], 0
+    while True:
+        pagina = [a['id'] for a in client.get(f'{url}?apos={apos}&limite={limite}').get_json()]
+        paginas.append(pagina)
+        if len(pagina) < limite:
+            return paginas
+        apos = pagina[-1]
+
+
+@pytest.fixture
+def rede(app, novo_usuario):
+    """Ana com 5 amigos e 3 pedidos recebidos; ids intercalados com quem não é nenhum dos dois."""
+    ana = novo_usuario('Ana')
+    amigos, pedidos, outros = [], [], []
+    for i in range(10):
+        uid = novo_usuario()
+        (amigos if i % 2 == 0 else pedidos if i in (1, 5, 9) else outros).append(uid)
+    for uid in amigos:
+        adicionar_amigo(uid, ana)
+        aceitar_amizade(ana, uid)
+    for uid in pedidos:
+        adicionar_amigo(uid, ana)
+    return ana, amigos, pedidos, outros
+
+
+def test_limites_das_paginas(client, rede):
+    ana, amigos, pedidos, outros = rede
+    url = f'/api/friends/{ana}'
+    assert _paginas(client, url, 2) == [amigos[0:2], amigos[2:4], amigos[4:]]
+    assert _paginas(client, url, 5) == [amigos, []]          # página cheia: a seguinte vem vazia
+    assert _paginas(client, url, 6) == [amigos]
+
+    # O cursor é um id, não uma posição: pode ser de quem não é amigo
+    assert [a['id'] for a in client.get(f'{url}?apos={outros[0]}&limite=2').get_json()] == amigos[2:4]
+    assert client.get(f'{url}?apos={amigos[-1]}').get_json() == []
+
+    assert _paginas(client, f'/api/friends/pending/{ana}', 2) == [pedidos[0:2], pedidos[2:]]
+    pendentes = client.get(f'/api/friends/pending/{ana}?limite=1').get_json()
+    assert set(pendentes[0]) == {'amizade_id', 'id', 'nome', 'email'}
+
+
+def test_remover_entre_paginas_nao_salta_ninguem(client, rede):
+    ana, amigos, _, _ = rede
+    url = f'/api/friends/{ana}'
+    primeira = [a['id'] for a in client.get(f'{url}?limite=2').get_json()]
+    remover_amigo(ana, primeira[0])
+    seguinte = [a['id'] for a in client.get(f'{url}?apos={primeira[-1]}&limite=2').get_json()]
+    assert seguinte == amigos[2:4]
+
+
+@pytest.mark.parametrize('consulta', ['limite=0', 'limite=-1', 'limite=501'])
+def test_limite_fora_do_intervalo(client, rede, consulta):
+    ana = rede[0]
+    assert client.get(f'/api/friends/{ana}?{consulta}').status_code == 400
+    assert client.get(f'/api/friends/pending/{ana}?{consulta}').status_code == 400
+
+
+def test_limite_maximo_aceite(client, rede):
+    ana, amigos, _, _ = rede
+    assert [a['id'] for a in client.get(f'/api/friends/{ana}?limite=500').get_json()] == amigos
@@ -0,0 +1,46 @@
+"""
+Perfil num só SELECT e sem escritas (app/services/profile_service.py).
+"""
+
+from sqlalchemy import delete, event, func, select
+
+from app.extensions import db
+from app.models import UserStats
+from app.services.profile_service import get_profile
+
+
+def _sql_enviado():
+    """Primeira palavra de cada instrução enviada à BD a partir daqui."""
+    enviados = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: enviados.append(args[2].lstrip().split()[0]))
+    return enviados
+
+
+def test_sem_stats_devolve_valores_por_omissao_sem_escrever(app, novo_usuario):
+    uid = novo_usuario('Ana')
+    db.session.execute(delete(UserStats).where(UserStats.user_id == uid))
+    db.session.commit()
+
+    enviados = _sql_enviado()
+    perfil, erro = get_profile(uid)
+    assert erro is None
+    assert perfil == {
+        'id': uid, 'nome': 'Ana', 'email': 'u1@teste.eco', 'pontos': 0, 'nivel': 'Eco Iniciante',
+        'tarefas_completas': 0, 'dias_ativos': 0, 'amigos_count': 0, 'pendentes_count': 0,
+        'proximo_nivel': 500, 'progresso_nivel': 0.0, 'streak': 0,
+    }
+    assert [e.upper() for e in enviados] == ['SELECT']
+    db.session.rollback()
+    assert db.session.scalar(select(func.count()).select_from(UserStats).where(UserStats.user_id == uid)) == 0
+
+
+def test_perfil_por_http_nao_escreve(client, novo_usuario):
+    uid = novo_usuario('Rui', pontos=750)
+    enviados = _sql_enviado()
+    for _ in range(2):
+        resp = client.get(f'/api/profile/{uid}')
+        assert resp.status_code == 200
+    corpo = resp.get_json()
+    assert (corpo['nivel'], corpo['proximo_nivel'], corpo['progresso_nivel']) == ('Guardião Verde', 1000, 50.0)
+    assert enviados and all(e.upper() == 'SELECT' for e in enviados)
+    assert client.get('/api/profile/999').status_code == 404
@@ -0,0 +1,159 @@
+"""
+Encaminhamento primário/réplica e read-your-writes (app/database.py).
+
+A "réplica" é uma cópia do primário feita antes de este mudar, por isso
+cada leitura mostra de onde veio: o primário tem um terceiro utilizador e
+um nome alterado que a réplica não tem.
+"""
+
+import shutil
+import time
+
+import pytest
+from flask import g
+from sqlalchemy import func, select, text, update
+
+from app import database
+from app.extensions import db
+from app.models import criar_schema, Amizade, Usuario, UserStats
+
+from conftest import criar_app
+
+
+@pytest.fixture(autouse=True)
+def _limpar_janelas():
+    database._escritas_recentes.clear()
+    yield
+    database._escritas_recentes.clear()
+
+
+def _criar_usuario(nome):
+    u = Usuario(nome=nome, email=f'{nome.lower()}@teste.eco', senha='x')
+    db.session.add(u)
+    db.session.flush()
+    db.session.add(UserStats(user_id=u.id))
+    db.session.commit()
+    return u.id
+
+
+def _replicar(tmp_path, nomes, amizades=()):
+    """Cria os utilizadores e as amizades, copia o primário para a réplica e junta 'Eva' só ao primário."""
+    primario, replica = tmp_path / 'primario.db', tmp_path / 'replica.db'
+    app = criar_app(f'sqlite:///{primario}', READ_REPLICA_URIS=[f'sqlite:///{replica}'],
+                    CACHE_BACKEND='none', READ_REPLICA_STICKY_SECONDS=5)
+    with app.app_context():
+        criar_schema()
+        ids = {nome.lower(): _criar_usuario(nome) for nome in nomes}
+        db.session.add_all(Amizade(user_id=ids[a], friend_id=ids[b], status=status) for a, b, status in amizades)
+        db.session.commit()
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()       # fecha as ligações: o WAL é integrado no ficheiro
+    shutil.copy(primario, replica)
+
+    with app.app_context():
+        ids['eva'] = _criar_usuario('Eva')   # só no primário
+        db.session.remove()
+    # Sem app context aberto: cada pedido do test client tem o seu próprio `g`
+    return app, ids
+
+
+def _fechar(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def replicado(tmp_path):
+    app, ids = _replicar(tmp_path, ['Ana', 'Rui'])
+    yield app, ids
+    _fechar(app)
+
+
+@pytest.fixture
+def amizades_replicadas(tmp_path):
+    app, ids = _replicar(tmp_path, ['Ana', 'Rui', 'Ivo', 'Leo'], [
+        ('ana', 'rui', 'aceito'), ('rui', 'ana', 'aceito'),
+        ('ivo', 'ana', 'pendente'),
+        ('leo', 'ana', 'pendente'), ('ana', 'leo', 'pendente'),   # pedidos cruzados
+    ])
+    yield app, ids
+    _fechar(app)
+
+
+def test_gets_listados_leem_da_replica(replicado):
+    app, ids = replicado
+    c = app.test_client()
+    assert c.get(f"/api/profile/{ids['ana']}").status_code == 200
+    assert c.get(f"/api/profile/{ids['eva']}").status_code == 404      # a réplica ainda não a tem
+    assert c.get('/api/stats').get_json()['usuarios'] == 3              # endpoint não listado: primário
+
+
+def test_escrita_le_do_primario_durante_a_janela(replicado):
+    app, ids = replicado
+    autor = app.test_client()
+    resp = autor.post('/api/profile/update', json={'user_id': ids['ana'], 'nome': 'Ana Maria'})
+    assert resp.status_code == 200
+
+    # O mesmo cliente (cookie de sessão) e o mesmo utilizador noutro cliente leem do primário
+    assert autor.get(f"/api/profile/{ids['ana']}").get_json()['nome'] == 'Ana Maria'
+    outro = app.test_client()
+    assert outro.get(f"/api/profile/{ids['ana']}").get_json()['nome'] == 'Ana Maria'
+    # Quem não escreveu continua na réplica
+    assert outro.get(f"/api/profile/{ids['eva']}").status_code == 404
+    assert autor.get(f"/api/profile/{ids['eva']}").status_code == 200   # janela do cookie
+
+
+def test_janela_expira(replicado, monkeypatch):
+    app, ids = replicado
+    autor = app.test_client()
+    autor.post('/api/profile/update', json={'user_id': ids['ana'], 'nome': 'Ana Maria'})
+
+    agora = time.time()
+    monkeypatch.setattr(database.time, 'time', lambda: agora + 6)
+    assert autor.get(f"/api/profile/{ids['ana']}").get_json()['nome'] == 'Ana'
+    assert app.test_client().get(f"/api/profile/{ids['ana']}").get_json()['nome'] == 'Ana'
+
+
+def test_flush_vai_para_o_primario_e_fecha_a_replica(replicado):
+    app, ids = replicado
+    with app.test_request_context(f"/api/profile/{ids['rui']}"):
+        g.db_replica = 'replica_0'
+        assert db.session.scalar(select(func.count()).select_from(Usuario)) == 2
+        db.session.add(Usuario(nome='Rita', email='rita@teste.eco', senha='x'))
+        db.session.commit()
+        assert g.db_replica is None
+        assert db.session.scalar(select(func.count()).select_from(Usuario)) == 4
+
+    with app.app_context(), db.engines['replica_0'].connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM usuario')).scalar() == 2
+
+
+@pytest.mark.parametrize('acao, lista, outro, depois', [
+    ('remove', '', 'rui', False),
+    ('decline', 'pending/', 'ivo', False),
+    ('accept', '', 'leo', True),             # pedidos cruzados: só UPDATEs, sem flush
+])
+def test_escritas_em_core_abrem_a_janela(amizades_replicadas, acao, lista, outro, depois):
+    app, ids = amizades_replicadas
+    autor = app.test_client()
+    resp = autor.post(f'/api/friends/{acao}', json={'user_id': ids['ana'], 'friend_id': ids[outro]})
+    assert resp.status_code == 200
+    assert ids['ana'] in database._escritas_recentes
+
+    url = f"/api/friends/{lista}{ids['ana']}"
+    for cliente in (autor, app.test_client()):     # pelo cookie e pelo utilizador
+        assert (ids[outro] in [a['id'] for a in cliente.get(url).get_json()]) is depois
+
+
+def test_dml_em_core_vai_para_o_primario(replicado):
+    app, ids = replicado
+    with app.test_request_context(f"/api/profile/{ids['rui']}"):
+        g.db_replica = 'replica_0'
+        db.session.execute(update(Usuario).where(Usuario.id == ids['eva']).values(nome='Eva Lima'))
+        db.session.commit()
+        assert g.db_replica is None
+
+    with app.app_context():
+        assert db.session.get(Usuario, ids['eva']).nome == 'Eva Lima'
@@ -0,0 +1,46 @@
+"""
+Sugestões de amigos de amigos a partir do grafo em memória
+(app/services/friends_graph.py).
+"""
+
+from app.services import friends_graph
+from app.services.friends_graph import grafo
+from app.services.friends_service import aceitar_amizade, adicionar_amigo, remover_amigo
+
+
+def _amizade(a: int, b: int) -> None:
+    assert adicionar_amigo(a, b)[1] is None
+    assert aceitar_amizade(b, a)[1] is None
+
+
+def test_sugestoes_por_amigos_em_comum(app, novo_usuario):
+    ana, rui, eva, ivo, leo = (novo_usuario() for _ in range(5))
+    for a, b in [(ana, rui), (ana, eva), (rui, ivo), (eva, ivo), (eva, leo)]:
+        _amizade(a, b)
+    assert grafo.sugestoes(ana, 5) == [(ivo, 2), (leo, 1)]
+
+    # Um pedido pendente tira a pessoa das sugestões
+    adicionar_amigo(ana, leo)
+    assert grafo.sugestoes(ana, 5) == [(ivo, 2)]
+
+
+def test_escrita_durante_a_contagem_nao_fica_guardada(app, novo_usuario, monkeypatch):
+    ana, rui, eva, ivo = (novo_usuario() for _ in range(4))
+    for a, b in [(ana, rui), (ana, eva), (rui, ivo), (eva, ivo)]:
+        _amizade(a, b)
+    grafo.sugestoes(ana, 1)   # carrega o grafo
+
+    nsmallest = friends_graph.heapq.nsmallest
+
+    def _com_escrita(*args, **kwargs):
+        # A contagem corre sem o lock, e outro pedido escreve entretanto
+        assert grafo._lock.acquire(blocking=False)
+        grafo._lock.release()
+        monkeypatch.setattr(friends_graph.heapq, 'nsmallest', nsmallest)
+        assert remover_amigo(rui, ivo)[1] is None
+        return nsmallest(*args, **kwargs)
+
+    monkeypatch.setattr(friends_graph.heapq, 'nsmallest', _com_escrita)
+    assert grafo.sugestoes(ana, 5) == [(ivo, 2)]    # contado antes da escrita
+    assert ana not in grafo._sugestoes
+    assert grafo.sugestoes(ana, 5) == [(ivo, 1)]
@@ -0,0 +1,108 @@
+"""
+Conclusão de tarefas por período (app/services/tasks_service.py).
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, insert, select
+
+from app.cache import cache
+from app.extensions import db
+from app.models import Job, Tarefa, TarefaUsuario, UserStats
+from app.services.tasks_catalog import inicio_periodo
+from app.services.tasks_service import completar_tarefas, desmarcar_tarefa
+
+
+@pytest.fixture
+def tarefas(app):
+    """Regar (5 pontos, diária), Separar (10, semanal), Plantar (490, única) → ids."""
+    novas = [Tarefa(titulo='Regar a horta', pontos=5, categoria='daily'),
+             Tarefa(titulo='Separar o lixo', pontos=10, categoria='weekly'),
+             Tarefa(titulo='Plantar uma árvore', pontos=490, categoria='special')]
+    db.session.add_all(novas)
+    db.session.commit()
+    cache.invalidate('tasks')
+    return [t.id for t in novas]
+
+
+def _stats(uid: int) -> UserStats:
+    db.session.expire_all()
+    return db.session.execute(select(UserStats).where(UserStats.user_id == uid)).scalar_one()
+
+
+def test_lote_parcial(client, novo_usuario, tarefas):
+    regar, separar, plantar = tarefas
+    uid = novo_usuario(pontos=20)
+    stats = _stats(uid)
+    stats.streak_atual, stats.ultima_missao = 2, date.today() - timedelta(days=1)
+    db.session.commit()
+    assert completar_tarefas(uid, [regar])[1] is None
+
+    resp = client.post('/api/tasks/complete-batch', json={
+        'user_id': uid, 'tarefa_ids': [regar, 999, separar, plantar, separar]})
+    assert resp.status_code == 200
+    corpo = resp.get_json()
+    assert [(r['tarefa_id'], r['estado'], r['pontos']) for r in corpo['resultados']] == [
+        (regar, 'ja_completada', 0), (999, 'nao_encontrada', 0), (separar, 'completada', 10),
+        (plantar, 'completada', 490), (separar, 'ja_completada', 0)]
+    assert corpo['pontos_ganhos'] == 500
+    assert corpo['novos_pontos'] == 525
+    assert (corpo['nivel'], corpo['novo_nivel'], corpo['streak']) == ('Guardião Verde', 'Guardião Verde', 3)
+
+    # Aplicado no próprio pedido, sem job, e uma vez por tarefa
+    stats = _stats(uid)
+    assert (stats.pontos, stats.tarefas_completas, stats.nivel) == (525, 3, 'Guardião Verde')
+    assert (stats.streak_atual, stats.ultima_missao, stats.dias_ativos) == (3, date.today(), 1)
+    assert db.session.scalar(select(func.count()).select_from(Job)) == 0
+    assert db.session.scalar(select(func.count()).select_from(TarefaUsuario)) == 3
+
+
+def test_lote_sem_tarefas_novas_nao_mexe_nos_stats(client, novo_usuario, tarefas):
+    regar = tarefas[0]
+    uid = novo_usuario(pontos=20)
+    completar_tarefas(uid, [regar])
+
+    corpo = client.post('/api/tasks/complete-batch', json={'user_id': uid, 'tarefa_ids': [regar, 999]}).get_json()
+    assert (corpo['sucesso'], corpo['pontos_ganhos'], corpo['novos_pontos'], corpo['novo_nivel']) == (
+        False, 0, 25, None)
+    assert (_stats(uid).pontos, _stats(uid).tarefas_completas) == (25, 1)
+
+
+def test_desmarcar_devolve_os_pontos(app, novo_usuario, tarefas):
+    regar, separar, _ = tarefas
+    uid = novo_usuario()
+    completar_tarefas(uid, [regar, separar])
+
+    resultado, erro = desmarcar_tarefa(uid, separar)
+    assert erro is None and resultado['novos_pontos'] == 5
+    assert (_stats(uid).pontos, _stats(uid).tarefas_completas) == (5, 1)
+
+
+def test_pedido_paralelo_conta_como_ja_completada(app, novo_usuario, tarefas):
+    uid = novo_usuario()
+    regar, separar, _ = tarefas
+
+    # Outro pedido completa 'regar' depois da verificação e antes do INSERT deste
+    outro = create_engine(db.engine.url)
+
+    @event.listens_for(db.session, 'before_flush', once=True)
+    def _corrida(sessao, contexto, instancias):
+        with outro.begin() as conn:
+            conn.execute(insert(TarefaUsuario.__table__).values(
+                user_id=uid, tarefa_id=regar, periodo_inicio=inicio_periodo('daily', date.today())))
+
+    resultado, erro = completar_tarefas(uid, [regar, separar])
+    outro.dispose()
+
+    assert erro is None
+    assert [(r['tarefa_id'], r['estado']) for r in resultado['resultados']] == [
+        (regar, 'ja_completada'), (separar, 'completada')]
+    assert resultado['pontos_ganhos'] == 10
+    contagens = db.session.execute(
+        select(TarefaUsuario.tarefa_id, func.count()).where(TarefaUsuario.user_id == uid)
+        .group_by(TarefaUsuario.tarefa_id).order_by(TarefaUsuario.tarefa_id)
+    ).all()
+    assert [tuple(c) for c in contagens] == [(regar, 1), (separar, 1)]
+    # A primeira tentativa foi desfeita por inteiro: os stats só contam a repetição
+    assert (_stats(uid).pontos, _stats(uid).tarefas_completas) == (10, 1)
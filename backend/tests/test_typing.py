@@ -0,0 +1,91 @@
+"""
+Indicador "está a escrever": o TypingCoalescer (app/sockets/typing_coalescer.py)
+e o handler Socket.IO `typing` (app/sockets/chat_events.py).
+"""
+
+import pytest
+from flask import session
+
+from app.sockets import chat_events
+from app.sockets.typing_coalescer import TypingCoalescer
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 100.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+def test_so_passam_as_transicoes(relogio):
+    c = TypingCoalescer(clock=relogio)
+    assert c.update(1, 2, True) is True
+    assert c.update(1, 2, True) is None       # continua a escrever: nada a emitir
+    assert c.update(1, 3, True) is True       # outro par é independente
+    assert c.update(1, 2, False) is False
+    assert c.update(1, 2, False) is None
+    assert len(c) == 1
+
+
+def test_limite_por_sender(relogio):
+    c = TypingCoalescer(rate=2.0, burst=3, clock=relogio)
+    assert [c.update(1, r, True) for r in (10, 11, 12, 13)] == [True, True, True, None]
+    assert c.update(2, 10, True) is True      # o bucket é por sender
+    relogio.agora += 0.5                      # recarrega um token
+    assert c.update(1, 13, True) is True
+    assert c.update(1, 14, True) is None
+
+
+def test_pares_parados_expiram(relogio):
+    c = TypingCoalescer(expiry=5.0, rate=10.0, burst=20, clock=relogio)
+    c.update(1, 2, True)
+    c.update(3, 4, True)
+    relogio.agora += 3
+    c.update(3, 4, True)                      # renova o par (3, 4)
+    relogio.agora += 2
+    assert c.expire() == [(1, 2)]
+    assert c.update(1, 2, True) is True       # volta a ser uma transição
+    relogio.agora += 10
+    assert sorted(c.expire()) == [(1, 2), (3, 4)]
+    assert len(c) == 0 and c._buckets == {}   # buckets recarregados também saem
+
+
+def test_drop_sender(relogio):
+    c = TypingCoalescer(clock=relogio)
+    c.update(1, 2, True)
+    c.update(1, 3, True)
+    c.update(4, 2, True)
+    assert sorted(c.drop_sender(1)) == [2, 3]
+    assert len(c) == 1 and 1 not in c._buckets
+
+
+@pytest.fixture
+def typing(app, monkeypatch):
+    """Chama o handler `typing` como o utilizador 1; devolve os avisos emitidos."""
+    emitidos = []
+    monkeypatch.setattr(chat_events, '_emit_typing', lambda *args: emitidos.append(args))
+
+    def _enviar(dados):
+        with app.test_request_context():
+            session['user_id'] = 1
+            chat_events.on_typing(dados)
+        return emitidos
+    return _enviar
+
+
+@pytest.mark.parametrize('receiver_id', [None, 'abc', [2], 0])
+def test_typing_ignora_receiver_invalido(app, typing, receiver_id):
+    assert typing({'receiver_id': receiver_id, 'is_typing': True}) == []
+    assert 'typing_coalescer' not in app.extensions
+
+
+def test_typing_emite_so_as_transicoes(typing):
+    typing({'receiver_id': '2', 'is_typing': True})
+    typing({'receiver_id': 2, 'is_typing': True})
+    assert typing({'receiver_id': 2, 'is_typing': False}) == [(1, 2, True), (1, 2, False)]
@@ -19,6 +19,61 @@ interface PendingRequest {
   email: string;
 }
 
+interface FriendCounts {
+  amigos_count: number;
+  pendentes_count: number;
+}
+
+// As listagens são paginadas por id (?apos=<último id>&limite=N); uma página
+// mais curta do que o limite é a última. Só se pede a página seguinte quando
+// o utilizador carrega em "Carregar mais"; os totais vêm de /counts.
+const PAGE_SIZE = 100;
+
+async function fetchPage<T extends { id: number }>(url: string, after = 0): Promise<T[]> {
+  const res = await fetch(`${url}?apos=${after}&limite=${PAGE_SIZE}`);
+  if (!res.ok) throw new Error("Erro");
+  return res.json();
+}
+
+function usePagedList<T extends { id: number }>(url: string) {
+  const [items, setItems] = useState<T[]>([]);
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // Volta à primeira página (depois de uma alteração à lista)
+  const reload = async () => {
+    const page = await fetchPage<T>(url);
+    setItems(page);
+    setHasMore(page.length === PAGE_SIZE);
+  };
+
+  const loadMore = async () => {
+    if (!hasMore || loadingMore || items.length === 0) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage<T>(url, items[items.length - 1].id);
+      setItems((prev) => [...prev, ...page]);
+      setHasMore(page.length === PAGE_SIZE);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  return { items, hasMore, loadingMore, reload, loadMore };
+}
+
+function LoadMoreButton({ loading, onClick }: { loading: boolean; onClick: () => void }) {
+  return (
+    <button
+      onClick={onClick}
+      disabled={loading}
+      className="w-full mt-3 py-2 rounded-lg text-sm font-medium text-green-700 dark:text-green-300 hover:bg-green-50 dark:hover:bg-green-900/30 disabled:opacity-50"
+    >
+      {loading ? "Carregando..." : "Carregar mais"}
+    </button>
+  );
+}
+
 interface FriendsSectionProps {
   userId: number;
   onOpenChat?: (friendId: number, friendName: string) => void;
@@ -26,18 +81,27 @@ interface FriendsSectionProps {
 
 export function FriendsSection({ userId, onOpenChat }: FriendsSectionProps) {
   const [searchTerm, setSearchTerm] = useState("");
-  const [friends, setFriends] = useState<Friend[]>([]);
-  const [pendingRequests, setPendingRequests] = useState<PendingRequest[]>([]);
+  const friendsList = usePagedList<Friend>(`http://localhost:5000/api/friends/${userId}`);
+  const pendingList = usePagedList<PendingRequest>(`http://localhost:5000/api/friends/pending/${userId}`);
+  const friends = friendsList.items;
+  const pendingRequests = pendingList.items;
+  const [counts, setCounts] = useState<FriendCounts>({ amigos_count: 0, pendentes_count: 0 });
   const [loading, setLoading] = useState(true);
   const [addValue, setAddValue] = useState("");
   const [isAdding, setIsAdding] = useState(false);
 
+  const loadCounts = async () => {
+    try {
+      const res = await fetch(`http://localhost:5000/api/friends/counts/${userId}`);
+      if (res.ok) setCounts(await res.json());
+    } catch (err) {
+      console.error("Erro ao carregar contadores:", err);
+    }
+  };
+
   const loadFriends = async () => {
     try {
-      const res = await fetch(`http://localhost:5000/api/friends/${userId}`);
-      if (!res.ok) throw new Error("Erro");
-      const data: Friend[] = await res.json();
-      setFriends(data);
+      await Promise.all([friendsList.reload(), loadCounts()]);
     } catch (err) {
       console.error("Erro ao carregar amigos:", err);
       toast.error("Erro ao carregar amigos");
@@ -46,15 +110,21 @@ export function FriendsSection({ userId, onOpenChat }: FriendsSectionProps) {
 
   const loadPending = async () => {
     try {
-      const res = await fetch(`http://localhost:5000/api/friends/pending/${userId}`);
-      if (!res.ok) throw new Error("Erro");
-      const data: PendingRequest[] = await res.json();
-      setPendingRequests(data);
+      await Promise.all([pendingList.reload(), loadCounts()]);
     } catch (err) {
       console.error("Erro ao carregar pendentes:", err);
     }
   };
 
+  const loadMore = async (list: { loadMore: () => Promise<void> }) => {
+    try {
+      await list.loadMore();
+    } catch (err) {
+      console.error("Erro ao carregar mais:", err);
+      toast.error("Erro ao carregar mais");
+    }
+  };
+
   useEffect(() => {
     if (userId) {
       const loadData = async () => {
@@ -255,7 +325,7 @@ export function FriendsSection({ userId, onOpenChat }: FriendsSectionProps) {
           <CardHeader>
             <CardTitle className="flex items-center gap-2 text-gray-900 dark:text-gray-100">
               <Clock size={20} className="text-yellow-600 dark:text-yellow-400" />
-              Pedidos Pendentes ({pendingRequests.length})
+              Pedidos Pendentes ({Math.max(counts.pendentes_count, pendingRequests.length)})
             </CardTitle>
             <CardDescription className="text-gray-600 dark:text-gray-400">
               Pessoas que querem ser suas amigas
@@ -325,6 +395,9 @@ export function FriendsSection({ userId, onOpenChat }: FriendsSectionProps) {
                 </div>
               ))}
             </div>
+            {pendingList.hasMore && (
+              <LoadMoreButton loading={pendingList.loadingMore} onClick={() => loadMore(pendingList)} />
+            )}
           </CardContent>
         </Card>
       )}
@@ -349,7 +422,7 @@ export function FriendsSection({ userId, onOpenChat }: FriendsSectionProps) {
         <CardHeader>
           <CardTitle className="text-gray-900 dark:text-gray-100">Meus Amigos</CardTitle>
           <CardDescription className="text-gray-600 dark:text-gray-400">
-            {friends.length === 0 ? "Nenhum amigo ainda" : `${friends.length} amigos`}
+            {friends.length === 0 ? "Nenhum amigo ainda" : `${Math.max(counts.amigos_count, friends.length)} amigos`}
           </CardDescription>
         </CardHeader>
         <CardContent>
@@ -426,6 +499,10 @@ export function FriendsSection({ userId, onOpenChat }: FriendsSectionProps) {
               ))}
             </div>
           )}
+          {/* A busca só filtra os amigos já carregados */}
+          {friendsList.hasMore && (
+            <LoadMoreButton loading={friendsList.loadingMore} onClick={() => loadMore(friendsList)} />
+          )}
         </CardContent>
       </Card>
     </div>
@@ -29,7 +29,8 @@ export function ProfileSection({ onLogout, userId, isDarkMode = false, toggleThe
   const [userStats, setUserStats] = useState({
     level: 'Carregando...',
     points: 0,
-    nextLevel: 2000,
+    nextLevel: 2000 as number | null,
+    levelProgress: 0,
     tasksCompleted: 0,
     friendsCount: 0,
     daysActive: 0,
@@ -68,6 +69,7 @@ export function ProfileSection({ onLogout, userId, isDarkMode = false, toggleThe
             level: data.nivel,
             points: data.pontos,
             nextLevel: data.proximo_nivel,
+            levelProgress: data.progresso_nivel,
             tasksCompleted: data.tarefas_completas,
             friendsCount: data.amigos_count,
             daysActive: data.dias_ativos,
@@ -164,7 +166,7 @@ export function ProfileSection({ onLogout, userId, isDarkMode = false, toggleThe
     }
   };
 
-  const progressToNextLevel = (userStats.points / userStats.nextLevel) * 100;
+  const progressToNextLevel = userStats.levelProgress;
 
   if (isLoading) {
     return (
@@ -247,7 +249,9 @@ export function ProfileSection({ onLogout, userId, isDarkMode = false, toggleThe
                       Progresso para o próximo nível
                     </span>
                     <span className="text-sm text-green-600 dark:text-green-400">
-                      {userStats.points} / {userStats.nextLevel} pts
+                      {userStats.nextLevel === null
+                        ? `${userStats.points} pts · nível máximo`
+                        : `${userStats.points} / ${userStats.nextLevel} pts`}
                     </span>
                   </div>
                   <Progress value={progressToNextLevel} />